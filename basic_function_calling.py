@@ -4,7 +4,7 @@ from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.tools import tool
 from langchain.agents import create_tool_calling_agent, AgentExecutor
 from langchain_openai import ChatOpenAI
-from langchain_tavily import TavilySearch
+from search_cache import CachedTavilySearch
 import os
 
 load_dotenv()
@@ -30,7 +30,7 @@ if __name__ == "__main__":
         ]
     )
 
-    tools = [TavilySearch(max_results=2), multiply]
+    tools = [CachedTavilySearch(max_results=2), multiply]
     # llm = ChatOpenAI(model="gpt-4.1")
     llm = ChatAnthropic(model="claude-sonnet-4-20250514", temperature=0)
 
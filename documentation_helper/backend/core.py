@@ -7,13 +7,28 @@ from langchain_pinecone import PineconeVectorStore
 from langchain_openai import OpenAIEmbeddings
 from langchain import hub
 from typing import List, Dict, Any
+from functools import lru_cache
 import os
+import sys
+
+# Make the shared modules of the repository root importable (the BM25 / hybrid retriever of the vector_databases example)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from vector_databases.hybrid_retrieval import HybridRetriever, LocalBM25Retriever
+from vector_databases.context_packing import get_context_packer
 
 load_dotenv("../.env")
 
 # Define the index name
 INDEX_NAME = os.environ.get("PINECONE_INDEX_NAME")
 
+# Define the local BM25 index built by ingestion.py next to the Pinecone upload
+BM25_INDEX_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bm25_index")
+
+# Load the BM25 index once per process instead of once per question
+@lru_cache(maxsize=1)
+def get_bm25_retriever() -> LocalBM25Retriever:
+    return LocalBM25Retriever.load_local(BM25_INDEX_PATH)
+
 # Define the retrieval chain
 def run_llm(query: str, chat_history: List[Dict[str, Any]]):
     """Run the LLM with the given query."""
@@ -23,6 +38,10 @@ def run_llm(query: str, chat_history: List[Dict[str, Any]]):
         embedding=embeddings
     )
     retriever = vector_store.as_retriever()
+
+    # Fuse the dense results with the local BM25 ones (identifier lookups like class names skip the embedding call)
+    if os.path.exists(BM25_INDEX_PATH):
+        retriever = HybridRetriever(bm25_retriever=get_bm25_retriever(), vector_retriever=retriever)
     
     llm = ChatOpenAI(model="gpt-4.1", verbose=True, temperature=0)
     
@@ -36,7 +55,8 @@ def run_llm(query: str, chat_history: List[Dict[str, Any]]):
     history_aware_retriever = create_history_aware_retriever(llm=llm, retriever=retriever, prompt=rephrase_prompt)
 
     stuff_document_chain = create_stuff_documents_chain(llm, prompt)
-    retrieval_chain = create_retrieval_chain(retriever=history_aware_retriever, combine_docs_chain=stuff_document_chain) 
+    # Merge overlapping chunks, drop duplicates and keep the stuffed context within the token budget
+    retrieval_chain = create_retrieval_chain(retriever=history_aware_retriever | get_context_packer(), combine_docs_chain=stuff_document_chain)
     
     initial_result = retrieval_chain.invoke({"input": query, "chat_history": chat_history})
 
@@ -1,4 +1,5 @@
 import os
+import sys
 from dotenv import load_dotenv
 from tqdm import tqdm
 
@@ -11,9 +12,25 @@ from langchain_pinecone import PineconeVectorStore
 from langchain_core.documents import Document
 from firecrawl import FirecrawlApp, ScrapeOptions
 
+# Make the shared modules of the repository root importable (the BM25 index of the vector_databases example)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from vector_databases.hybrid_retrieval import BM25Index
+from vector_databases.context_packing import add_token_counts
+
+# Define the local BM25 index read by the hybrid retriever in backend/core.py
+BM25_INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bm25_index")
+
 # Initialize the embeddings model
 embeddings = OpenAIEmbeddings(model="text-embedding-3-small", api_key=os.getenv("OPENAI_API_KEY"))
 
+# Define a function to build the local BM25 index over the chunks uploaded to Pinecone
+def save_bm25_index(documents) -> None:
+    if not documents:
+        print("No documents to index, the BM25 index is not stored")
+        return
+    BM25Index.from_documents(documents).save_local(BM25_INDEX_PATH)
+    print("BM25 index stored successfully")
+
 # Create function to ingest the data
 def ingest_docs():
     # Load the data using DirectoryLoader with UTF-8 encoding
@@ -36,7 +53,7 @@ def ingest_docs():
 
     # Split into chunks
     text_splitter = RecursiveCharacterTextSplitter(chunk_size=600, chunk_overlap=50, add_start_index=True)
-    documents = text_splitter.split_documents(raw_documents)
+    documents = add_token_counts(text_splitter.split_documents(raw_documents)) # Cache token counts for the context packer
     print(f"Split into {len(documents)} chunks")
 
     ## Update the metadata for each document
@@ -62,6 +79,9 @@ def ingest_docs():
         # Add batch to vector store
         vector_store.add_documents(batch)
 
+    # Build the local BM25 index over the same chunks for the hybrid retriever in backend/core.py
+    save_bm25_index(documents)
+
     print("Data ingested successfully")
 
 # Define a function to ingest the data using Firecrawl
@@ -89,6 +109,7 @@ def ingest_docs_firecrawl() -> None:
     
     # Initialize Firecrawl app
     app = FirecrawlApp(api_key=os.getenv("FIRECRAWL_API_KEY"))
+    all_docs = []
 
     for url in langchain_documents_base_urls2:
         print(f"FireCrawling {url=}")
@@ -112,6 +133,8 @@ def ingest_docs_firecrawl() -> None:
                     metadata=item.get('metadata', {})
                 )
                 docs.append(doc)
+        docs = add_token_counts(docs) # Cache token counts for the context packer
+        all_docs.extend(docs)
 
         print(f"Going to add {len(docs)} documents to Pinecone")
         
@@ -123,5 +146,8 @@ def ingest_docs_firecrawl() -> None:
         else:
             print(f"No documents found for {url}")
 
+    # Build the local BM25 index over the crawled pages as well, so the hybrid retriever is used for them too
+    save_bm25_index(all_docs)
+
 if __name__ == "__main__":
     ingest_docs_firecrawl()
\ No newline at end of file
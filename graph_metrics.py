@@ -0,0 +1,382 @@
+"""
+Latency and token instrumentation of the LangGraph apps (agentic RAG, ReAct, reflection, reflexion and the memory chats).
+
+A callback handler records every node and every LLM call of the graphs run in the process, tagged by graph (the
+name the graph is compiled with) and node:
+    wall_seconds: wall time of the node / LLM call
+    queue_seconds: for a node, the time between the end of the previous step and its start (checkpointing, scheduling);
+        for an LLM call, the time between the start of the chain calling the model and the call (prompt formatting,
+        the first build of a lazy chain, waiting for a concurrency slot)
+    prompt_tokens / completion_tokens: tokens of the LLM call, of all the LLM calls of the node for a node
+    retries: for a node, the executions of the same node before it in the run (the retry loops of the graph) plus the
+        retried LLM calls in it; for an LLM call, the attempts before this one (with_retry)
+    error: the exception type if the node / LLM call failed, empty otherwise
+
+The records are aggregated in memory (see report()), appended to a JSON lines file and exported in the Prometheus
+text format on http://localhost:<port>/metrics. The handler runs inline and only keeps the open runs in dicts, the
+file is written in batches.
+
+Configuration (environment variables):
+    GRAPH_METRICS_PATH: JSON lines file of the records (default unset, no file)
+    GRAPH_METRICS_PORT: port of the Prometheus text endpoint (default unset, no endpoint)
+
+The apps import it from the repository root and enable it in their entry point:
+`from graph_metrics import enable_graph_metrics`, then `metrics = enable_graph_metrics()` and `print(metrics.report())`.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from dotenv import load_dotenv
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.tracers.context import register_configure_hook
+
+load_dotenv()
+
+GRAPH_METRICS_PATH = os.getenv("GRAPH_METRICS_PATH") or None
+GRAPH_METRICS_PORT = int(os.getenv("GRAPH_METRICS_PORT", "0")) or None
+
+# Define the upper bounds of the wall time histogram buckets (seconds)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Define the number of records buffered before they are appended to the metrics file
+FILE_BATCH_SIZE = 256
+
+# Define a run of a graph (a top-level run of the process)
+class GraphRun:
+    def __init__(self, graph: str, started_at: float):
+        self.graph = graph
+        self.started_at = started_at
+        self.step_ends: Dict[int, float] = {}  # step -> end of its last node
+        self.executions: Dict[str, int] = {}  # node -> number of executions
+
+# Define an open node or LLM call
+class Span:
+    def __init__(self, kind: str, graph: str, node: str, name: str, started_at: float, queue_seconds: float, retries: int):
+        self.kind = kind
+        self.graph = graph
+        self.node = node
+        self.name = name
+        self.started_at = started_at
+        self.queue_seconds = queue_seconds
+        self.retries = retries
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.run: Optional[GraphRun] = None
+        self.step = 0
+        self.task = ""
+
+    def record(self, ended_at: float, error: str = "") -> Dict[str, Any]:
+        return {
+            "time": time.time(),
+            "kind": self.kind,
+            "graph": self.graph,
+            "node": self.node,
+            "name": self.name,
+            "wall_seconds": ended_at - self.started_at,
+            "queue_seconds": self.queue_seconds,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "retries": self.retries,
+            "error": error,
+        }
+
+# Define the function to read the token usage of an LLM call
+def token_usage(response: LLMResult) -> Tuple[int, int]:
+    prompt_tokens = completion_tokens = 0
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                prompt_tokens += usage.get("input_tokens", 0)
+                completion_tokens += usage.get("output_tokens", 0)
+    if not prompt_tokens and not completion_tokens:
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt_tokens, completion_tokens = usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+    return prompt_tokens, completion_tokens
+
+# Define the function to read the attempt of a run retried by with_retry (its runs are tagged "retry:attempt:N"
+# from the second attempt on)
+def retries_before(tags: Optional[List[str]]) -> int:
+    for tag in tags or ():
+        if tag.startswith("retry:attempt:"):
+            return int(tag[len("retry:attempt:"):]) - 1
+    return 0
+
+# Define the callback handler recording the nodes and the LLM calls
+class GraphMetricsHandler(BaseCallbackHandler):
+    """
+    Records the nodes (the runs tagged "graph:step:N" whose name is their langgraph_node) and the LLM calls
+    (attributed to their node by the langgraph_checkpoint_ns of their metadata) of every graph run
+    """
+
+    run_inline = True
+
+    def __init__(self, metrics: "GraphMetrics"):
+        self.metrics = metrics
+        self.runs: Dict[UUID, GraphRun] = {}  # top-level runs
+        self.nodes: Dict[UUID, Span] = {}
+        self.tasks: Dict[str, Span] = {}  # checkpoint namespace of the node task -> node
+        self.chains: Dict[UUID, Tuple[float, str]] = {}  # runs inside the nodes -> (start, checkpoint namespace)
+        self.llms: Dict[UUID, Span] = {}
+
+    @property
+    def ignore_agent(self) -> bool:
+        return True
+
+    @property
+    def ignore_retriever(self) -> bool:
+        return True
+
+    def on_chain_start(self, serialized, inputs, *, run_id: UUID, parent_run_id: Optional[UUID] = None, tags=None, metadata=None, **kwargs: Any) -> None:
+        now = time.perf_counter()
+        name = kwargs.get("name") or ""
+        if parent_run_id is None:
+            self.runs[run_id] = GraphRun(name, now)
+            return
+        task = (metadata or {}).get("langgraph_checkpoint_ns")
+        run = self.runs.get(parent_run_id)
+        if run is not None and task and metadata.get("langgraph_node") == name:
+            step = metadata.get("langgraph_step", 0)
+            ready = max(run.step_ends.get(step - 1, run.started_at), run.started_at)
+            executions = run.executions[name] = run.executions.get(name, 0) + 1
+            span = Span("node", run.graph, name, name, now, max(now - ready, 0.0), executions - 1)
+            span.run, span.step, span.task = run, step, task
+            self.nodes[run_id] = span
+            self.tasks[task] = span
+        elif task in self.tasks:
+            self.chains[run_id] = (now, task)
+
+    def on_chain_end(self, outputs, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end_chain(run_id)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end_chain(run_id, type(error).__name__)
+
+    def _end_chain(self, run_id: UUID, error: str = "") -> None:
+        span = self.nodes.pop(run_id, None)
+        if span is None:
+            if self.chains.pop(run_id, None) is None:
+                self.runs.pop(run_id, None)
+            return
+        now = time.perf_counter()
+        span.run.step_ends[span.step] = max(span.run.step_ends.get(span.step, now), now)
+        self.tasks.pop(span.task, None)
+        self.metrics.observe(span.record(now, error))
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, parent_run_id: Optional[UUID] = None, tags=None, metadata=None, **kwargs: Any) -> None:
+        self._start_llm(serialized, run_id, parent_run_id, tags, metadata, kwargs.get("name"))
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, parent_run_id: Optional[UUID] = None, tags=None, metadata=None, **kwargs: Any) -> None:
+        self._start_llm(serialized, run_id, parent_run_id, tags, metadata, kwargs.get("name"))
+
+    def _start_llm(self, serialized, run_id: UUID, parent_run_id: Optional[UUID], tags, metadata, name: Optional[str]) -> None:
+        now = time.perf_counter()
+        metadata = metadata or {}
+        node = self.tasks.get(metadata.get("langgraph_checkpoint_ns"))
+        if parent_run_id in self.chains:
+            ready = self.chains[parent_run_id][0]
+        elif parent_run_id in self.nodes:
+            ready = self.nodes[parent_run_id].started_at
+        else:
+            ready = now
+        model = metadata.get("ls_model_name") or name or (serialized or {}).get("name") or "llm"
+        span = Span(
+            "llm",
+            node.graph if node else "",
+            node.node if node else "",
+            model,
+            now,
+            now - ready,
+            retries_before(tags),
+        )
+        if node is not None:
+            span.task = node.task
+            node.retries += bool(span.retries)
+        self.llms[run_id] = span
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        span = self.llms.pop(run_id, None)
+        if span is None:
+            return
+        span.prompt_tokens, span.completion_tokens = token_usage(response)
+        node = self.tasks.get(span.task)
+        if node is not None:
+            node.prompt_tokens += span.prompt_tokens
+            node.completion_tokens += span.completion_tokens
+        self.metrics.observe(span.record(time.perf_counter()))
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        span = self.llms.pop(run_id, None)
+        if span is not None:
+            self.metrics.observe(span.record(time.perf_counter(), type(error).__name__))
+
+# Define the aggregate of the records of one (kind, graph, node, name)
+class Aggregate:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.wall_seconds = 0.0
+        self.queue_seconds = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.retries = 0
+        self.buckets = [0] * (len(DURATION_BUCKETS) + 1)
+
+    def add(self, record: Dict[str, Any]) -> None:
+        self.count += 1
+        self.errors += bool(record["error"])
+        self.wall_seconds += record["wall_seconds"]
+        self.queue_seconds += record["queue_seconds"]
+        self.prompt_tokens += record["prompt_tokens"]
+        self.completion_tokens += record["completion_tokens"]
+        self.retries += record["retries"]
+        index = next((i for i, bound in enumerate(DURATION_BUCKETS) if record["wall_seconds"] <= bound), len(DURATION_BUCKETS))
+        self.buckets[index] += 1
+
+# Define the function to escape a Prometheus label value
+def label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+# Define the metrics of the process: the aggregates, the metrics file and the Prometheus text export
+class GraphMetrics:
+    def __init__(self, path: Optional[str] = GRAPH_METRICS_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.aggregates: Dict[Tuple[str, str, str, str], Aggregate] = {}
+        self.pending: List[Dict[str, Any]] = []  # records not written to the file yet
+        self.handler = GraphMetricsHandler(self)
+        self.server: Optional[ThreadingHTTPServer] = None
+
+    def observe(self, record: Dict[str, Any]) -> None:
+        key = (record["kind"], record["graph"], record["node"], record["name"])
+        with self.lock:
+            aggregate = self.aggregates.get(key)
+            if aggregate is None:
+                aggregate = self.aggregates[key] = Aggregate()
+            aggregate.add(record)
+            if self.path is None:
+                return
+            self.pending.append(record)
+            if len(self.pending) < FILE_BATCH_SIZE:
+                return
+            records, self.pending = self.pending, []
+        self._write(records)
+
+    def flush(self) -> None:
+        with self.lock:
+            records, self.pending = self.pending, []
+        self._write(records)
+
+    def _write(self, records: List[Dict[str, Any]]) -> None:
+        if records and self.path is not None:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(record) + "\n" for record in records)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.aggregates.clear()
+            self.pending.clear()
+
+    def prometheus_text(self) -> str:
+        """
+        Returns the aggregates in the Prometheus text exposition format
+        """
+        with self.lock:
+            aggregates = sorted(self.aggregates.items())
+        lines = []
+        for kind, help_name in (("node", "graph nodes"), ("llm", "LLM calls")):
+            series = [(key, aggregate) for key, aggregate in aggregates if key[0] == kind]
+            prefix = f"langgraph_{kind}"
+            lines += [f"# HELP {prefix}_duration_seconds Wall time of the {help_name}", f"# TYPE {prefix}_duration_seconds histogram"]
+            for (_, graph, node, name), aggregate in series:
+                labels = f'graph="{label_value(graph)}",node="{label_value(node)}"'
+                if kind == "llm":
+                    labels += f',model="{label_value(name)}"'
+                cumulative = 0
+                for bound, count in zip([*map(str, DURATION_BUCKETS), "+Inf"], aggregate.buckets):
+                    cumulative += count
+                    lines.append(f'{prefix}_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f"{prefix}_duration_seconds_sum{{{labels}}} {aggregate.wall_seconds}")
+                lines.append(f"{prefix}_duration_seconds_count{{{labels}}} {aggregate.count}")
+            for metric, attribute, description in (
+                ("queue_seconds_total", "queue_seconds", "Time the {} waited before starting"),
+                ("prompt_tokens_total", "prompt_tokens", "Prompt tokens of the {}"),
+                ("completion_tokens_total", "completion_tokens", "Completion tokens of the {}"),
+                ("retries_total", "retries", "Retries of the {}"),
+                ("errors_total", "errors", "Failed {}"),
+            ):
+                lines += [f"# HELP {prefix}_{metric} {description.format(help_name)}", f"# TYPE {prefix}_{metric} counter"]
+                for (_, graph, node, name), aggregate in series:
+                    labels = f'graph="{label_value(graph)}",node="{label_value(node)}"'
+                    if kind == "llm":
+                        labels += f',model="{label_value(name)}"'
+                    lines.append(f"{prefix}_{metric}{{{labels}}} {getattr(aggregate, attribute)}")
+        return "\n".join(lines) + "\n"
+
+    def report(self) -> str:
+        with self.lock:
+            aggregates = sorted(self.aggregates.items(), key=lambda item: (item[0][1], item[0][2], item[0][0] != "node", item[0][3]))
+        lines = [f"{'graph':<28}{'node':<28}{'kind / model':<16}{'count':>6}{'wall/call':>11}{'queue/call':>11}{'prompt tok':>11}{'compl tok':>10}{'retries':>8}{'errors':>7}"]
+        for (kind, graph, node, name), aggregate in aggregates:
+            lines.append(
+                f"{graph[:27]:<28}{node[:27]:<28}{(kind if kind == 'node' else name)[:15]:<16}{aggregate.count:>6}"
+                f"{aggregate.wall_seconds / aggregate.count:>10.3f}s{aggregate.queue_seconds / aggregate.count:>10.3f}s"
+                f"{aggregate.prompt_tokens:>11}{aggregate.completion_tokens:>10}{aggregate.retries:>8}{aggregate.errors:>7}"
+            )
+        return "\n".join(lines)
+
+    def serve(self, port: int) -> ThreadingHTTPServer:
+        """
+        Serve the Prometheus text export on http://localhost:<port>/metrics (in a daemon thread)
+        """
+        metrics = self
+
+        class MetricsRequestHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), MetricsRequestHandler)
+        threading.Thread(target=self.server.serve_forever, name="graph-metrics", daemon=True).start()
+        return self.server
+
+# The metrics of the process
+graph_metrics = GraphMetrics()
+
+# Define the handler attached to every run of the process once the metrics are enabled (same mechanism as the
+# tracers of LangChain, the graphs and their invoke calls are not changed)
+graph_metrics_var: ContextVar[Optional[GraphMetricsHandler]] = ContextVar("graph_metrics", default=None)
+register_configure_hook(graph_metrics_var, inheritable=True)
+
+# Define the function to enable the metrics (call it in the entry point, before the graph runs)
+def enable_graph_metrics(port: Optional[int] = GRAPH_METRICS_PORT) -> GraphMetrics:
+    if graph_metrics_var.get() is None:
+        graph_metrics_var.set(graph_metrics.handler)
+        atexit.register(graph_metrics.flush)
+        if port:
+            graph_metrics.serve(port)
+            print(f"graph metrics: http://127.0.0.1:{port}/metrics")
+    return graph_metrics
+
+# Define the function to disable the metrics (the records kept so far are written to the file)
+def disable_graph_metrics() -> None:
+    graph_metrics_var.set(None)
+    graph_metrics.flush()
@@ -1,11 +1,16 @@
 # """This file is going to contain all of the tools that we are going to use in the project"""
 
-from langchain_tavily import TavilySearch
+import os
+import sys
+
+# Make the shared modules of the repository root importable (search_cache)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from search_cache import CachedTavilySearch
 
 def get_profile_url_tavily(query: str) -> str:
     """Searches for Linkedin or Twitter profile page"""
 
-    search = TavilySearch(max_results=2)
+    search = CachedTavilySearch(max_results=2) # The same person looked up again hits the search cache
     results = search.run(query)
 
     return results
\ No newline at end of file
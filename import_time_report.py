@@ -0,0 +1,92 @@
+"""
+Import time report of the LangGraph example apps.
+
+Runs `python -X importtime -c "import main"` for every entry point (in a fresh interpreter, from the app folder,
+with placeholder API keys so no client refuses to start) and prints the import time of the entry point and its
+heaviest top-level packages. Run it from the repository root:
+python import_time_report.py [--top 8]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Define the entry points (app folder, module imported by `python main.py`)
+ENTRY_POINTS = [
+    ("langgraph_agentic_rag", "main"),
+    ("langgraph_react", "main"),
+    ("langgraph_reflection_agent", "main"),
+    ("langgraph_reflexion_agent", "main"),
+]
+
+# Placeholder keys, the report must not depend on real credentials
+PLACEHOLDER_KEYS = {"OPENAI_API_KEY": "sk-import-time-report", "TAVILY_API_KEY": "tvly-import-time-report"}
+
+# Define the function to parse the `-X importtime` output
+def parse_importtime(stderr: str) -> List[Tuple[int, int, str]]:
+    """
+    Returns (self microseconds, cumulative microseconds, indented module name) for every `import time:` line
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((int(self_us), int(cumulative_us), name.rstrip()))
+    return rows
+
+# Define the function to group the self time of every module by top-level package
+def top_packages(rows: List[Tuple[int, int, str]], top: int) -> List[Tuple[str, int]]:
+    totals: Dict[str, int] = defaultdict(int)
+    for self_us, _, name in rows:
+        totals[name.strip().split(".")[0]] += self_us
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:top]
+
+# Define the function to measure one entry point
+def measure(app_dir: str, module: str) -> Tuple[float, float, List[Tuple[int, int, str]], str]:
+    """
+    Returns the import time of the module (ms, from -X importtime), the wall time of the interpreter (ms),
+    the parsed rows and the error output if the import failed
+    """
+    env = {**os.environ, **PLACEHOLDER_KEYS}
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.join(ROOT, app_dir),
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    rows = parse_importtime(result.stderr)
+    module_rows = [cumulative for _, cumulative, name in rows if name.strip() == module and not name.startswith("  ")]
+    import_ms = module_rows[-1] / 1000 if module_rows else float("nan")
+    error = "" if result.returncode == 0 else result.stderr.strip().splitlines()[-1]
+    return import_ms, wall_ms, rows, error
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=8, help="Number of heaviest packages listed per entry point")
+    args = parser.parse_args()
+
+    summary = []
+    for app_dir, module in ENTRY_POINTS:
+        import_ms, wall_ms, rows, error = measure(app_dir, module)
+        summary.append((app_dir, import_ms, wall_ms, error))
+
+        print(f"\n{app_dir}/{module}.py")
+        if error:
+            print(f"  import failed: {error}")
+        print(f"  import {module}: {import_ms:8.0f} ms   interpreter wall time: {wall_ms:8.0f} ms")
+        for package, self_us in top_packages(rows, args.top):
+            print(f"    {package:<32} {self_us / 1000:8.1f} ms")
+
+    print(f"\n{'entry point':<32} {'import (ms)':>12} {'wall (ms)':>10}")
+    for app_dir, import_ms, wall_ms, error in summary:
+        print(f"{app_dir:<32} {import_ms:>12.0f} {wall_ms:>10.0f}{'  (failed)' if error else ''}")
@@ -0,0 +1,87 @@
+"""
+Compare the fixed-k retriever (the 4 most similar chunks) with the adaptive-k retriever (cut where the similarity falls
+off) on a labelled set of questions: documents retrieved, i.e. grader calls per question, share of the retrieved
+documents coming from the expected post, web search rate, and the quality of the answer generated from the graded
+documents (hallucination and answer graders), with the prompt tokens spent.
+
+Run from the langgraph_agentic_rag directory, after the build step (needs OPENAI_API_KEY):
+python -m benchmarks.adaptive_retrieval_benchmark
+
+To run it offline, record the responses once (RAG_LLM_CACHE_MODE=record), then replay them
+(RAG_LLM_CACHE_MODE=replay): the query embeddings and the LLM responses are the recorded ones.
+"""
+from dotenv import load_dotenv
+from langchain_community.callbacks import get_openai_callback
+
+from graph.chains.answer_grader import answer_grader
+from graph.chains.generation import generation_chain
+from graph.chains.hallucination_grader import hallucination_grader
+from graph.nodes.grade_documents import grade_documents
+from ingestion import PersistedCollectionRetriever, urls
+
+load_dotenv()
+
+AGENT_POST, PROMPT_POST, ATTACK_POST = urls
+
+# Define the labelled set: (question, post expected to answer it, None when the collection cannot answer it)
+LABELLED_SET = [
+    ("What is agent memory?", AGENT_POST),
+    ("How does task decomposition work in LLM-powered agents?", AGENT_POST),
+    ("What is the ReAct framework?", AGENT_POST),
+    ("Can you explain the concept of few-shot prompting?", PROMPT_POST),
+    ("How does chain-of-thought prompting work?", PROMPT_POST),
+    ("What is self-consistency sampling?", PROMPT_POST),
+    ("How do token manipulation attacks work against LLMs?", ATTACK_POST),
+    ("What is a jailbreak prompt?", ATTACK_POST),
+    ("How is red teaming used against language models?", ATTACK_POST),
+    ("Who won the 2022 FIFA World Cup?", None),
+]
+
+# Define the retrievers compared
+RETRIEVERS = {
+    "fixed k=4": PersistedCollectionRetriever(mode="fixed", k=4),
+    "adaptive": PersistedCollectionRetriever(mode="adaptive"),
+    "adaptive min=2": PersistedCollectionRetriever(mode="adaptive", min_k=2),
+}
+
+
+def run(name, retriever):
+    documents_retrieved, from_expected_post, labelled_documents = 0, 0, 0
+    web_searches, grounded, useful = 0, 0, 0
+    with get_openai_callback() as usage:
+        for question, expected_post in LABELLED_SET:
+            documents = retriever.invoke(question)
+            documents_retrieved += len(documents)
+            if expected_post is not None:
+                labelled_documents += len(documents)
+                from_expected_post += sum(doc.metadata.get("source") == expected_post for doc in documents)
+
+            # One grader call per retrieved document
+            relevant_docs, web_search = grade_documents(question, documents)
+            web_searches += web_search
+
+            # The answer from the graded documents only (the graph would add the web search results)
+            generation = generation_chain.invoke({"question": question, "context": relevant_docs})
+            grounded += hallucination_grader.invoke({"documents": relevant_docs, "generation": generation}).binary_score
+            useful += answer_grader.invoke({"question": question, "generation": generation}).binary_score
+    return {
+        "retriever": name,
+        "grader_calls": documents_retrieved / len(LABELLED_SET),
+        "precision": from_expected_post / max(labelled_documents, 1),
+        "web_search": web_searches / len(LABELLED_SET),
+        "grounded": grounded / len(LABELLED_SET),
+        "useful": useful / len(LABELLED_SET),
+        "prompt_tokens": usage.prompt_tokens / len(LABELLED_SET),
+    }
+
+
+if __name__ == "__main__":
+    results = [run(name, retriever) for name, retriever in RETRIEVERS.items()]
+
+    print()
+    print(f"{'retriever':<16}{'grader calls/q':>16}{'precision':>11}{'web search':>12}{'grounded':>10}{'useful':>8}{'prompt tok/q':>14}")
+    for result in results:
+        print(
+            f"{result['retriever']:<16}{result['grader_calls']:>16.2f}{result['precision']:>11.2f}{result['web_search']:>12.2f}"
+            f"{result['grounded']:>10.2f}{result['useful']:>8.2f}{result['prompt_tokens']:>14.0f}"
+        )
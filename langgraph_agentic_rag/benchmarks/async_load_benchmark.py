@@ -0,0 +1,73 @@
+"""
+Load test of rag_app.ainvoke with fake async chains (fixed delays, no API calls).
+
+Every chain used by the nodes and routers is replaced by a fake that sleeps for CHAIN_DELAY seconds
+(asyncio.sleep on the async path, time.sleep on the sync path), then N questions are sent at the
+same time on one event loop. With the async nodes the throughput grows with the concurrency, as no
+thread is blocked while a chain is waiting.
+
+Run from the langgraph_agentic_rag directory:
+python -m benchmarks.async_load_benchmark
+"""
+import asyncio
+import contextlib
+import io
+import os
+import time
+
+# The real chains are imported by the graph but replaced by fakes below
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("TAVILY_API_KEY", "tvly-benchmark")
+
+from langchain.schema import Document
+from langchain_core.runnables import RunnableLambda
+
+import graph.graph as rag_graph
+from graph.fake_chains import DEFAULT_OUTPUTS, install_fake_chains
+
+# Define the load test parameters
+CHAIN_DELAY = 0.1  # seconds per fake chain call
+CONCURRENCY_LEVELS = [1, 10, 50, 100, 250, 500]
+
+
+# Define a fake chain that returns a fixed output after a fixed delay
+def fake_chain(output) -> RunnableLambda:
+    def invoke(_):
+        time.sleep(CHAIN_DELAY)
+        return output
+
+    async def ainvoke(_):
+        await asyncio.sleep(CHAIN_DELAY)
+        return output
+
+    return RunnableLambda(invoke, afunc=ainvoke)
+
+
+# Define the outputs of the fake chains, four documents are retrieved and graded for every question
+FAKE_OUTPUTS = DEFAULT_OUTPUTS | {"retriever": [Document(page_content=f"agent memory document {i}") for i in range(4)]}
+
+
+async def run_concurrently(num_questions: int) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(rag_graph.rag_app.ainvoke({"question": f"What is agent memory? ({i})"}) for i in range(num_questions))
+    )
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    install_fake_chains({name: fake_chain(output) for name, output in FAKE_OUTPUTS.items()})
+
+    results = []
+    with contextlib.redirect_stdout(io.StringIO()):  # the nodes print every step
+        start = time.perf_counter()
+        rag_graph.rag_app.invoke({"question": "What is agent memory?"})
+        sync_latency = time.perf_counter() - start
+
+        for concurrency in CONCURRENCY_LEVELS:
+            results.append((concurrency, asyncio.run(run_concurrently(concurrency))))
+
+    print(f"sync invoke, 1 question: {sync_latency:.2f}s")
+    print(f"{'concurrency':>12}{'elapsed':>10}{'questions/sec':>15}")
+    for concurrency, elapsed in results:
+        print(f"{concurrency:>12}{elapsed:>9.2f}s{concurrency / elapsed:>15.1f}")
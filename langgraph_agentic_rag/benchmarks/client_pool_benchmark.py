@@ -0,0 +1,264 @@
+"""
+Connections opened and latency of rag_app under concurrent load, against a local stand-in of the OpenAI API (no API
+calls): the real chains, ChatOpenAI and OpenAIEmbeddings clients send their requests to a local HTTP server (in its own
+process) that answers every request after SERVER_DELAY seconds and counts the TCP connections it accepts.
+
+Modes:
+    per_role: every chain and the embeddings with their own HTTP clients (one connection pool per module)
+    default: ChatOpenAI / OpenAIEmbeddings without HTTP clients (langchain-openai shares one default pool between the
+        chat models with the same base url and timeout, the embeddings have their own)
+    registry: graph.chains.clients, one bounded keep-alive pool shared by every chat model and the embeddings
+
+The pool size of the registry is RAG_HTTP_MAX_CONNECTIONS, the delay of the stand-in STAND_IN_DELAY.
+Run from the langgraph_agentic_rag directory:
+python -m benchmarks.client_pool_benchmark
+"""
+import asyncio
+import contextlib
+import gc
+import io
+import json
+import multiprocessing
+import os
+import statistics
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# The clients only talk to the stand-in server
+os.environ["OPENAI_API_KEY"] = "sk-benchmark"
+os.environ.setdefault("TAVILY_API_KEY", "tvly-benchmark")
+
+from langchain.schema import Document
+from langchain_core.runnables import RunnableLambda
+
+import graph.chains.answer_grader as answer_grader_module
+import graph.chains.clients as clients
+import graph.chains.generation as generation_module
+import graph.chains.generation_grader as generation_grader_module
+import graph.chains.hallucination_grader as hallucination_grader_module
+import graph.chains.listwise_grader as listwise_grader_module
+import graph.chains.retrieval_grader as retrieval_grader_module
+import graph.chains.router as router_module
+import graph.graph as rag_graph
+import graph.nodes.retrieve as retrieve_module
+import graph.nodes.websearch as websearch_module
+
+# Define the benchmark parameters
+SERVER_DELAY = float(os.getenv("STAND_IN_DELAY", "0.05"))  # seconds per API request
+CONCURRENCY_LEVELS = [1, 20, 100, 250]
+MODES = ["per_role", "default", "registry"]
+EMBEDDING_DIMENSIONS = 8
+
+CHAIN_MODULES = [
+    (router_module, "question_router"),
+    (retrieval_grader_module, "retrieval_grader"),
+    (listwise_grader_module, "listwise_retrieval_grader"),
+    (hallucination_grader_module, "hallucination_grader"),
+    (answer_grader_module, "answer_grader"),
+    (generation_grader_module, "generation_grader"),
+    (generation_module, "generation_chain"),
+]
+
+
+# Define the arguments of a tool call that validate against the JSON schema of the tool (first value of every enum)
+def fake_arguments(schema: dict):
+    if "enum" in schema:
+        return schema["enum"][0]
+    kind = schema.get("type")
+    if kind == "object":
+        return {name: fake_arguments(field) for name, field in schema.get("properties", {}).items()}
+    if kind == "array":
+        return []
+    if kind == "boolean":
+        return True
+    if kind in ("integer", "number"):
+        return 0
+    return "yes"
+
+
+# Define the stand-in of the OpenAI API (chat completions with structured outputs or tool calls, and embeddings)
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive connections
+
+    def setup(self):
+        super().setup()
+        with self.server.connections.get_lock():
+            self.server.connections.value += 1
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        time.sleep(SERVER_DELAY)
+        with self.server.requests.get_lock():
+            self.server.requests.value += 1
+
+        usage = {"prompt_tokens": 100, "completion_tokens": 10, "total_tokens": 110}
+        if self.path.endswith("/embeddings"):
+            inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+            data = [{"object": "embedding", "index": i, "embedding": [0.1] * EMBEDDING_DIMENSIONS} for i in range(len(inputs))]
+            response = {"object": "list", "data": data, "model": body["model"], "usage": usage}
+        else:
+            message = {"role": "assistant", "content": "Agent memory is short-term and long-term memory."}
+            response_format = body.get("response_format") or {}
+            if response_format.get("type") == "json_schema":
+                message["content"] = json.dumps(fake_arguments(response_format["json_schema"]["schema"]))
+            elif body.get("tools"):
+                function = body["tools"][0]["function"]
+                arguments = json.dumps(fake_arguments(function["parameters"]))
+                message = {
+                    "role": "assistant",
+                    "content": None,
+                    "tool_calls": [{"id": "call_0", "type": "function", "function": {"name": function["name"], "arguments": arguments}}],
+                }
+            response = {
+                "id": "chatcmpl-benchmark",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body["model"],
+                "choices": [{"index": 0, "message": message, "finish_reason": "stop"}],
+                "usage": usage,
+            }
+
+        payload = json.dumps(response).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port, connections, requests) -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", port), StandInHandler)
+    server.daemon_threads = True
+    server.request_queue_size = 1024
+    server.connections, server.requests = connections, requests
+    server.serve_forever()
+
+
+# Define the stand-in server process (the client threads and the event loop of the benchmark do not share its GIL)
+class StandInServer:
+    def __init__(self, port: int = 8765):
+        self.port = port
+        self._connections = multiprocessing.Value("i", 0)
+        self._requests = multiprocessing.Value("i", 0)
+        self.process = multiprocessing.Process(target=serve, args=(port, self._connections, self._requests), daemon=True)
+
+    @property
+    def connections(self) -> int:
+        return self._connections.value
+
+    @property
+    def requests(self) -> int:
+        return self._requests.value
+
+    def start(self) -> "StandInServer":
+        self.process.start()
+        time.sleep(0.5)
+        return self
+
+
+# Define the clients of every mode
+def per_role_chat_model(role):
+    import openai
+    from langchain_openai import ChatOpenAI
+
+    model, temperature = clients.role_config(role)
+    return ChatOpenAI(
+        model=model,
+        temperature=temperature,
+        http_client=openai.DefaultHttpxClient(),
+        http_async_client=openai.DefaultAsyncHttpxClient(),
+    )
+
+
+def default_chat_model(role):
+    from langchain_openai import ChatOpenAI
+
+    model, temperature = clients.role_config(role)
+    return ChatOpenAI(model=model, temperature=temperature)
+
+
+def embeddings_client(mode):
+    from langchain_openai import OpenAIEmbeddings
+
+    if mode == "registry":
+        embeddings = clients.get_embeddings_client("text-embedding-3-small", EMBEDDING_DIMENSIONS)
+    else:
+        embeddings = OpenAIEmbeddings(model="text-embedding-3-small", dimensions=EMBEDDING_DIMENSIONS)
+    # The stand-in takes the raw text (the tiktoken encoding used to split long inputs is not downloaded here)
+    embeddings.check_embedding_ctx_length = False
+    return embeddings
+
+
+def install(mode) -> None:
+    from langchain_openai.chat_models._client_utils import _get_default_async_httpx_client
+
+    clients.reset_clients()
+    _get_default_async_httpx_client.cache_clear()
+    get_chat_model = {"per_role": per_role_chat_model, "default": default_chat_model, "registry": clients.get_chat_model}[mode]
+    for module, chain_name in CHAIN_MODULES:
+        module.get_chat_model = get_chat_model
+        getattr(module, chain_name).get_chain.cache_clear()
+
+    # The retriever embeds the question through the embedding client, then returns the stored chunks
+    embeddings = embeddings_client(mode)
+    documents = [Document(page_content=f"agent memory document {i}") for i in range(4)]
+
+    async def aretrieve(question):
+        await embeddings.aembed_query(question)
+        return documents
+
+    retrieve_module.retriever = RunnableLambda(lambda question: documents, afunc=aretrieve)
+    websearch_module.web_search_tool = RunnableLambda(lambda _: {"results": [{"content": "web result"}]})
+
+
+async def run_concurrently(num_questions: int):
+    async def ask(i):
+        start = time.perf_counter()
+        await rag_graph.get_rag_app().ainvoke({"question": f"What is agent memory? ({i})"})
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(ask(i) for i in range(num_questions)))
+    elapsed = time.perf_counter() - start
+
+    # Close the async HTTP clients of the measure in its event loop (they are bound to it)
+    import httpx
+
+    await asyncio.gather(*(client.aclose() for client in gc.get_objects() if isinstance(client, httpx.AsyncClient) and not client.is_closed))
+    return elapsed, sorted(latencies)
+
+
+def run(server, mode, num_questions):
+    # One event loop per measure, the async HTTP clients are created for it
+    install(mode)
+    connections, requests = server.connections, server.requests
+    with contextlib.redirect_stdout(io.StringIO()):  # the nodes print every step
+        elapsed, latencies = asyncio.run(run_concurrently(num_questions))
+    return {
+        "mode": mode,
+        "questions": num_questions,
+        "connections": server.connections - connections,
+        "requests": server.requests - requests,
+        "elapsed": elapsed,
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(0.95 * (len(latencies) - 1))],
+    }
+
+
+if __name__ == "__main__":
+    server = StandInServer(int(os.getenv("STAND_IN_PORT", "8765"))).start()
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.port}/v1"
+    os.environ["OPENAI_API_BASE"] = os.environ["OPENAI_BASE_URL"]
+
+    print(f"stand-in server on {os.environ['OPENAI_BASE_URL']}, {SERVER_DELAY * 1000:.0f} ms per request")
+    print(f"{'mode':<10}{'questions':>10}{'requests':>10}{'connections':>13}{'elapsed':>10}{'p50':>9}{'p95':>9}")
+    for num_questions in CONCURRENCY_LEVELS:
+        for mode in MODES:
+            result = run(server, mode, num_questions)
+            print(
+                f"{result['mode']:<10}{result['questions']:>10}{result['requests']:>10}{result['connections']:>13}"
+                f"{result['elapsed']:>9.2f}s{result['p50']:>8.2f}s{result['p95']:>8.2f}s"
+            )
@@ -0,0 +1,98 @@
+"""
+Compare the generation grading modes run after every generation: "sequential" (hallucination grader, then
+answer grader), "concurrent" (both graders at the same time) and "fused" (one call returning both verdicts).
+Reports the post-generation latency per question, the saving against the sequential mode, the tokens, and the
+agreement of the final decisions with the sequential mode on a set of recorded generations.
+
+Run from the langgraph_agentic_rag directory (needs OPENAI_API_KEY):
+python -m benchmarks.compare_generation_grading_modes
+
+To run it offline, record the responses once (RAG_LLM_CACHE_MODE=record), then replay them
+(RAG_LLM_CACHE_MODE=replay): the decisions and tokens are the recorded ones, the latencies are the cache's.
+"""
+import time
+
+from dotenv import load_dotenv
+from langchain.schema import Document
+from langchain_community.callbacks import get_openai_callback
+
+from graph.nodes.grade_generation import decide_generation, grade_generation
+
+load_dotenv()
+
+# Define the recorded generations: (question, documents, generation), one useful, one not grounded and one off-topic answer
+RECORDED_SET = [
+    (
+        "What is agent memory?",
+        [
+            "Short-term memory: I would consider all the in-context learning as utilizing short-term memory of the model to learn.",
+            "Long-term memory provides the agent with the capability to retain and recall information over extended periods, often by leveraging an external vector store and fast retrieval.",
+        ],
+        "Agent memory is split into short-term memory, the in-context learning of the model, and long-term memory, "
+        "which retains and recalls information over long periods with an external vector store and fast retrieval.",
+    ),
+    (
+        "Can you explain the concept of few-shot prompting?",
+        [
+            "Few-shot learning presents a set of high-quality demonstrations, each consisting of both input and desired output, on the target task.",
+            "Zero-shot learning is to simply feed the task text to the model and ask for results.",
+        ],
+        "Few-shot prompting was invented in 2012 by Google to compress prompts, it removes every example from the prompt "
+        "so that the model answers faster.",
+    ),
+    (
+        "How do token manipulation attacks work against LLMs?",
+        [
+            "Given a piece of text input containing a sequence of tokens, we can apply simple token operations like replacement with synonyms to trigger the model to make incorrect predictions.",
+            "Gradient based attacks rely on the gradient signals to learn an effective attack, in a white-box setting with full access to the model parameters.",
+        ],
+        "Gradient based attacks need a white-box setting with full access to the model parameters.",
+    ),
+    (
+        "What is the difference between zero-shot and few-shot prompting?",
+        [
+            "Few-shot learning presents a set of high-quality demonstrations, each consisting of both input and desired output, on the target task.",
+            "Zero-shot learning is to simply feed the task text to the model and ask for results.",
+        ],
+        "Zero-shot prompting only gives the task text to the model, few-shot prompting also gives high-quality "
+        "demonstrations of inputs and desired outputs for the task.",
+    ),
+]
+
+MODES = ["sequential", "concurrent", "fused"]
+
+
+def run(mode):
+    decisions, latency = [], 0.0
+    with get_openai_callback() as usage:
+        for question, texts, generation in RECORDED_SET:
+            documents = [Document(page_content=text) for text in texts]
+            start = time.perf_counter()
+            grounded, addresses_question = grade_generation(question, documents, generation, mode=mode)
+            latency += time.perf_counter() - start
+            decisions.append(decide_generation(grounded, addresses_question))
+    return {
+        "mode": mode,
+        "decisions": decisions,
+        "prompt_tokens": usage.prompt_tokens,
+        "completion_tokens": usage.completion_tokens,
+        "latency": latency / len(RECORDED_SET),
+    }
+
+
+if __name__ == "__main__":
+    results = [run(mode) for mode in MODES]
+    baseline = results[0]
+
+    print()
+    print(f"{'mode':<12}{'prompt tok':>12}{'compl tok':>11}{'latency/q':>11}{'saved/q':>10}{'agreement':>11}")
+    for result in results:
+        saved = baseline["latency"] - result["latency"]
+        agreement = sum(a == b for a, b in zip(result["decisions"], baseline["decisions"])) / len(RECORDED_SET)
+        print(
+            f"{result['mode']:<12}{result['prompt_tokens']:>12}{result['completion_tokens']:>11}"
+            f"{result['latency']:>10.2f}s{saved:>9.2f}s{agreement:>11.2f}"
+        )
+    print("\nDecisions per question (sequential / concurrent / fused):")
+    for (question, _, _), *decisions in zip(RECORDED_SET, *(result["decisions"] for result in results)):
+        print(f"  {question[:60]:<60} {' / '.join(decisions)}")
@@ -0,0 +1,86 @@
+"""
+Compare the pointwise retrieval grader (one call per document) with the listwise grader (one call for
+all the documents) on a small labelled set: prompt/completion tokens, latency, accuracy against the
+labels and agreement between the two modes.
+
+Run from the langgraph_agentic_rag directory (needs OPENAI_API_KEY):
+python -m benchmarks.compare_grading_modes
+
+To run it offline, record the responses once (RAG_LLM_CACHE_MODE=record), then replay them
+(RAG_LLM_CACHE_MODE=replay): the decisions and tokens are the recorded ones, the latencies are the cache's.
+"""
+import time
+
+from dotenv import load_dotenv
+from langchain.schema import Document
+from langchain_community.callbacks import get_openai_callback
+
+from graph.nodes.grade_documents import grade_documents, grade_documents_listwise
+
+load_dotenv()
+
+# Define the labelled set: (question, [(document, relevant), ...])
+LABELLED_SET = [
+    (
+        "What is agent memory?",
+        [
+            ("Short-term memory: I would consider all the in-context learning as utilizing short-term memory of the model to learn.", True),
+            ("Long-term memory provides the agent with the capability to retain and recall information over extended periods, often by leveraging an external vector store and fast retrieval.", True),
+            ("Adversarial attacks or jailbreak prompts could potentially trigger the model to output something undesired.", False),
+            ("Pizza dough is made of flour, water, yeast and salt, and should rest for at least 24 hours.", False),
+        ],
+    ),
+    (
+        "Can you explain the concept of few-shot prompting?",
+        [
+            ("Few-shot learning presents a set of high-quality demonstrations, each consisting of both input and desired output, on the target task.", True),
+            ("Zero-shot learning is to simply feed the task text to the model and ask for results.", True),
+            ("Maximum Inner Product Search (MIPS) is a common practice to save the embedding representation of information into a vector store database.", False),
+            ("The Eiffel Tower is 330 metres tall and was completed in 1889.", False),
+        ],
+    ),
+    (
+        "How do token manipulation attacks work against LLMs?",
+        [
+            ("Given a piece of text input containing a sequence of tokens, we can apply simple token operations like replacement with synonyms to trigger the model to make incorrect predictions.", True),
+            ("Gradient based attacks rely on the gradient signals to learn an effective attack, in a white-box setting with full access to the model parameters.", True),
+            ("Chain of thought prompting generates a sequence of short sentences to describe reasoning logics step by step.", False),
+            ("Task decomposition can be done by an LLM with simple prompting like 'Steps for XYZ'.", False),
+        ],
+    ),
+]
+
+
+def run(mode, grade):
+    predictions, latency = [], 0.0
+    with get_openai_callback() as usage:
+        for question, labelled_docs in LABELLED_SET:
+            documents = [Document(page_content=text) for text, _ in labelled_docs]
+            start = time.perf_counter()
+            relevant_docs, _ = grade(question, documents)
+            latency += time.perf_counter() - start
+            kept = {doc.page_content for doc in relevant_docs}
+            predictions.extend(text in kept for text, _ in labelled_docs)
+    return {
+        "mode": mode,
+        "predictions": predictions,
+        "prompt_tokens": usage.prompt_tokens,
+        "completion_tokens": usage.completion_tokens,
+        "latency": latency / len(LABELLED_SET),
+    }
+
+
+if __name__ == "__main__":
+    labels = [relevant for _, labelled_docs in LABELLED_SET for _, relevant in labelled_docs]
+    results = [run("pointwise", grade_documents), run("listwise", grade_documents_listwise)]
+
+    print()
+    print(f"{'mode':<10}{'prompt tok':>12}{'compl tok':>11}{'latency/q':>11}{'accuracy':>10}")
+    for result in results:
+        accuracy = sum(p == l for p, l in zip(result["predictions"], labels)) / len(labels)
+        print(
+            f"{result['mode']:<10}{result['prompt_tokens']:>12}{result['completion_tokens']:>11}"
+            f"{result['latency']:>10.2f}s{accuracy:>10.2f}"
+        )
+    agreement = sum(p == l for p, l in zip(results[0]["predictions"], results[1]["predictions"])) / len(labels)
+    print(f"\nAgreement between pointwise and listwise verdicts: {agreement:.2f}")
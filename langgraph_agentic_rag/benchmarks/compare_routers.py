@@ -0,0 +1,122 @@
+"""
+Compare the LLM question router with the embedding router (topic centroids, LLM fallback in the
+ambiguous band) on a labelled question set: accuracy against the labels, agreement with the LLM
+router, share of questions decided locally and latency.
+
+Build the collection and the centroids first (ingestion), then run from the langgraph_agentic_rag
+directory (needs OPENAI_API_KEY):
+python -m benchmarks.compare_routers
+
+Calibrate the similarity band of the embedding router (ROUTER_VECTORSTORE_THRESHOLD / ROUTER_WEBSEARCH_THRESHOLD) on the
+same questions: every question is embedded once, then every threshold pair is scored by the accuracy of the questions
+it decides locally and the share it decides locally (the other ones go to the LLM router):
+python -m benchmarks.compare_routers --calibrate
+
+To run it offline, record the responses once (RAG_LLM_CACHE_MODE=record), then replay them
+(RAG_LLM_CACHE_MODE=replay): the decisions and tokens are the recorded ones, the latencies are the cache's.
+"""
+import contextlib
+import io
+import sys
+import time
+
+import numpy as np
+from dotenv import load_dotenv
+
+from graph.chains.embedding_router import (
+    ROUTER_VECTORSTORE_THRESHOLD,
+    ROUTER_WEBSEARCH_THRESHOLD,
+    embedding_question_router,
+    load_centroids,
+    route_by_similarity,
+    routing_stats,
+)
+from graph.chains.router import question_router
+from ingestion import get_embeddings
+
+load_dotenv()
+
+# Define the labelled questions: (question, expected datasource)
+LABELLED_QUESTIONS = [
+    ("What is agent memory?", "vectorstore"),
+    ("How do LLM agents plan and decompose tasks?", "vectorstore"),
+    ("What is the ReAct framework for agents?", "vectorstore"),
+    ("How can an agent use external tools and APIs?", "vectorstore"),
+    ("Can you explain the concept of few-shot prompting?", "vectorstore"),
+    ("What is chain of thought prompting?", "vectorstore"),
+    ("How does self-consistency sampling improve reasoning?", "vectorstore"),
+    ("What is instruction prompting?", "vectorstore"),
+    ("What are jailbreak prompts?", "vectorstore"),
+    ("How do token manipulation attacks work against LLMs?", "vectorstore"),
+    ("What are gradient based adversarial attacks on language models?", "vectorstore"),
+    ("How can red teaming find model vulnerabilities?", "vectorstore"),
+    ("What is the definition of Microsoft AI search service?", "websearch"),
+    ("What are the places to visit in Indonesia?", "websearch"),
+    ("Who won the last football world cup?", "websearch"),
+    ("What is the weather in Paris tomorrow?", "websearch"),
+    ("How do I make sourdough bread?", "websearch"),
+    ("What is the current price of bitcoin?", "websearch"),
+    ("When was the Eiffel Tower built?", "websearch"),
+    ("What are the latest features of the iPhone?", "websearch"),
+]
+
+
+def run(router):
+    predictions, latency = [], 0.0
+    with contextlib.redirect_stdout(io.StringIO()):
+        for question, _ in LABELLED_QUESTIONS:
+            start = time.perf_counter()
+            predictions.append(router.invoke({"question": question}).datasource)
+            latency += time.perf_counter() - start
+    return predictions, latency / len(LABELLED_QUESTIONS)
+
+
+# Define the threshold grid of the calibration
+THRESHOLD_GRID = np.round(np.arange(0.10, 0.71, 0.05), 2)
+
+
+def calibrate() -> None:
+    centroids = load_centroids()
+    if centroids is None:
+        raise SystemExit("Build the collection and the router centroids first: python ingestion.py")
+    vectors = [get_embeddings().embed_query(question) for question, _ in LABELLED_QUESTIONS] # Answered from the cache on replay
+
+    print(f"{'similarity':>10}  {'label':<12}question")
+    similarities = [route_by_similarity(vector, centroids[1])[1] for vector in vectors]
+    for similarity, (question, label) in sorted(zip(similarities, LABELLED_QUESTIONS), reverse=True):
+        print(f"{similarity:>10.3f}  {label:<12}{question}")
+
+    def score(websearch_threshold, vectorstore_threshold):
+        decisions = [route_by_similarity(vector, centroids[1], vectorstore_threshold, websearch_threshold)[0] for vector in vectors]
+        local = [(decision, label) for decision, (_, label) in zip(decisions, LABELLED_QUESTIONS) if decision is not None]
+        accuracy = sum(decision == label for decision, label in local) / len(local) if local else 1.0
+        return accuracy, len(local) / len(LABELLED_QUESTIONS)
+
+    # The best pair decides as many questions locally as possible without a local mistake (or with the fewest)
+    pairs = [(low, high) for low in THRESHOLD_GRID for high in THRESHOLD_GRID if low < high]
+    scores = {pair: score(*pair) for pair in pairs}
+    best = max(pairs, key=lambda pair: (scores[pair][0], scores[pair][1], pair[1] - pair[0]))
+    current = score(ROUTER_WEBSEARCH_THRESHOLD, ROUTER_VECTORSTORE_THRESHOLD)
+
+    print(f"\n{'thresholds':<26}{'local accuracy':>16}{'decided locally':>17}")
+    print(f"{f'current {ROUTER_WEBSEARCH_THRESHOLD:.2f} / {ROUTER_VECTORSTORE_THRESHOLD:.2f}':<26}{current[0]:>16.2f}{current[1]:>17.0%}")
+    print(f"{f'calibrated {best[0]:.2f} / {best[1]:.2f}':<26}{scores[best][0]:>16.2f}{scores[best][1]:>17.0%}")
+    print(f"\nROUTER_WEBSEARCH_THRESHOLD={best[0]:.2f} ROUTER_VECTORSTORE_THRESHOLD={best[1]:.2f}")
+
+
+if __name__ == "__main__" and "--calibrate" in sys.argv:
+    calibrate()
+elif __name__ == "__main__":
+    labels = [label for _, label in LABELLED_QUESTIONS]
+    llm_predictions, llm_latency = run(question_router)
+    embedding_predictions, embedding_latency = run(embedding_question_router)
+
+    def accuracy(predictions):
+        return sum(p == l for p, l in zip(predictions, labels)) / len(labels)
+
+    agreement = sum(a == b for a, b in zip(llm_predictions, embedding_predictions)) / len(labels)
+    print(f"{'router':<11}{'accuracy':>10}{'latency/q':>12}")
+    print(f"{'llm':<11}{accuracy(llm_predictions):>10.2f}{llm_latency * 1000:>10.0f}ms")
+    print(f"{'embedding':<11}{accuracy(embedding_predictions):>10.2f}{embedding_latency * 1000:>10.0f}ms")
+    print(f"\nAgreement with the LLM router: {agreement:.2f}")
+    print(routing_stats.report())
@@ -0,0 +1,59 @@
+"""
+Latency of grade_documents_node with a fake grader that answers after a fixed delay (no API calls).
+
+Run from the langgraph_agentic_rag directory:
+python -m benchmarks.grade_documents_benchmark
+"""
+import os
+import time
+
+# The real chains are imported by the node modules but never called here
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("TAVILY_API_KEY", "tvly-benchmark")
+
+from langchain.schema import Document
+from langchain_core.runnables import RunnableLambda
+
+from graph.chains.retrieval_grader import GradeDocuments
+from graph.nodes.grade_documents import grade_documents
+
+# Define the benchmark parameters
+NUM_DOCUMENTS = 4
+GRADER_DELAY = 0.3  # seconds per grader call, roughly one gpt-4.1 structured output round trip
+REPEATS = 3
+
+
+# Define a fake grader: documents containing "irrelevant" are graded "no", every call sleeps for its document delay
+def make_fake_grader(delays):
+    def grade(grader_input):
+        time.sleep(delays[grader_input["document"]])
+        return GradeDocuments(binary_score="no" if "irrelevant" in grader_input["document"] else "yes")
+
+    return RunnableLambda(grade)
+
+
+def run(documents, grader, **kwargs) -> float:
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        grade_documents("agent memory", documents, grader=grader, **kwargs)
+    return (time.perf_counter() - start) / REPEATS
+
+
+if __name__ == "__main__":
+    relevant_docs = [Document(page_content=f"document {i}") for i in range(NUM_DOCUMENTS)]
+    mixed_docs = [Document(page_content="irrelevant document")] + relevant_docs[1:]
+    delays = {doc.page_content: GRADER_DELAY for doc in relevant_docs + mixed_docs}
+    delays[relevant_docs[-1].page_content] = 3 * GRADER_DELAY  # one slow straggler
+    grader = make_fake_grader(delays)
+
+    results = [
+        ("sequential (max_concurrency=1)", relevant_docs, {"max_concurrency": 1, "early_exit": False}),
+        (f"concurrent (max_concurrency={NUM_DOCUMENTS})", relevant_docs, {"max_concurrency": NUM_DOCUMENTS, "early_exit": False}),
+        ("concurrent, one irrelevant document", mixed_docs, {"max_concurrency": NUM_DOCUMENTS, "early_exit": False}),
+        ("concurrent + early exit, one irrelevant", mixed_docs, {"max_concurrency": NUM_DOCUMENTS, "early_exit": True}),
+    ]
+    report = [(name, run(documents, grader, **kwargs)) for name, documents, kwargs in results]
+
+    print()
+    for name, latency in report:
+        print(f"{name:<42}: {latency * 1000:7.0f} ms per node call")
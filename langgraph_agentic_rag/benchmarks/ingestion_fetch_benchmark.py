@@ -0,0 +1,79 @@
+"""
+Time the loading of the corpus pages by the build step as the url list grows, against a local stand-in of the blog
+(no network): every page is ~60 KB of HTML served after SERVER_DELAY seconds, with an ETag.
+
+Loaders:
+    sequential: one blocking WebBaseLoader(url).load() per url (the build step before the concurrent loader)
+    concurrent: web_loader.load_urls with INGESTION_FETCH_WORKERS threads and an empty HTML cache
+    revalidated: the same with the HTML cached by the previous build (every page answers 304 Not Modified)
+
+Run from the langgraph_agentic_rag directory:
+python -m benchmarks.ingestion_fetch_benchmark
+"""
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from langchain_community.document_loaders import WebBaseLoader
+
+from ingestion import FETCH_MAX_WORKERS
+from web_loader import HtmlCache, load_urls
+
+# Define the benchmark parameters
+SERVER_DELAY = float(os.getenv("STAND_IN_DELAY", "0.1"))  # seconds per page
+URL_COUNTS = [3, 50, 200]
+PARAGRAPH = "<p>Agent system overview: planning, memory and tool use. Short-term memory is in-context learning.</p>\n"
+PAGE = "<html lang=\"en\"><head><title>Post {number}</title></head><body>" + PARAGRAPH * 600 + "</body></html>"
+
+
+# Define the stand-in blog
+class BlogHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        time.sleep(SERVER_DELAY)
+        number = self.path.rsplit("-", 1)[-1]
+        etag = f'"{number}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = PAGE.format(number=number).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def timed(load):
+    start = time.perf_counter()
+    docs = load()
+    return time.perf_counter() - start, docs
+
+
+if __name__ == "__main__":
+    server = ThreadingHTTPServer(("127.0.0.1", 0), BlogHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/posts/post"
+
+    print(f"stand-in blog: {SERVER_DELAY * 1000:.0f} ms per page, {FETCH_MAX_WORKERS} fetching threads")
+    print(f"{'urls':>6}{'sequential':>13}{'concurrent':>13}{'revalidated':>13}{'speedup':>10}")
+    for url_count in URL_COUNTS:
+        urls = [f"{base_url}-{i}" for i in range(url_count)]
+        with tempfile.TemporaryDirectory() as directory:
+            cache = HtmlCache(os.path.join(directory, "html_cache.sqlite"))
+            sequential, expected = timed(lambda: [doc for url in urls for doc in WebBaseLoader(url).load()])
+            concurrent, docs = timed(lambda: load_urls(urls, max_workers=FETCH_MAX_WORKERS, cache=cache))
+            revalidated, cached_docs = timed(lambda: load_urls(urls, max_workers=FETCH_MAX_WORKERS, cache=cache))
+            assert docs == cached_docs == expected
+        print(f"{url_count:>6}{sequential:>12.2f}s{concurrent:>12.2f}s{revalidated:>12.2f}s{sequential / concurrent:>9.1f}x")
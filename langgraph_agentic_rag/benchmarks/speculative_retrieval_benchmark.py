@@ -0,0 +1,63 @@
+"""
+Entry latency (routing + retrieval) of the sequential path vs the speculative retrieval, with a fake
+router and a fake retriever that answer after fixed delays (no API calls). Most of the questions are
+routed to the vectorstore, like our real traffic.
+
+Run from the langgraph_agentic_rag directory:
+python -m benchmarks.speculative_retrieval_benchmark
+"""
+import contextlib
+import io
+import os
+import time
+
+# The real chains are imported by the node modules but never called here
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("TAVILY_API_KEY", "tvly-benchmark")
+
+from langchain.schema import Document
+from langchain_core.runnables import RunnableLambda
+
+from graph.chains.router import RouterQuery
+from graph.nodes.speculative_retrieve import SpeculationStats, speculative_retrieve
+
+# Define the benchmark parameters
+ROUTER_DELAY = 0.6  # gpt-4.1 structured output call
+RETRIEVAL_DELAY = 0.25  # query embedding + Chroma search
+NUM_QUESTIONS = 20
+WEB_SEARCH_EVERY = 5  # one question out of five is routed to web search
+
+
+def fake_router(router_input):
+    time.sleep(ROUTER_DELAY)
+    web_search = int(router_input["question"].split("#")[1]) % WEB_SEARCH_EVERY == 0
+    return RouterQuery(datasource="websearch" if web_search else "vectorstore")
+
+
+def fake_retriever(question):
+    time.sleep(RETRIEVAL_DELAY)
+    return [Document(page_content=f"document {i} for {question}") for i in range(4)]
+
+
+if __name__ == "__main__":
+    router, retriever = RunnableLambda(fake_router), RunnableLambda(fake_retriever)
+    questions = [f"question #{i}" for i in range(1, NUM_QUESTIONS + 1)]
+
+    # Sequential path: route, then retrieve only for the vectorstore questions
+    start = time.perf_counter()
+    for question in questions:
+        if router.invoke({"question": question}).datasource == "vectorstore":
+            retriever.invoke(question)
+    sequential = (time.perf_counter() - start) / NUM_QUESTIONS
+
+    # Speculative path: retrieve while routing
+    stats = SpeculationStats()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for question in questions:
+            speculative_retrieve(question, router=router, retriever=retriever, stats=stats)
+    speculative = (time.perf_counter() - start) / NUM_QUESTIONS
+
+    print(f"sequential : {sequential * 1000:6.0f} ms per question")
+    print(f"speculative: {speculative * 1000:6.0f} ms per question")
+    print(stats.report())
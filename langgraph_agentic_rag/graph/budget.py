@@ -0,0 +1,90 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, Mapping, Optional, TypedDict
+
+from langchain_core.callbacks import UsageMetadataCallbackHandler
+from langchain_core.tracers.context import register_configure_hook
+
+from graph.config import RAG_DEADLINE_SECONDS, RAG_MAX_GENERATIONS, RAG_MAX_TOKENS, RAG_MAX_WEB_SEARCHES
+
+# Define the budget of one run of the graph
+class RunBudget(TypedDict, total=False):
+    """
+    Limits of one run, the missing keys take the RAG_MAX_* / RAG_DEADLINE_SECONDS defaults.
+
+    Attributes:
+        max_generations: number of generations (the first one included)
+        max_web_searches: number of web searches (the one picked by the router included)
+        deadline_seconds: wall clock time after which no retry is started
+        max_tokens: LLM tokens (prompt + completion) after which no retry is started
+    """
+
+    max_generations: int
+    max_web_searches: int
+    deadline_seconds: float
+    max_tokens: int
+
+# Define the function to fill the budget of a run with the defaults
+def start_budget(budget: Optional[Mapping[str, Any]] = None) -> RunBudget:
+    defaults = RunBudget(
+        max_generations=RAG_MAX_GENERATIONS,
+        max_web_searches=RAG_MAX_WEB_SEARCHES,
+        deadline_seconds=RAG_DEADLINE_SECONDS,
+        max_tokens=RAG_MAX_TOKENS,
+    )
+    return RunBudget(**{**defaults, **(budget or {})})
+
+# Define the function to check if the next step of the run still fits in its budget
+def exhausted_budget(state: Mapping[str, Any], generation: bool = False, web_search: bool = False) -> Optional[str]:
+    """
+    Check the budget before a retry (another generation and/or another web search)
+
+    Returns:
+        The reason why the step does not fit in the budget, None if it does
+    """
+    budget = state["budget"]
+    if generation and state["generations"] >= budget["max_generations"]:
+        return f"max_generations ({budget['max_generations']}) reached"
+    if web_search and state["web_searches"] >= budget["max_web_searches"]:
+        return f"max_web_searches ({budget['max_web_searches']}) reached"
+    if time.time() - state["started_at"] >= budget["deadline_seconds"]:
+        return f"deadline ({budget['deadline_seconds']:g}s) passed"
+    if state["tokens_used"] >= budget["max_tokens"]:
+        return f"max_tokens ({budget['max_tokens']}) reached"
+    return None
+
+# Define the handler counting the tokens of the LLM calls, it only listens to the LLM ends and runs inline
+# (the callback manager would otherwise call it for every chain event and, on the async path, in a thread)
+class TokenUsageHandler(UsageMetadataCallbackHandler):
+    run_inline = True
+
+    @property
+    def ignore_chain(self) -> bool:
+        return True
+
+    @property
+    def ignore_retriever(self) -> bool:
+        return True
+
+    @property
+    def ignore_agent(self) -> bool:
+        return True
+
+# Define the token counter of the LLM calls made inside a node, registered once so that every chain called in the
+# `with track_token_usage()` block (threads and tasks included) reports its usage metadata to the handler
+token_usage_var: ContextVar[Optional[TokenUsageHandler]] = ContextVar("rag_token_usage", default=None)
+register_configure_hook(token_usage_var, inheritable=True)
+
+@contextmanager
+def track_token_usage() -> Iterator[TokenUsageHandler]:
+    handler = TokenUsageHandler()
+    token = token_usage_var.set(handler)
+    try:
+        yield handler
+    finally:
+        token_usage_var.reset(token)
+
+# Define the function to count the tokens recorded by a handler (all the models together)
+def total_tokens(handler: TokenUsageHandler) -> int:
+    return sum(usage.get("total_tokens", 0) for usage in handler.usage_metadata.values())
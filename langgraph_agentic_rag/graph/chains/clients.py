@@ -0,0 +1,219 @@
+"""
+Registry of the model clients of the agentic RAG chains.
+
+The chains ask for the chat model of their role (get_chat_model("router")) instead of creating their own. The roles
+with the same configuration share one ChatOpenAI, and every chat model and the embedding client send their requests
+through one HTTP connection pool. Its keep-alive connections are reused across the nodes, the questions and the
+concurrent runs, and the pool is bounded, so a burst of concurrent runs waits for a connection instead of opening
+hundreds of new TLS connections (RAG_HTTP_MAX_CONNECTIONS is the number of API calls in flight).
+
+The async HTTP client is bound to the event loop of its first request: an app serving requests keeps one event loop,
+code running several asyncio.run calls must call reset_clients() between them.
+"""
+import asyncio
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from functools import lru_cache
+from typing import TYPE_CHECKING, AsyncIterator, Callable, List, Tuple
+
+from dotenv import load_dotenv
+from langchain_core.embeddings import Embeddings
+
+from graph.chains.llm_cache import chat_model_cache
+from graph.config import (
+    RAG_CHAT_MODEL,
+    RAG_CHAT_TEMPERATURE,
+    RAG_HTTP_KEEPALIVE_EXPIRY,
+    RAG_HTTP_MAX_CONNECTIONS,
+    RAG_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    RAG_HTTP_TIMEOUT,
+)
+
+if TYPE_CHECKING:
+    import httpx
+    from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+
+load_dotenv()
+
+# Define the roles of the chat models (one per chain)
+CHAT_MODEL_ROLES = (
+    "router",
+    "retrieval_grader",
+    "listwise_grader",
+    "hallucination_grader",
+    "answer_grader",
+    "generation_grader",
+    "generation",
+)
+
+# Define the function to read the model configuration of a role: (model, temperature)
+def role_config(role: str) -> Tuple[str, float]:
+    if role not in CHAT_MODEL_ROLES:
+        raise ValueError(f"Unknown chat model role {role!r}, expected one of {', '.join(CHAT_MODEL_ROLES)}")
+    model = os.getenv(f"RAG_{role.upper()}_MODEL", RAG_CHAT_MODEL)
+    temperature = float(os.getenv(f"RAG_{role.upper()}_TEMPERATURE", str(RAG_CHAT_TEMPERATURE)))
+    return model, temperature
+
+# Define the async transport letting at most max_connections requests into the connection pool, the others wait on a
+# semaphore: httpcore scans every queued request against every connection each time a request starts or ends, which
+# costs more CPU than the requests themselves once hundreds of concurrent runs queue on the pool
+def _bounded_async_transport(limits: "httpx.Limits") -> "httpx.AsyncBaseTransport":
+    import httpx
+
+    # The response stream releases the slot of its request once the body is read (or the response closed)
+    class ReleasingStream(httpx.AsyncByteStream):
+        def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]):
+            self.stream = stream
+            self.release = release
+
+        async def __aiter__(self) -> AsyncIterator[bytes]:
+            async for chunk in self.stream:
+                yield chunk
+
+        async def aclose(self) -> None:
+            try:
+                await self.stream.aclose()
+            finally:
+                if self.release is not None:
+                    release, self.release = self.release, None
+                    release()
+
+    class BoundedAsyncTransport(httpx.AsyncBaseTransport):
+        def __init__(self):
+            self.transport = httpx.AsyncHTTPTransport(limits=limits)
+            self.slots = asyncio.Semaphore(limits.max_connections)
+
+        async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+            await self.slots.acquire()
+            try:
+                response = await self.transport.handle_async_request(request)
+            except BaseException:
+                self.slots.release()
+                raise
+            response.stream = ReleasingStream(response.stream, self.slots.release)
+            return response
+
+        async def aclose(self) -> None:
+            await self.transport.aclose()
+
+    return BoundedAsyncTransport()
+
+# Define the function to create the HTTP clients shared by every model client (sync and async)
+@lru_cache(maxsize=1)
+def get_http_clients() -> Tuple["httpx.Client", "httpx.AsyncClient"]:
+    import httpx
+    import openai
+
+    limits = httpx.Limits(
+        max_connections=RAG_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=RAG_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=RAG_HTTP_KEEPALIVE_EXPIRY,
+    )
+    # The openai default clients, with the transport settings of the SDK and the limits of the shared pool
+    return (
+        openai.DefaultHttpxClient(limits=limits, timeout=RAG_HTTP_TIMEOUT),
+        openai.DefaultAsyncHttpxClient(transport=_bounded_async_transport(limits), timeout=RAG_HTTP_TIMEOUT),
+    )
+
+# Define the function to create a chat model, one per configuration (the roles configured alike share it)
+@lru_cache(maxsize=None)
+def _chat_model(model: str, temperature: float) -> "ChatOpenAI":
+    from langchain_openai import ChatOpenAI # Deferred, importing the provider package is the slowest part of the startup
+
+    http_client, http_async_client = get_http_clients()
+    return ChatOpenAI(
+        model=model,
+        temperature=temperature,
+        api_key=os.getenv("OPENAI_API_KEY"),
+        timeout=RAG_HTTP_TIMEOUT,
+        http_client=http_client,
+        http_async_client=http_async_client,
+        cache=chat_model_cache(),
+    )
+
+# Define the function to get the chat model of a role
+def get_chat_model(role: str) -> "ChatOpenAI":
+    return _chat_model(*role_config(role))
+
+# Define the function to create the embedding client (through the same connection pool)
+@lru_cache(maxsize=None)
+def get_embeddings_client(model: str, dimensions: int) -> "OpenAIEmbeddings":
+    from langchain_openai import OpenAIEmbeddings
+
+    http_client, http_async_client = get_http_clients()
+    return OpenAIEmbeddings(
+        model=model,
+        dimensions=dimensions,
+        api_key=os.getenv("OPENAI_API_KEY"),
+        timeout=RAG_HTTP_TIMEOUT,
+        http_client=http_client,
+        http_async_client=http_async_client,
+    )
+
+# Define the embeddings wrapper sharing the query embeddings: the embedding router and the retriever embed the same
+# question (at the same time with RAG_ENTRY_MODE=speculative), the second caller waits for the first request or reuses
+# its result instead of sending another one. The document embeddings of the build step are not shared
+class SharedQueryEmbeddings(Embeddings):
+    def __init__(self, embeddings: Embeddings, max_entries: int = 256):
+        self.embeddings = embeddings
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.queries: "OrderedDict[str, Future]" = OrderedDict()
+        self.requests = 0
+
+    def _claim(self, text: str) -> Tuple[Future, bool]:
+        """
+        Returns the future of the embedding of text and whether the caller has to compute it
+        """
+        with self.lock:
+            future = self.queries.get(text)
+            if future is not None:
+                self.queries.move_to_end(text)
+                return future, False
+            future = self.queries[text] = Future()
+            if len(self.queries) > self.max_entries:
+                self.queries.popitem(last=False)
+            self.requests += 1
+            return future, True
+
+    def _fail(self, text: str, future: Future, error: BaseException) -> None:
+        # A failed request is not kept, the next caller sends it again
+        with self.lock:
+            if self.queries.get(text) is future:
+                del self.queries[text]
+        future.set_exception(error)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.embeddings.aembed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        future, owner = self._claim(text)
+        if owner:
+            try:
+                future.set_result(self.embeddings.embed_query(text))
+            except BaseException as error:
+                self._fail(text, future, error)
+                raise
+        return list(future.result())
+
+    async def aembed_query(self, text: str) -> List[float]:
+        future, owner = self._claim(text)
+        if owner:
+            try:
+                future.set_result(await self.embeddings.aembed_query(text))
+            except BaseException as error:
+                self._fail(text, future, error)
+                raise
+        return list(await asyncio.wrap_future(future))
+
+# Define the function to drop the clients, the next call creates new ones (the chains already built keep the clients they
+# were built with, clear them with chain.get_chain.cache_clear())
+def reset_clients() -> None:
+    get_http_clients.cache_clear()
+    _chat_model.cache_clear()
+    get_embeddings_client.cache_clear()
@@ -0,0 +1,107 @@
+import json
+import os
+import threading
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+from langchain_core.runnables import RunnableLambda
+
+from graph.chains.router import RouterQuery, question_router
+from ingestion import ROUTER_CENTROIDS_PATH, collection_metadata, get_embeddings
+
+load_dotenv()
+
+# Define the similarity band: at or above the upper threshold the question is about an indexed topic, at or below
+# the lower threshold it is not, in between the LLM router decides (cosine similarity with the closest topic centroid).
+# The defaults are conservative starting values, not calibrated on the corpus: calibrate them on the labelled questions
+# with python -m benchmarks.compare_routers --calibrate (it prints the values to set)
+ROUTER_VECTORSTORE_THRESHOLD = float(os.getenv("ROUTER_VECTORSTORE_THRESHOLD", "0.45"))
+ROUTER_WEBSEARCH_THRESHOLD = float(os.getenv("ROUTER_WEBSEARCH_THRESHOLD", "0.25"))
+
+# Define the routing statistics (how many questions were decided locally)
+class RoutingStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.local = 0
+        self.fallback = 0
+
+    def record(self, local: bool) -> None:
+        with self.lock:
+            if local:
+                self.local += 1
+            else:
+                self.fallback += 1
+
+    def report(self) -> str:
+        total = self.local + self.fallback
+        share = self.local / total if total else 0.0
+        return f"embedding router: {self.local} decided locally, {self.fallback} sent to the LLM router ({share:.0%} local)"
+
+routing_stats = RoutingStats()
+
+# Define the function to load the topic centroids written at ingestion time
+@lru_cache(maxsize=1)
+def load_centroids(path: str = ROUTER_CENTROIDS_PATH) -> Optional[Tuple[list, np.ndarray]]:
+    """
+    Returns the topic names and the (topics, dimensions) centroid matrix, or None when the centroids were not built
+    with the current embedding configuration (every question then goes to the LLM router)
+    """
+    if not os.path.exists(path):
+        print(f"---ROUTER CENTROIDS NOT FOUND AT {path}, USING THE LLM ROUTER---")
+        return None
+    with open(path, encoding="utf-8") as f:
+        stored = json.load(f)
+    if (stored.get("embedding_model"), stored.get("embedding_dimensions")) != (
+        collection_metadata["embedding_model"],
+        collection_metadata["embedding_dimensions"],
+    ):
+        print("---ROUTER CENTROIDS BUILT WITH ANOTHER EMBEDDING CONFIGURATION, USING THE LLM ROUTER---")
+        return None
+    topics = list(stored["centroids"])
+    return topics, np.asarray([stored["centroids"][topic] for topic in topics], dtype=np.float32)
+
+# Define the function to decide from the question embedding alone
+def route_by_similarity(
+    question_embedding,
+    centroids: np.ndarray,
+    vectorstore_threshold: float = ROUTER_VECTORSTORE_THRESHOLD,
+    websearch_threshold: float = ROUTER_WEBSEARCH_THRESHOLD,
+) -> Tuple[Optional[str], float]:
+    """
+    Returns the datasource ("vectorstore" / "websearch", or None in the ambiguous band) and the best similarity
+    """
+    question_vector = np.asarray(question_embedding, dtype=np.float32)
+    similarity = float((centroids @ (question_vector / np.linalg.norm(question_vector))).max())
+    if similarity >= vectorstore_threshold:
+        return "vectorstore", similarity
+    if similarity <= websearch_threshold:
+        return "websearch", similarity
+    return None, similarity
+
+# Define the hybrid router: local decision when confident, LLM router in the ambiguous band
+def route(router_input: Dict[str, str]) -> RouterQuery:
+    centroids = load_centroids()
+    if centroids is not None:
+        datasource, similarity = route_by_similarity(get_embeddings().embed_query(router_input["question"]), centroids[1])
+        routing_stats.record(local=datasource is not None)
+        if datasource is not None:
+            print(f"---LOCAL ROUTER: {datasource.upper()} (similarity {similarity:.2f})---")
+            return RouterQuery(datasource=datasource)
+        print(f"---LOCAL ROUTER: AMBIGUOUS (similarity {similarity:.2f}), ASKING THE LLM ROUTER---")
+    return question_router.invoke(router_input)
+
+async def aroute(router_input: Dict[str, str]) -> RouterQuery:
+    centroids = load_centroids()
+    if centroids is not None:
+        datasource, similarity = route_by_similarity(await get_embeddings().aembed_query(router_input["question"]), centroids[1])
+        routing_stats.record(local=datasource is not None)
+        if datasource is not None:
+            print(f"---LOCAL ROUTER: {datasource.upper()} (similarity {similarity:.2f})---")
+            return RouterQuery(datasource=datasource)
+        print(f"---LOCAL ROUTER: AMBIGUOUS (similarity {similarity:.2f}), ASKING THE LLM ROUTER---")
+    return await question_router.ainvoke(router_input)
+
+# Create the embedding question router chain (same input and output as question_router)
+embedding_question_router = RunnableLambda(route, afunc=aroute, name="embedding_question_router")
@@ -1,30 +1,26 @@
 from langchain import hub
 from langchain_core.output_parsers import StrOutputParser
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
-import os
 from dotenv import load_dotenv
+from graph.chains.lazy import lazy_chain
+from graph.chains.clients import get_chat_model
 
 load_dotenv()
 
-# Initialize the model
-llm = ChatOpenAI(model="gpt-4.1", temperature=0, api_key=os.getenv("OPENAI_API_KEY"))
-
 # Get the prompt template from the hub
 # prompt_template = hub.pull("rlm/rag-prompt")
 
 # Modified rlm/rag-prompt template to include instructions of filtering out the irrelevant information
-prompt_template = ChatPromptTemplate.from_template("""
+prompt = """
 You are an assistant for question-answering tasks. Use the following pieces of retrieved context to answer the question. If you don't know the answer, just say that you don't know. Use three sentences maximum and keep the answer concise.
 Question: {question} 
 Context: {context} 
 Additional Instructions:
 {additional_instructions}
 Answer:
-""")
+"""
 
-prompt_template = prompt_template.partial(
-    additional_instructions="""
+additional_instructions = """
     Filter out the irrelevant information from the context.
     Exclude the following elements from Tavily search results:
     - Image links and URLs (e.g., .jpg, .png, .gif, .svg)
@@ -38,7 +34,14 @@ prompt_template = prompt_template.partial(
     - Cookie notices and privacy policies
     Focus only on the main textual content relevant to answering the question.
     """
-)
+
+# Define the function that builds the generation chain (called on first use, not at import)
+def build_generation_chain():
+    # Initialize the model
+    llm = get_chat_model("generation")
+
+    prompt_template = ChatPromptTemplate.from_template(prompt).partial(additional_instructions=additional_instructions)
+    return prompt_template | llm | StrOutputParser()
 
 # Define the generation chain
-generation_chain = prompt_template | llm | StrOutputParser()
\ No newline at end of file
+generation_chain = lazy_chain(build_generation_chain, name="generation_chain")
\ No newline at end of file
@@ -0,0 +1,38 @@
+from langchain_core.prompts import ChatPromptTemplate
+from pydantic import BaseModel, Field
+from langchain_core.runnables import RunnableSequence
+from dotenv import load_dotenv
+from graph.chains.lazy import lazy_chain
+from graph.chains.clients import get_chat_model
+
+load_dotenv()
+
+# Initialize the fused generation grader class with pydantic structured output (both verdicts of one generation)
+class GenerationGrader(BaseModel):
+    """Binary scores for hallucination present in generation answer and for answer quality"""
+
+    grounded: bool = Field(description="Answer is grounded in the facts, 'yes' if it is, 'no' if it is not")
+    addresses_question: bool = Field(description="Answer addresses / resolves the question, 'yes' if it is, 'no' if it is not")
+
+# Define the system prompt with the template
+system_prompt = """You are a grader assessing an LLM generation against a set of retrieved facts and a user question. \n
+     Give two independent binary scores 'yes' or 'no'.
+     grounded: 'yes' means that the answer is grounded in / supported by the set of facts.
+     addresses_question: 'yes' means that the answer addresses / resolves the question, give 'no' if it does not."""
+
+# Define the function that builds the fused generation grader chain (called on first use, not at import)
+def build_generation_grader() -> RunnableSequence:
+    # Initialize the model and the generation grader llm (one structured output call returns both verdicts)
+    llm = get_chat_model("generation_grader")
+    structured_llm_grader = llm.with_structured_output(GenerationGrader)
+
+    generation_grade_prompt = ChatPromptTemplate.from_messages(
+        [
+            ("system", system_prompt),
+            ("human", "Set of facts: \n\n {documents} \n\n User question: {question} \n\n LLM generation: {generation}"),
+        ]
+    )
+    return generation_grade_prompt | structured_llm_grader
+
+# Create the fused generation grader chain, input: {"documents", "question", "generation"}
+generation_grader = lazy_chain(build_generation_grader, name="generation_grader")
@@ -0,0 +1,23 @@
+from functools import lru_cache
+from typing import Callable
+
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+
+# Define a helper to build a chain (and its model client) on first use instead of at import time
+def lazy_chain(build: Callable[[], Runnable], name: str) -> RunnableLambda:
+    """
+    Wrap a chain factory into a runnable that builds the chain the first time it is invoked.
+    Importing a chain module then neither imports the model provider package, nor creates the client,
+    nor parses the prompts. The built chain is reused by every later call (`.get_chain()` returns it).
+    """
+    get_chain = lru_cache(maxsize=1)(build)
+
+    def invoke(chain_input, config: RunnableConfig):
+        return get_chain().invoke(chain_input, config)
+
+    async def ainvoke(chain_input, config: RunnableConfig):
+        return await get_chain().ainvoke(chain_input, config)
+
+    chain = RunnableLambda(invoke, afunc=ainvoke, name=name)
+    chain.get_chain = get_chain
+    return chain
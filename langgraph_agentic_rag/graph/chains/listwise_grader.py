@@ -0,0 +1,60 @@
+from typing import List
+from langchain_core.prompts import ChatPromptTemplate
+from pydantic import BaseModel, Field
+from dotenv import load_dotenv
+from graph.chains.lazy import lazy_chain
+from graph.chains.clients import get_chat_model
+
+load_dotenv()
+
+# Define the grading model of one document
+class DocumentGrade(BaseModel):
+    """
+    Binary score for relevance check on one of the retrieved documents.
+    """
+
+    index: int = Field(description="Number of the document, as given in the list of retrieved documents")
+    binary_score: str = Field(description="Document is relevant to the question, 'yes' if relevant, 'no' if not relevant")
+
+# Define the grading model of the whole list
+class GradeDocumentsList(BaseModel):
+    """
+    Binary scores for relevance check on all the retrieved documents, one grade per document.
+    """
+
+    grades: List[DocumentGrade] = Field(description="One grade for every retrieved document")
+
+# Define the system prompt
+system = """You are a grader assessing relevance of retrieved documents to a user question. \n
+    You get a numbered list of documents. Grade every document independently of the others. \n
+    If a document contains keyword(s) or semantic meaning related to the question, grade it as relevant. \n
+    Give a binary score 'yes' or 'no' for every document number to indicate whether it is relevant to the question.
+    Dont translate the score into 1 or 0, just return the score as a string."""
+
+# Define the function to number the documents for the prompt
+def format_numbered_documents(documents: List[str]) -> str:
+    return "\n\n".join(f"Document {i}:\n{document}" for i, document in enumerate(documents))
+
+# Define the function that builds the listwise retrieval grader chain (called on first use, not at import)
+def build_listwise_retrieval_grader():
+    # Define the model and the grader llm (one structured output call grades every document)
+    llm = get_chat_model("listwise_grader")
+    structured_llm_grader = llm.with_structured_output(GradeDocumentsList)
+
+    grade_prompt = ChatPromptTemplate.from_messages(
+        [
+            ("system", system),
+            ("human", "Retrieved documents: \n\n {documents} \n\n User question: {question}"),
+        ]
+    )
+    return (
+        {
+            "question": lambda grader_input: grader_input["question"],
+            "documents": lambda grader_input: format_numbered_documents(grader_input["documents"]),
+        }
+        | grade_prompt
+        | structured_llm_grader
+    )
+
+# Define the final listwise retrieval grader chain, input: {"question": str, "documents": List[str]}
+listwise_retrieval_grader = lazy_chain(build_listwise_retrieval_grader, name="listwise_retrieval_grader")
@@ -0,0 +1,148 @@
+"""
+Record / replay cache of the LLM responses (and query embeddings) of the agentic RAG chains.
+
+Every chain runs at temperature 0, so the same prompt can be answered from the responses recorded before. The key
+is the model with its parameters and the tool schema bound by with_structured_output (the llm string of LangChain),
+plus the full message payload. The responses are kept in a SQLite file.
+
+Modes (RAG_LLM_CACHE_MODE):
+    off: no cache (default)
+    record: every call goes to the provider, its response is recorded (replacing the one recorded before)
+    replay: every call is answered from the recorded responses, a missing one raises LLMCacheMiss (no network access,
+        for the tests and the benchmarks)
+    cache: answered from the recorded responses when there is one, otherwise the provider is called and the response
+        recorded (for production)
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import warnings
+from typing import Any, List, Optional
+
+from langchain_core._api import LangChainBetaWarning
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.embeddings import Embeddings
+from langchain_core.load import dumps, loads
+
+from graph.config import RAG_LLM_CACHE_MODE, RAG_LLM_CACHE_PATH
+
+LLM_CACHE_MODES = ("off", "record", "replay", "cache")
+
+# Define the error raised by the replay mode when a response was never recorded
+class LLMCacheMiss(LookupError):
+    """No recorded response for the prompt (replay mode)"""
+
+# Define the record / replay cache
+class LLMCache(BaseCache):
+    """
+    SQLite cache of the LLM responses, following the record / replay / cache modes.
+    The file is only opened on the first lookup, the mode can be changed until then (the tests set it).
+    """
+
+    def __init__(self, mode: str = RAG_LLM_CACHE_MODE, path: str = RAG_LLM_CACHE_PATH):
+        if mode not in LLM_CACHE_MODES:
+            raise ValueError(f"Unknown LLM cache mode {mode!r}, expected one of {', '.join(LLM_CACHE_MODES)}")
+        self.mode = mode
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.connection = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.path, check_same_thread=False)
+            self.connection.execute("CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, llm_string TEXT, value TEXT)")
+            self.connection.commit()
+        return self.connection
+
+    @staticmethod
+    def key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\n{prompt}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self.lock:
+            row = self._connect().execute("SELECT value FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, key: str, llm_string: str, value: str) -> None:
+        with self.lock:
+            connection = self._connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, llm_string, value) VALUES (?, ?, ?)", (key, llm_string, value)
+            )
+            connection.commit()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        if self.mode in ("off", "record"):
+            return None
+        value = self.get(self.key(prompt, llm_string))
+        if value is None:
+            self.misses += 1
+            if self.mode == "replay":
+                raise LLMCacheMiss(
+                    f"No recorded response in {self.path} for this prompt, record it first with RAG_LLM_CACHE_MODE=record"
+                )
+            return None
+        self.hits += 1
+        with warnings.catch_warnings():  # The cache reads back the responses it wrote itself with the (beta) loader
+            warnings.simplefilter("ignore", LangChainBetaWarning)
+            return loads(value)
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        if self.mode in ("record", "cache"):
+            self.put(self.key(prompt, llm_string), llm_string, dumps(return_val))
+
+    # A lookup is one local SQLite read, faster than handing it to a thread as BaseCache does
+    async def alookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        return self.lookup(prompt, llm_string)
+
+    async def aupdate(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        self.update(prompt, llm_string, return_val)
+
+    def clear(self, **kwargs: Any) -> None:
+        with self.lock:
+            self._connect().execute("DELETE FROM llm_cache")
+            self.connection.commit()
+
+    def report(self) -> str:
+        return f"llm cache ({self.mode}): {self.hits} hits, {self.misses} misses"
+
+# The cache shared by every chain of the app
+llm_cache = LLMCache()
+
+# Define the function to get the cache to pass to the chat models when they are built (None when the cache is off)
+def chat_model_cache() -> Optional[LLMCache]:
+    return None if llm_cache.mode == "off" else llm_cache
+
+# Define the embeddings wrapper answering the query embeddings from the same cache (the retriever and the embedding
+# router embed the question before any LLM call), the document embeddings of the build step are not cached
+class CachedQueryEmbeddings(Embeddings):
+    def __init__(self, embeddings: Embeddings, model: str, cache: LLMCache = llm_cache):
+        self.embeddings = embeddings
+        self.model = model
+        self.cache = cache
+
+    def _lookup(self, text: str) -> Optional[List[float]]:
+        return self.cache.lookup(json.dumps(text), self.model)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.embeddings.aembed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        embedding = self._lookup(text)
+        if embedding is None:
+            embedding = self.embeddings.embed_query(text)
+            self.cache.update(json.dumps(text), self.model, embedding)
+        return embedding
+
+    async def aembed_query(self, text: str) -> List[float]:
+        embedding = self._lookup(text)
+        if embedding is None:
+            embedding = await self.embeddings.aembed_query(text)
+            self.cache.update(json.dumps(text), self.model, embedding)
+        return embedding
@@ -1,9 +1,10 @@
 from typing import Literal
 from langchain_core.prompts import ChatPromptTemplate
 from pydantic import BaseModel, Field
-from langchain_openai import ChatOpenAI
 import os
 from dotenv import load_dotenv
+from graph.chains.lazy import lazy_chain
+from graph.chains.clients import get_chat_model
 load_dotenv()
 
 # Define the router class with pydantic structured output
@@ -15,21 +16,24 @@ class RouterQuery(BaseModel):
         description="Given a user question choose to route it to web search or a vectorstore.",
     )
 
-# Define the llm with structured output
-llm = ChatOpenAI(model="gpt-4.1", api_key=os.getenv("OPENAI_API_KEY"), temperature=0)
-structured_llm_router = llm.with_structured_output(RouterQuery)
-
 # Define the system prompt with the template
 system_prompt = """You are an expert at routing a user question to a vectorstore or web search.
 The vectorstore contains documents related to agents, prompt engineering, and adversarial attacks.
 Use the vectorstore for questions on these topics. For all else, use web-search."""
 
-route_prompt = ChatPromptTemplate.from_messages(
-    [
-        ("system", system_prompt),
-        ("human", "{question}"),
-    ]
-)
+# Define the function that builds the question router chain (called on first use, not at import)
+def build_question_router():
+    # Define the llm with structured output
+    llm = get_chat_model("router")
+    structured_llm_router = llm.with_structured_output(RouterQuery)
+
+    route_prompt = ChatPromptTemplate.from_messages(
+        [
+            ("system", system_prompt),
+            ("human", "{question}"),
+        ]
+    )
+    return route_prompt | structured_llm_router
 
 # Create the question router chain
-question_router = route_prompt | structured_llm_router
\ No newline at end of file
+question_router = lazy_chain(build_question_router, name="question_router")
\ No newline at end of file
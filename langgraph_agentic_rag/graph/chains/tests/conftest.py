@@ -0,0 +1,31 @@
+import os
+
+import pytest
+
+from graph.chains.llm_cache import llm_cache
+
+# The chain tests call gpt-4.1 at temperature 0: answer them from the record / replay cache of the LLM responses.
+# The first run records the responses, the next ones run without network access (RAG_LLM_CACHE_MODE=replay also
+# fails on a response that was never recorded instead of calling the provider)
+if "RAG_LLM_CACHE_MODE" not in os.environ:
+    llm_cache.mode = "cache"
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "network: calls the OpenAI API and needs the built collection (ingestion.py)")
+
+
+# Skip the network tests when they cannot run: no built collection to retrieve from, or neither an API key nor
+# recorded responses (RAG_LLM_CACHE_MODE=replay) to answer the prompts
+def pytest_collection_modifyitems(config, items):
+    import ingestion
+
+    if not os.path.exists(ingestion.MANIFEST_PATH):
+        reason = "the collection is not built, run python ingestion.py first"
+    elif not os.getenv("OPENAI_API_KEY") and llm_cache.mode != "replay":
+        reason = "needs OPENAI_API_KEY, or the recorded responses with RAG_LLM_CACHE_MODE=replay"
+    else:
+        return
+    for item in items:
+        if "network" in item.keywords:
+            item.add_marker(pytest.mark.skip(reason=reason))
@@ -2,6 +2,7 @@
 Important thing to remember: To run this go to the root directory and run the command:
 pytest -s -v
 """
+import pytest
 from dotenv import load_dotenv
 from graph.chains.retrieval_grader import GradeDocuments, retrieval_grader
 from graph.chains.generation import generation_chain
@@ -12,6 +13,9 @@ from graph.chains.router import question_router, RouterQuery
 load_dotenv()
 import pprint
 
+# Every test calls the OpenAI API (skipped offline, see conftest.py)
+pytestmark = pytest.mark.network
+
 # Define test for yes answer
 def test_retrieval_grader_answer_yes() -> None:
     question = "agent memory"
@@ -0,0 +1,89 @@
+"""
+Tests of the model client registry and of the shared query embeddings (no API calls, the clients are only created).
+Run from the langgraph_agentic_rag directory: pytest -s -v graph/chains/tests/test_clients.py
+"""
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from graph.chains import clients
+
+
+@pytest.fixture(autouse=True)
+def fresh_clients():
+    clients.reset_clients()
+    yield
+    clients.reset_clients()
+
+
+def test_roles_share_one_chat_model_and_connection_pool() -> None:
+    router = clients.get_chat_model("router")
+    assert clients.get_chat_model("generation") is router
+    embeddings = clients.get_embeddings_client("text-embedding-3-small", 256)
+
+    http_client, http_async_client = clients.get_http_clients()
+    assert router.http_client is embeddings.http_client is http_client
+    assert router.http_async_client is embeddings.http_async_client is http_async_client
+
+
+def test_role_configuration(monkeypatch) -> None:
+    monkeypatch.setenv("RAG_ROUTER_MODEL", "gpt-4.1-mini")
+    router = clients.get_chat_model("router")
+    assert router.model_name == "gpt-4.1-mini"
+    assert clients.get_chat_model("answer_grader").model_name == clients.RAG_CHAT_MODEL
+    # Another configuration, the same connection pool
+    assert router.http_async_client is clients.get_chat_model("answer_grader").http_async_client
+
+    with pytest.raises(ValueError):
+        clients.get_chat_model("summarizer")
+
+
+# Define a slow embedding client counting its requests
+class SlowEmbeddings(DeterministicFakeEmbedding):
+    requests: int = 0
+    fail: bool = False
+
+    def embed_query(self, text):
+        self.requests += 1
+        time.sleep(0.1)
+        if self.fail:
+            raise ConnectionError("embedding provider unavailable")
+        return super().embed_query(text)
+
+    async def aembed_query(self, text):
+        self.requests += 1
+        await asyncio.sleep(0.1)
+        return super().embed_query(text)
+
+
+def test_concurrent_query_embeddings_are_sent_once() -> None:
+    client = SlowEmbeddings(size=8)
+    embeddings = clients.SharedQueryEmbeddings(client)
+    # The embedding router and the retriever of a speculative run embed the same question at the same time
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        router_vector, retriever_vector = executor.map(embeddings.embed_query, ["agent memory"] * 2)
+    assert router_vector == retriever_vector == client.embed_query("agent memory")
+    assert embeddings.requests == 1
+
+    async def run():
+        return await asyncio.gather(embeddings.aembed_query("agent planning"), embeddings.aembed_query("agent planning"))
+
+    assert len(set(map(tuple, asyncio.run(run())))) == 1
+    assert embeddings.requests == 2
+    # Documents are never shared
+    assert embeddings.embed_documents(["agent memory"]) == client.embed_documents(["agent memory"])
+
+
+def test_failed_query_embedding_is_not_kept() -> None:
+    client = SlowEmbeddings(size=8, fail=True)
+    embeddings = clients.SharedQueryEmbeddings(client)
+    with pytest.raises(ConnectionError):
+        embeddings.embed_query("agent memory")
+    client.fail = False
+    assert embeddings.embed_query("agent memory") == client.embed_query("agent memory")
@@ -0,0 +1,99 @@
+"""
+Tests of the record / replay cache of the LLM responses (a fake chat model counts the provider calls).
+Run from the langgraph_agentic_rag directory: pytest -s -v graph/chains/tests/test_llm_cache.py
+"""
+import asyncio
+from typing import Any, List, Optional
+
+import pytest
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from graph.chains.llm_cache import CachedQueryEmbeddings, LLMCache, LLMCacheMiss
+
+
+# Define the fake provider, it answers with the number of the call so a replayed answer is recognisable
+class CountingChatModel(BaseChatModel):
+    model_name: str = "fake-gpt"
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "counting-chat-model"
+
+    @property
+    def _identifying_params(self):
+        return {"model_name": self.model_name}
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        self.calls += 1
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=f"answer {self.calls}"))])
+
+
+class CountingEmbeddings(Embeddings):
+    def __init__(self):
+        self.calls = 0
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        self.calls += 1
+        return [float(len(text)), 0.5]
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "llm_cache.sqlite")
+
+
+def test_record_then_replay(cache_path) -> None:
+    recording = CountingChatModel(cache=LLMCache(mode="record", path=cache_path))
+    assert recording.invoke("What is agent memory?").content == "answer 1"
+    assert recording.invoke("What is agent memory?").content == "answer 2"  # record always calls the provider
+
+    replaying = CountingChatModel(cache=LLMCache(mode="replay", path=cache_path))
+    assert replaying.invoke("What is agent memory?").content == "answer 2"
+    assert asyncio.run(replaying.ainvoke("What is agent memory?")).content == "answer 2"
+    assert replaying.calls == 0
+
+    with pytest.raises(LLMCacheMiss):
+        replaying.invoke("How to make a pizza?")
+    assert replaying.calls == 0
+
+
+def test_key_includes_model_parameters_and_tools(cache_path) -> None:
+    CountingChatModel(cache=LLMCache(mode="record", path=cache_path)).invoke("What is agent memory?")
+    tool = {"type": "function", "function": {"name": "RouterQuery", "parameters": {"type": "object", "properties": {}}}}
+
+    replaying = CountingChatModel(cache=LLMCache(mode="replay", path=cache_path))
+    with pytest.raises(LLMCacheMiss):
+        replaying.bind(tools=[tool]).invoke("What is agent memory?")
+    with pytest.raises(LLMCacheMiss):
+        CountingChatModel(model_name="other-gpt", cache=replaying.cache).invoke("What is agent memory?")
+
+
+def test_cache_mode_calls_the_provider_on_miss_only(cache_path) -> None:
+    cache = LLMCache(mode="cache", path=cache_path)
+    model = CountingChatModel(cache=cache)
+    assert [model.invoke("What is agent memory?").content for _ in range(3)] == ["answer 1"] * 3
+    assert model.invoke("How to make a pizza?").content == "answer 2"
+    assert (model.calls, cache.hits, cache.misses) == (2, 2, 2)
+
+
+def test_query_embeddings_replay(cache_path) -> None:
+    provider = CountingEmbeddings()
+    CachedQueryEmbeddings(provider, model="fake-embedding", cache=LLMCache(mode="record", path=cache_path)).embed_query("agent memory")
+
+    replaying = CachedQueryEmbeddings(provider, model="fake-embedding", cache=LLMCache(mode="replay", path=cache_path))
+    assert replaying.embed_query("agent memory") == [12.0, 0.5]
+    assert provider.calls == 1
+    with pytest.raises(LLMCacheMiss):
+        replaying.embed_query("pizza")
+
+
+def test_unknown_mode() -> None:
+    with pytest.raises(ValueError):
+        LLMCache(mode="sometimes")
@@ -0,0 +1,121 @@
+import asyncio
+import sqlite3
+import uuid
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+import ormsgpack
+from langchain.schema import Document
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from graph.state import RemoveDocuments, ReplaceDocuments
+
+# Define the msgpack extension codes of the documents (the codes of langgraph start at 0, these stay clear of them)
+EXT_DOCUMENT = 100
+EXT_REPLACE_DOCUMENTS = 101
+EXT_REMOVE_DOCUMENTS = 102
+EXT_TUPLE = 103
+
+# Define the type tag of the compact checkpoints in the database
+COMPACT_TYPE = "rag_msgpack"
+
+# Hand the types ormsgpack would otherwise encode lossily (tuples and dataclasses as lists / dicts, datetimes as
+# strings, enums as their values, uuids as strings) to _encode_document: the tuples get their own extension code
+# (JsonPlusSerializer would store them as lists too), the other types raise so JsonPlusSerializer stores them
+MSGPACK_OPTIONS = (
+    ormsgpack.OPT_NON_STR_KEYS
+    | ormsgpack.OPT_PASSTHROUGH_SUBCLASS
+    | ormsgpack.OPT_PASSTHROUGH_TUPLE
+    | ormsgpack.OPT_PASSTHROUGH_DATACLASS
+    | ormsgpack.OPT_PASSTHROUGH_DATETIME
+    | ormsgpack.OPT_PASSTHROUGH_ENUM
+    | ormsgpack.OPT_PASSTHROUGH_UUID
+)
+
+# Define the msgpack encoding of the documents: [page_content, metadata] (and the id when it is set), instead of the
+# module, class name, field names and validation method stored by the default serializer for every document
+def _encode_document(obj: Any) -> ormsgpack.Ext:
+    if isinstance(obj, Document):
+        fields = [obj.page_content, obj.metadata] if obj.id is None else [obj.page_content, obj.metadata, obj.id]
+        return ormsgpack.Ext(EXT_DOCUMENT, _pack(fields))
+    # The explicit documents updates keep their type, a pending write of the grader must still replace on resume
+    if isinstance(obj, ReplaceDocuments):
+        return ormsgpack.Ext(EXT_REPLACE_DOCUMENTS, _pack(list(obj)))
+    if isinstance(obj, RemoveDocuments):
+        return ormsgpack.Ext(EXT_REMOVE_DOCUMENTS, _pack(list(obj)))
+    if type(obj) is tuple:
+        return ormsgpack.Ext(EXT_TUPLE, _pack(list(obj)))
+    raise TypeError(f"{type(obj).__name__} has no compact encoding")
+
+def _pack(obj: Any) -> bytes:
+    return ormsgpack.packb(obj, default=_encode_document, option=MSGPACK_OPTIONS)
+
+def _decode_document(code: int, data: bytes) -> Any:
+    value = _unpack(data)
+    if code == EXT_DOCUMENT:
+        page_content, metadata, *document_id = value
+        return Document(page_content=page_content, metadata=metadata, id=document_id[0] if document_id else None)
+    if code == EXT_REPLACE_DOCUMENTS:
+        return ReplaceDocuments(value)
+    if code == EXT_REMOVE_DOCUMENTS:
+        return RemoveDocuments(value)
+    if code == EXT_TUPLE:
+        return tuple(value)
+    raise ValueError(f"Unknown msgpack extension code: {code}")
+
+def _unpack(data: bytes) -> Any:
+    return ormsgpack.unpackb(data, ext_hook=_decode_document, option=ormsgpack.OPT_NON_STR_KEYS)
+
+# Define the serializer of the checkpoints, compact for the state of the graph (plain values and documents)
+class CompactDocumentSerializer(JsonPlusSerializer):
+    """
+    JsonPlusSerializer storing the documents as [page_content, metadata]
+    The values holding other objects are stored by JsonPlusSerializer, so every checkpoint can still be read back
+    """
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        if obj is None or isinstance(obj, (bytes, bytearray)):
+            return super().dumps_typed(obj)
+        try:
+            return COMPACT_TYPE, _pack(obj)
+        except (TypeError, ormsgpack.MsgpackEncodeError):
+            return super().dumps_typed(obj)
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        if data[0] == COMPACT_TYPE:
+            return _unpack(data[1])
+        return super().loads_typed(data)
+
+# Define the SQLite checkpointer of the graph, the async methods run the sync ones in a thread so that
+# rag_app.ainvoke works with the same connection (SqliteSaver only implements the sync methods)
+class RagCheckpointSaver(SqliteSaver):
+    async def aget_tuple(self, config: RunnableConfig):
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config: Optional[RunnableConfig], *, filter=None, before=None, limit=None) -> AsyncIterator:
+        checkpoints = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for checkpoint in checkpoints:
+            yield checkpoint
+
+    async def aput(self, config: RunnableConfig, checkpoint, metadata, new_versions) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config: RunnableConfig, writes, task_id: str, task_path: str = "") -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+# Define the function to open the checkpointer of a SQLite file (created with its tables on first use)
+def get_checkpointer(path: str) -> RagCheckpointSaver:
+    connection = sqlite3.connect(path, check_same_thread=False)
+    return RagCheckpointSaver(connection, serde=CompactDocumentSerializer())
+
+# Define the function to build the config of a checkpointed run, a new thread id starts a new run
+def run_config(thread_id: Optional[str] = None, **config: Any) -> Dict[str, Any]:
+    """
+    Returns the config to pass to rag_app.invoke / rag_app.ainvoke, with the thread id of the run in "configurable"
+    """
+    configurable = {**config.pop("configurable", {}), "thread_id": thread_id or uuid.uuid4().hex}
+    return {**config, "configurable": configurable}
@@ -0,0 +1,63 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Define the maximum number of documents graded at the same time in the grade documents node
+RAG_GRADER_MAX_CONCURRENCY = int(os.getenv("RAG_GRADER_MAX_CONCURRENCY", "4"))
+
+# Stop waiting for the remaining grades once a document is graded irrelevant (web search is forced anyway)
+RAG_GRADER_EARLY_EXIT = os.getenv("RAG_GRADER_EARLY_EXIT", "false").lower() == "true"
+
+# Define how the retrieved documents are graded: "pointwise" (one grader call per document) or "listwise" (one call for all)
+RAG_GRADING_MODE = os.getenv("RAG_GRADING_MODE", "pointwise")
+
+# Define how many documents the retriever returns: "fixed" (the 4 most similar) or "adaptive" (between the min and the max,
+# cut where the similarity falls below RAG_RETRIEVAL_RELATIVE_CUTOFF x the best one or drops by more than RAG_RETRIEVAL_GAP
+# from one document to the next), every document returned costs a grader call and generation tokens
+RAG_RETRIEVAL_MODE = os.getenv("RAG_RETRIEVAL_MODE", "fixed")
+RAG_RETRIEVAL_K = int(os.getenv("RAG_RETRIEVAL_K", "4"))
+RAG_RETRIEVAL_MIN_K = int(os.getenv("RAG_RETRIEVAL_MIN_K", "1"))
+RAG_RETRIEVAL_MAX_K = int(os.getenv("RAG_RETRIEVAL_MAX_K", "6"))
+RAG_RETRIEVAL_RELATIVE_CUTOFF = float(os.getenv("RAG_RETRIEVAL_RELATIVE_CUTOFF", "0.8"))
+RAG_RETRIEVAL_GAP = float(os.getenv("RAG_RETRIEVAL_GAP", "0.08"))
+
+# Define the entry point of the graph: "route" (route the question, then retrieve) or "speculative" (retrieve while routing)
+RAG_ENTRY_MODE = os.getenv("RAG_ENTRY_MODE", "route")
+
+# Define the question router: "llm" (gpt-4.1 for every question) or "embedding" (topic centroids, LLM only when ambiguous)
+ROUTER_MODE = os.getenv("ROUTER_MODE", "llm")
+
+# Define how a generation is graded: "sequential" (hallucination grader, then answer grader), "concurrent" (both graders
+# at the same time) or "fused" (one call returning both verdicts)
+RAG_GENERATION_GRADING_MODE = os.getenv("RAG_GENERATION_GRADING_MODE", "sequential")
+
+# Define the default budget of one run (a run can override it with the "budget" key of its input)
+RAG_MAX_GENERATIONS = int(os.getenv("RAG_MAX_GENERATIONS", "3"))
+RAG_MAX_WEB_SEARCHES = int(os.getenv("RAG_MAX_WEB_SEARCHES", "2"))
+RAG_DEADLINE_SECONDS = float(os.getenv("RAG_DEADLINE_SECONDS", "60"))
+RAG_MAX_TOKENS = int(os.getenv("RAG_MAX_TOKENS", "50000"))
+
+# Define the SQLite file of the checkpoints (default unset, no checkpointer): every completed node of a run is saved,
+# a failed or interrupted run resumes from its last completed node (runs need a thread id, see graph.checkpoint.run_config)
+RAG_CHECKPOINT_PATH = os.getenv("RAG_CHECKPOINT_PATH") or None
+
+# Define the record / replay cache of the LLM responses (see graph.chains.llm_cache): "off", "record", "replay" (offline,
+# fails on a response that was never recorded) or "cache" (recorded responses first, the provider on a miss)
+RAG_LLM_CACHE_MODE = os.getenv("RAG_LLM_CACHE_MODE", "off")
+RAG_LLM_CACHE_PATH = os.getenv("RAG_LLM_CACHE_PATH") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".llm_cache.sqlite"
+)
+
+# Define the chat model of the chains (RAG_<ROLE>_MODEL / RAG_<ROLE>_TEMPERATURE override it for one role, the roles are
+# router, retrieval_grader, listwise_grader, hallucination_grader, answer_grader, generation_grader and generation)
+RAG_CHAT_MODEL = os.getenv("RAG_CHAT_MODEL", "gpt-4.1")
+RAG_CHAT_TEMPERATURE = float(os.getenv("RAG_CHAT_TEMPERATURE", "0"))
+
+# Define the HTTP connection pool shared by the chat and the embedding clients (see graph.chains.clients). The maximum
+# is the number of API calls in flight, the calls above it wait for a connection. Keep every connection alive: httpcore
+# closes any idle connection while the pool holds more than the keep-alive limit, so a lower limit reconnects under load
+RAG_HTTP_MAX_CONNECTIONS = int(os.getenv("RAG_HTTP_MAX_CONNECTIONS", "64"))
+RAG_HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("RAG_HTTP_MAX_KEEPALIVE_CONNECTIONS", str(RAG_HTTP_MAX_CONNECTIONS)))
+RAG_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("RAG_HTTP_KEEPALIVE_EXPIRY", "60"))
+RAG_HTTP_TIMEOUT = float(os.getenv("RAG_HTTP_TIMEOUT", "60"))
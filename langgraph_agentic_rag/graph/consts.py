@@ -2,4 +2,8 @@
 RETRIEVE = "retrieve_node"
 GRADE_DOCUMENTS = "grade_documents_node"
 GENERATE = "generate_node"
-WEB_SEARCH = "web_search_node"
\ No newline at end of file
+WEB_SEARCH = "web_search_node"
+SPECULATIVE_RETRIEVE = "speculative_retrieve_node"
+START_RUN = "start_run_node"
+GRADE_GENERATION = "grade_generation_node"
+BUDGET_FALLBACK = "budget_fallback_node"
@@ -0,0 +1,53 @@
+"""
+Fake chains of rag_app for the tests and the benchmarks (no API calls).
+Every chain is looked up in the modules that imported it, install_fake_chains replaces it there.
+The real chains are created on import, so OPENAI_API_KEY and TAVILY_API_KEY must be set (to any value) first.
+"""
+from typing import Callable, Dict
+
+from langchain.schema import Document
+from langchain_core.runnables import Runnable
+
+import graph.graph as rag_graph
+import graph.nodes.generate as generate_module
+import graph.nodes.grade_documents as grade_documents_module
+import graph.nodes.grade_generation as grade_generation_module
+import graph.nodes.retrieve as retrieve_module
+import graph.nodes.speculative_retrieve as speculative_retrieve_module
+import graph.nodes.websearch as websearch_module
+from graph.chains.answer_grader import AnswerGrader
+from graph.chains.hallucination_grader import HallucinationGrader
+from graph.chains.retrieval_grader import GradeDocuments
+from graph.chains.router import RouterQuery
+
+# Define where every chain is looked up: chain name -> (module, attribute) pairs
+CHAIN_TARGETS = {
+    "router": [(rag_graph, "question_router"), (speculative_retrieve_module, "question_router")],
+    "retriever": [(retrieve_module, "retriever"), (speculative_retrieve_module, "retriever")],
+    "retrieval_grader": [(grade_documents_module, "retrieval_grader")],
+    "generation": [(generate_module, "generation_chain")],
+    "web_search": [(websearch_module, "web_search_tool")],
+    "hallucination_grader": [(grade_generation_module, "hallucination_grader")],
+    "answer_grader": [(grade_generation_module, "answer_grader")],
+}
+
+# Define the outputs of a run where everything goes well: the question goes to the vectorstore, the documents are
+# relevant and the first generation is grounded and useful
+DEFAULT_OUTPUTS = {
+    "router": RouterQuery(datasource="vectorstore"),
+    "retriever": [Document(page_content="agent memory")],
+    "retrieval_grader": GradeDocuments(binary_score="yes"),
+    "generation": "Agent memory is ...",
+    "web_search": {"results": [{"content": "web result"}]},
+    "hallucination_grader": HallucinationGrader(binary_score=True),
+    "answer_grader": AnswerGrader(binary_score=True),
+}
+
+# Define the function to replace the chains
+def install_fake_chains(fakes: Dict[str, Runnable], setattr: Callable = setattr) -> None:
+    """
+    Replace the chains named in fakes (keys of CHAIN_TARGETS), pass monkeypatch.setattr to undo it after a test
+    """
+    for name, fake in fakes.items():
+        for module, attribute in CHAIN_TARGETS[name]:
+            setattr(module, attribute, fake)
@@ -1,15 +1,31 @@
 import os
+from functools import lru_cache
+from typing import Any, Dict, Optional
 from dotenv import load_dotenv
-from graph.chains.answer_grader import answer_grader
-from graph.chains.hallucination_grader import hallucination_grader
-from graph.consts import RETRIEVE, GRADE_DOCUMENTS, WEB_SEARCH, GENERATE
+from graph.budget import exhausted_budget
+from graph.checkpoint import get_checkpointer, run_config
+from graph.config import RAG_CHECKPOINT_PATH, RAG_ENTRY_MODE, ROUTER_MODE
+from graph.consts import RETRIEVE, GRADE_DOCUMENTS, WEB_SEARCH, GENERATE, SPECULATIVE_RETRIEVE
+from graph.consts import START_RUN, GRADE_GENERATION, BUDGET_FALLBACK
 from graph.nodes import retrieve_node, grade_documents_node, web_search_node, generate_node
+from graph.nodes import aretrieve_node, agrade_documents_node, aweb_search_node, agenerate_node
+from graph.nodes import speculative_retrieve_node, aspeculative_retrieve_node
+from graph.nodes import start_run_node, astart_run_node
+from graph.nodes import grade_generation_node, agrade_generation_node, budget_fallback_node, abudget_fallback_node
+from graph.nodes.grade_generation import retry_budget_exhausted
 from graph.chains.router import question_router, RouterQuery
+from graph.chains.embedding_router import embedding_question_router
 from graph.state import GraphState
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import START, StateGraph, END
+from langgraph.graph.state import CompiledStateGraph
 
 load_dotenv()
 
+# Use the local embedding router (the LLM router only decides the ambiguous questions)
+if ROUTER_MODE == "embedding":
+    question_router = embedding_question_router
+
 # Define the function to handle conditional for grade documents node to web search node or generate node
 def decide_to_generate(state: GraphState) -> bool:
     """
@@ -21,6 +37,12 @@ def decide_to_generate(state: GraphState) -> bool:
     # Define the condition to check if the documents are relevant to the question
     if state["web_search"]:
         print("---DECISION: NOT ALL DOCUMENTS ARE RELEVANT TO THE QUESTION---")
+
+        # Generate with the relevant documents only when the budget cannot afford the web search
+        reason = exhausted_budget(state, web_search=True)
+        if reason is not None:
+            print(f"---BUDGET: {reason}, SKIPPING THE WEB SEARCH, ROUTING TO GENERATE NODE---")
+            return GENERATE
         print("---ROUTING TO WEB SEARCH NODE---")
         return WEB_SEARCH
     else:
@@ -28,34 +50,12 @@ def decide_to_generate(state: GraphState) -> bool:
         print("---ROUTING TO GENERATE NODE---")
         return GENERATE
     
-# Define the function to handle conditional for grade documents node to answer grader node or generate node
-def grade_generation_grounded_in_documents_and_question(state: GraphState) -> str:
-    print("---CHECKING HALLUCINATIONS---")
-
-    # Get the state question, documents, and generation
-    question = state["question"]
-    documents = state["documents"]
-    generation = state["generation"]
-
-    # Check if the generation is grounded in the documents
-    hallucination_score = hallucination_grader.invoke({"documents": documents, "generation": generation})
-    if hallucination_score.binary_score:
-        print("---DECISION: GENERATION IS GROUNDED IN DOCUMENTS---")
-        print("---GRADE GENERATION vs QUESTION---")
-        answer_score = answer_grader.invoke({"question": question, "generation": generation})
-
-        # Check if the generation addresses the question
-        if answer_score.binary_score:
-            print("---DECISION: GENERATION ADDRESSES QUESTION---")
-            return "Useful" # Return useful if the generation addresses the question
-        else:
-            print("---DECISION: GENERATION DOES NOT ADDRESS QUESTION---")
-            return "Not useful" # Return not useful if the generation does not address the question
-        
-    # If the generation is not grounded in the documents, return not supported
-    else:
-        print("---DECISION: GENERATION IS NOT GROUNDED IN DOCUMENTS, RETRYING---")
-        return "Not supported"        
+# Define the function to follow the grade of the generation, the retries stop when the budget of the run is exhausted
+def decide_after_grade_generation(state: GraphState) -> str:
+    grade = state["generation_grade"]
+    if grade != "Useful" and retry_budget_exhausted(state) is not None:
+        return "Budget exhausted"
+    return grade
 
 # Define the function to route the question to the most relevant path (web search or vectorstore)
 def route_question(state: GraphState) -> str:
@@ -74,50 +74,141 @@ def route_question(state: GraphState) -> str:
         print("---DECISION: ROUTING TO RETRIEVE NODE---")
         return "vectorstore"
 
-# Define the graph
-graph = StateGraph(GraphState)
-
-# Add the nodes to the graph
-graph.add_node(RETRIEVE, retrieve_node)
-graph.add_node(GRADE_DOCUMENTS, grade_documents_node)
-graph.add_node(GENERATE, generate_node)
-graph.add_node(WEB_SEARCH, web_search_node)
-
-# Add the edges to the graph
-graph.add_edge(START, RETRIEVE) # The original edge from start to retrieve node
-graph.set_conditional_entry_point( # Set the conditional entry point to route the question to the most relevant path
-    path=route_question,
-    path_map={
-        "websearch": WEB_SEARCH, # If the question is to be routed to web search, route to web search node
-        "vectorstore": RETRIEVE # If the question is to be routed to vectorstore, route to retrieve node
-    }
-)
-graph.add_edge(RETRIEVE, GRADE_DOCUMENTS)
-
-## Conditional edges for grading the documents
-graph.add_conditional_edges(
-    source=GRADE_DOCUMENTS,
-    path=decide_to_generate,
-    path_map={
-        WEB_SEARCH: WEB_SEARCH,
-        GENERATE: GENERATE
-    }
-)
-
-## Conditional edges for grading the generation
-graph.add_conditional_edges(
-    source=GENERATE,
-    path=grade_generation_grounded_in_documents_and_question,
-    path_map={
-        "Useful": END, # If the generation is useful, end the graph
-        "Not useful": GENERATE, # If the generation is not useful, retry the generation
-        "Not supported": WEB_SEARCH # If the documents are not relevant to the question, retry the web search
-    }
-)
-
-graph.add_edge(WEB_SEARCH, GENERATE)
-graph.add_edge(GENERATE, END)
-
-# Compile the graph and save the graph to png
-rag_app = graph.compile()
-rag_app.get_graph().draw_mermaid_png(output_file_path="langgraph_agentic_rag/complete_rag_graph.png")
\ No newline at end of file
+# Define the async version of the question router
+async def aroute_question(state: GraphState) -> str:
+    print("---ROUTING QUESTION---")
+    source: RouterQuery = await question_router.ainvoke({"question": state["question"]})
+
+    if source.datasource == "websearch":
+        print("---DECISION: ROUTING TO WEB SEARCH NODE---")
+        return "websearch"
+    elif source.datasource == "vectorstore":
+        print("---DECISION: ROUTING TO RETRIEVE NODE---")
+        return "vectorstore"
+
+# Define the function to follow the route picked by the speculative entry node
+def decide_after_speculative_retrieve(state: GraphState) -> str:
+    """
+    The documents are already retrieved when the router picked the vectorstore, go straight to grading
+    """
+    if state["datasource"] == "websearch":
+        print("---ROUTING TO WEB SEARCH NODE (SPECULATIVE RETRIEVAL DISCARDED)---")
+        return WEB_SEARCH
+    print("---ROUTING TO GRADE DOCUMENTS NODE (SPECULATIVE RETRIEVAL USED)---")
+    return GRADE_DOCUMENTS
+
+# Define the function to build the graph (the nodes, the edges and the entry mode picked by RAG_ENTRY_MODE)
+def build_graph() -> StateGraph:
+    graph = StateGraph(GraphState)
+
+    # Add the nodes to the graph (every node has a sync and an async version, so both rag_app.invoke and rag_app.ainvoke work)
+    graph.add_node(START_RUN, RunnableLambda(start_run_node, afunc=astart_run_node))
+    graph.add_node(RETRIEVE, RunnableLambda(retrieve_node, afunc=aretrieve_node))
+    graph.add_node(GRADE_DOCUMENTS, RunnableLambda(grade_documents_node, afunc=agrade_documents_node))
+    graph.add_node(GENERATE, RunnableLambda(generate_node, afunc=agenerate_node))
+    graph.add_node(GRADE_GENERATION, RunnableLambda(grade_generation_node, afunc=agrade_generation_node))
+    graph.add_node(WEB_SEARCH, RunnableLambda(web_search_node, afunc=aweb_search_node))
+    graph.add_node(BUDGET_FALLBACK, RunnableLambda(budget_fallback_node, afunc=abudget_fallback_node))
+
+    # Add the edges to the graph, every run starts the clock and fills its budget first
+    graph.add_edge(START, START_RUN)
+    if RAG_ENTRY_MODE == "speculative":
+        # Retrieve from the vectorstore while the question is being routed, the documents are discarded if the router picks web search
+        graph.add_node(SPECULATIVE_RETRIEVE, RunnableLambda(speculative_retrieve_node, afunc=aspeculative_retrieve_node))
+        graph.add_edge(START_RUN, SPECULATIVE_RETRIEVE)
+        graph.add_conditional_edges(
+            source=SPECULATIVE_RETRIEVE,
+            path=decide_after_speculative_retrieve,
+            path_map={
+                WEB_SEARCH: WEB_SEARCH,
+                GRADE_DOCUMENTS: GRADE_DOCUMENTS
+            }
+        )
+    else:
+        graph.add_conditional_edges( # Route the question to the most relevant path, the router alone picks the next node
+            source=START_RUN,
+            path=RunnableLambda(route_question, afunc=aroute_question),
+            path_map={
+                "websearch": WEB_SEARCH, # If the question is to be routed to web search, route to web search node
+                "vectorstore": RETRIEVE # If the question is to be routed to vectorstore, route to retrieve node
+            }
+        )
+    graph.add_edge(RETRIEVE, GRADE_DOCUMENTS)
+
+    ## Conditional edges for grading the documents
+    graph.add_conditional_edges(
+        source=GRADE_DOCUMENTS,
+        path=decide_to_generate,
+        path_map={
+            WEB_SEARCH: WEB_SEARCH,
+            GENERATE: GENERATE
+        }
+    )
+
+    ## Conditional edges for grading the generation
+    graph.add_edge(GENERATE, GRADE_GENERATION)
+    graph.add_conditional_edges(
+        source=GRADE_GENERATION,
+        path=decide_after_grade_generation,
+        path_map={
+            "Useful": END, # If the generation is useful, end the graph
+            "Not useful": GENERATE, # If the generation is not useful, retry the generation
+            "Not supported": WEB_SEARCH, # If the documents are not relevant to the question, retry the web search
+            "Budget exhausted": BUDGET_FALLBACK # If the budget cannot afford the retry, end with the best generation so far
+        }
+    )
+
+    graph.add_edge(WEB_SEARCH, GENERATE)
+    graph.add_edge(BUDGET_FALLBACK, END)
+
+    return graph
+
+# Compile the graph on first use, importing this module only defines the nodes and the edges functions
+@lru_cache(maxsize=None)
+def get_rag_app(checkpoint_path: Optional[str] = RAG_CHECKPOINT_PATH) -> CompiledStateGraph:
+    """
+    Returns the compiled graph, checkpointed in the SQLite file checkpoint_path if it is set (RAG_CHECKPOINT_PATH by default)
+    """
+    if checkpoint_path is None:
+        return build_graph().compile(name="rag_app")
+    return build_graph().compile(checkpointer=get_checkpointer(checkpoint_path), name="rag_app")
+
+# Define the function to resume a checkpointed run from its last completed node (the nodes already done are not run again)
+def resume_rag_run(thread_id: str, checkpoint_path: Optional[str] = RAG_CHECKPOINT_PATH, **config: Any) -> Dict[str, Any]:
+    """
+    Resume the run of thread_id, the deadline of its budget keeps counting from the first start of the run
+
+    Returns:
+        The final state of the run (without running anything if the run had already finished)
+    """
+    rag_app = get_rag_app(checkpoint_path)
+    config = run_config(thread_id, **config)
+    snapshot = rag_app.get_state(config)
+    if not snapshot.values:
+        raise ValueError(f"No checkpointed run with thread id {thread_id!r}")
+    if not snapshot.next:
+        return snapshot.values
+    print(f"---RESUMING RUN {thread_id} AT {', '.join(snapshot.next).upper()}---")
+    return rag_app.invoke(None, config)
+
+# Define the async version of the resume function
+async def aresume_rag_run(thread_id: str, checkpoint_path: Optional[str] = RAG_CHECKPOINT_PATH, **config: Any) -> Dict[str, Any]:
+    rag_app = get_rag_app(checkpoint_path)
+    config = run_config(thread_id, **config)
+    snapshot = await rag_app.aget_state(config)
+    if not snapshot.values:
+        raise ValueError(f"No checkpointed run with thread id {thread_id!r}")
+    if not snapshot.next:
+        return snapshot.values
+    print(f"---RESUMING RUN {thread_id} AT {', '.join(snapshot.next).upper()}---")
+    return await rag_app.ainvoke(None, config)
+
+# Keep `from graph.graph import rag_app` working, the graph is compiled when it is first accessed
+def __getattr__(name: str):
+    if name == "rag_app":
+        return get_rag_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Define the function to save the graph to png (renders through the mermaid.ink api, so it is never done at import)
+def draw_rag_graph(output_file_path: str = "langgraph_agentic_rag/complete_rag_graph.png") -> None:
+    get_rag_app().get_graph().draw_mermaid_png(output_file_path=output_file_path)
@@ -0,0 +1,27 @@
+from graph.nodes.generate import generate_node, agenerate_node
+from graph.nodes.grade_documents import grade_documents_node, agrade_documents_node
+from graph.nodes.grade_generation import grade_generation_node, agrade_generation_node
+from graph.nodes.grade_generation import budget_fallback_node, abudget_fallback_node
+from graph.nodes.retrieve import retrieve_node, aretrieve_node
+from graph.nodes.speculative_retrieve import speculative_retrieve_node, aspeculative_retrieve_node
+from graph.nodes.start_run import start_run_node, astart_run_node
+from graph.nodes.websearch import web_search_node, aweb_search_node
+
+__all__ = [
+    "generate_node",
+    "agenerate_node",
+    "grade_documents_node",
+    "agrade_documents_node",
+    "grade_generation_node",
+    "agrade_generation_node",
+    "budget_fallback_node",
+    "abudget_fallback_node",
+    "retrieve_node",
+    "aretrieve_node",
+    "speculative_retrieve_node",
+    "aspeculative_retrieve_node",
+    "start_run_node",
+    "astart_run_node",
+    "web_search_node",
+    "aweb_search_node",
+]
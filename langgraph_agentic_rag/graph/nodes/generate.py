@@ -1,4 +1,5 @@
 from typing import Any, Dict
+from graph.budget import total_tokens, track_token_usage
 from graph.chains.generation import generation_chain
 from graph.state import GraphState
 
@@ -10,9 +11,26 @@ def generate_node(state: GraphState) -> Dict[str, Any]:
     question = state["question"]
     documents = state["documents"]
 
-    # Generate the response
-    generation = generation_chain.invoke({"question": question, "context": documents})
+    # Generate the response (the generation and its tokens count against the budget of the run)
+    with track_token_usage() as usage:
+        generation = generation_chain.invoke({"question": question, "context": documents})
     return {
         "generation": generation,
-        "documents": documents
-    }
\ No newline at end of file
+        "generations": 1,
+        "tokens_used": total_tokens(usage),
+    }
+
+# Define the async generate node
+async def agenerate_node(state: GraphState) -> Dict[str, Any]:
+    print("---GENERATE NODE---")
+
+    question = state["question"]
+    documents = state["documents"]
+
+    with track_token_usage() as usage:
+        generation = await generation_chain.ainvoke({"question": question, "context": documents})
+    return {
+        "generation": generation,
+        "generations": 1,
+        "tokens_used": total_tokens(usage),
+    }
@@ -1,7 +1,156 @@
-from typing import Any, Dict
+import asyncio
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Any, Dict, List, Tuple
 
+from langchain.schema import Document
+from langchain_core.runnables import Runnable
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+
+from graph.budget import total_tokens, track_token_usage
+from graph.chains.listwise_grader import listwise_retrieval_grader
 from graph.chains.retrieval_grader import retrieval_grader
-from graph.state import GraphState
+from graph.config import RAG_GRADER_EARLY_EXIT, RAG_GRADER_MAX_CONCURRENCY, RAG_GRADING_MODE
+from graph.state import GraphState, ReplaceDocuments
+
+
+# Define the function to check a single grade
+def is_relevant(score) -> bool:
+    if score.binary_score.lower() == "yes":
+        print("---GRADE: DOCUMENT RELEVANT---")
+        return True
+    print("---GRADE: DOCUMENT NOT RELEVANT---")
+    return False
+
+# Define the function to grade all the documents concurrently
+def grade_documents(
+    question: str,
+    documents: List[Document],
+    grader: Runnable = retrieval_grader,
+    max_concurrency: int = RAG_GRADER_MAX_CONCURRENCY,
+    early_exit: bool = RAG_GRADER_EARLY_EXIT,
+) -> Tuple[List[Document], bool]:
+    """
+    Grade the documents with at most `max_concurrency` grader calls in flight
+
+    Args:
+        question: The user question
+        documents: The retrieved documents
+        grader: The retrieval grader chain
+        max_concurrency: Maximum number of documents graded at the same time
+        early_exit: Return as soon as a document is graded irrelevant, without waiting for the other grades
+
+    Returns:
+        The relevant documents (in retrieval order) and whether web search is needed
+    """
+    inputs = [{"question": question, "document": doc.page_content} for doc in documents]
+
+    if not early_exit:
+        # batch keeps the order of the inputs, so the filtered documents keep the retrieval order
+        scores = grader.batch(inputs, config={"max_concurrency": max_concurrency})
+        relevant = [is_relevant(score) for score in scores]
+        return [doc for doc, keep in zip(documents, relevant) if keep], not all(relevant)
+
+    # Early exit: once one document is irrelevant the web search is forced anyway, so the grades still
+    # pending would not change the route. Queued grades are cancelled and running ones finish in the background
+    executor = ContextThreadPoolExecutor(max_workers=max_concurrency)
+    futures = {executor.submit(grader.invoke, grader_input): i for i, grader_input in enumerate(inputs)}
+    relevant_positions, web_search = set(), False
+    pending = set(futures)
+    try:
+        while pending and not web_search:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if is_relevant(future.result()):
+                    relevant_positions.add(futures[future])
+                else:
+                    web_search = True
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    if web_search and pending:
+        print(f"---EARLY EXIT: NOT WAITING FOR {len(pending)} GRADE(S)---")
+    return [doc for i, doc in enumerate(documents) if i in relevant_positions], web_search
+
+# Define the async version of grade_documents (runs on the event loop, no threads)
+async def agrade_documents(
+    question: str,
+    documents: List[Document],
+    grader: Runnable = retrieval_grader,
+    max_concurrency: int = RAG_GRADER_MAX_CONCURRENCY,
+    early_exit: bool = RAG_GRADER_EARLY_EXIT,
+) -> Tuple[List[Document], bool]:
+    """
+    Same as grade_documents, with `ainvoke` calls. With early exit the pending grades are cancelled
+    """
+    inputs = [{"question": question, "document": doc.page_content} for doc in documents]
+
+    if not early_exit:
+        scores = await grader.abatch(inputs, config={"max_concurrency": max_concurrency})
+        relevant = [is_relevant(score) for score in scores]
+        return [doc for doc, keep in zip(documents, relevant) if keep], not all(relevant)
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def grade(grader_input):
+        async with semaphore:
+            return await grader.ainvoke(grader_input)
+
+    tasks = {asyncio.ensure_future(grade(grader_input)): i for i, grader_input in enumerate(inputs)}
+    relevant_positions, web_search = set(), False
+    pending = set(tasks)
+    try:
+        while pending and not web_search:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if is_relevant(task.result()):
+                    relevant_positions.add(tasks[task])
+                else:
+                    web_search = True
+    finally:
+        for task in pending:
+            task.cancel()
+
+    if web_search and pending:
+        print(f"---EARLY EXIT: CANCELLED {len(pending)} GRADE(S)---")
+    return [doc for i, doc in enumerate(documents) if i in relevant_positions], web_search
+
+# Define the function to grade all the documents in a single grader call
+def grade_documents_listwise(
+    question: str,
+    documents: List[Document],
+    grader: Runnable = listwise_retrieval_grader,
+) -> Tuple[List[Document], bool]:
+    """
+    Grade all the documents with one structured output call (the system prompt and the question are sent once)
+
+    Returns:
+        The relevant documents (in retrieval order) and whether web search is needed
+    """
+    if not documents:
+        return [], False
+
+    result = grader.invoke({"question": question, "documents": [doc.page_content for doc in documents]})
+    return filter_listwise_grades(documents, result)
+
+# Define the async version of grade_documents_listwise
+async def agrade_documents_listwise(
+    question: str,
+    documents: List[Document],
+    grader: Runnable = listwise_retrieval_grader,
+) -> Tuple[List[Document], bool]:
+    if not documents:
+        return [], False
+
+    result = await grader.ainvoke({"question": question, "documents": [doc.page_content for doc in documents]})
+    return filter_listwise_grades(documents, result)
+
+# Define the function to keep the documents graded relevant by the listwise grader
+def filter_listwise_grades(documents: List[Document], result) -> Tuple[List[Document], bool]:
+    scores = {grade.index: grade for grade in result.grades}
+
+    # A document the grader did not return a verdict for counts as not relevant
+    relevant = [i in scores and is_relevant(scores[i]) for i in range(len(documents))]
+    return [doc for doc, keep in zip(documents, relevant) if keep], not all(relevant)
 
 # Define the grade documents node
 def grade_documents_node(state: GraphState) -> Dict[str, Any]:
@@ -22,27 +171,31 @@ def grade_documents_node(state: GraphState) -> Dict[str, Any]:
     question = state["question"]
     documents = state["documents"]
 
-    filtered_docs = [] # List to store the relevant documents if any
-    web_search = False # Flag to check if we need to run web search, will toggle to true if any document is not relevant
+    # Grade the documents (concurrently or in one listwise call), the web search flag is set if any document is not relevant
+    with track_token_usage() as usage:
+        if RAG_GRADING_MODE == "listwise":
+            filtered_docs, web_search = grade_documents_listwise(question, documents, grader=listwise_retrieval_grader)
+        else:
+            filtered_docs, web_search = grade_documents(question, documents, grader=retrieval_grader)
 
-    # Iterate over the documents and grade them
-    for doc in documents:
-        score = retrieval_grader.invoke(
-            {"question": question, "document": doc.page_content} # Pass the question and the document to the grader
-        )
+    # Replace the documents with the filtered ones, update the web search flag and the tokens spent by the grader
+    return {"documents": ReplaceDocuments(filtered_docs), "web_search": web_search, "tokens_used": total_tokens(usage)}
 
-        # Take the binary score from the grader
-        grade = score.binary_score
+# Define the async grade documents node
+async def agrade_documents_node(state: GraphState) -> Dict[str, Any]:
+    """
+    Async version of grade_documents_node, the grader calls run concurrently on the event loop
+    """
 
-        # Condition to check if the document is relevant
-        if grade.lower() == "yes":
-            print("---GRADE: DOCUMENT RELEVANT---")
-            filtered_docs.append(doc)
+    print("---CHECK DOCUMENT RELEVANCE TO QUESTION---")
+
+    question = state["question"]
+    documents = state["documents"]
 
+    with track_token_usage() as usage:
+        if RAG_GRADING_MODE == "listwise":
+            filtered_docs, web_search = await agrade_documents_listwise(question, documents, grader=listwise_retrieval_grader)
         else:
-            print("---GRADE: DOCUMENT NOT RELEVANT---")
-            web_search = True
-            continue
+            filtered_docs, web_search = await agrade_documents(question, documents, grader=retrieval_grader)
 
-    # Update the state with the filtered documents and the web search flag
-    return {"documents": filtered_docs, "web_search": web_search}
\ No newline at end of file
+    return {"documents": ReplaceDocuments(filtered_docs), "web_search": web_search, "tokens_used": total_tokens(usage)}
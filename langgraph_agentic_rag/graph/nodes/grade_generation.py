@@ -0,0 +1,175 @@
+import time
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from langchain.schema import Document
+from langchain_core.runnables import Runnable, RunnableParallel
+
+from graph.budget import exhausted_budget, total_tokens, track_token_usage
+from graph.chains.answer_grader import answer_grader
+from graph.chains.generation_grader import generation_grader
+from graph.chains.hallucination_grader import hallucination_grader
+from graph.config import RAG_GENERATION_GRADING_MODE
+from graph.state import GraphState
+
+# Define the ranking of the grades, the best graded generation is returned when the budget stops the retries
+GRADE_RANKS = {"Not supported": 0, "Not useful": 1, "Useful": 2}
+
+# Define the function to grade a generation with the grading mode picked by RAG_GENERATION_GRADING_MODE
+def grade_generation(
+    question: str,
+    documents: List[Document],
+    generation: str,
+    mode: str = RAG_GENERATION_GRADING_MODE,
+    hallucination_grader: Runnable = hallucination_grader,
+    answer_grader: Runnable = answer_grader,
+    generation_grader: Runnable = generation_grader,
+) -> Tuple[bool, bool]:
+    """
+    Grade the generation against the documents (grounded) and against the question (addresses the question)
+
+    Returns:
+        The two verdicts, the sequential mode skips the answer grader (and returns False) when the generation is not grounded
+    """
+    if mode == "fused":
+        grade = generation_grader.invoke({"documents": documents, "question": question, "generation": generation})
+        return grade.grounded, grade.addresses_question
+
+    if mode == "concurrent":
+        # Both graders run at the same time, the answer verdict is not used when the generation is not grounded
+        grades = RunnableParallel(hallucination=hallucination_grader, answer=answer_grader).invoke(
+            {"documents": documents, "question": question, "generation": generation}
+        )
+        return grades["hallucination"].binary_score, grades["answer"].binary_score
+
+    hallucination_score = hallucination_grader.invoke({"documents": documents, "generation": generation})
+    if not hallucination_score.binary_score:
+        return False, False
+    print("---GRADE GENERATION vs QUESTION---")
+    answer_score = answer_grader.invoke({"question": question, "generation": generation})
+    return True, answer_score.binary_score
+
+# Define the async version of grade_generation
+async def agrade_generation(
+    question: str,
+    documents: List[Document],
+    generation: str,
+    mode: str = RAG_GENERATION_GRADING_MODE,
+    hallucination_grader: Runnable = hallucination_grader,
+    answer_grader: Runnable = answer_grader,
+    generation_grader: Runnable = generation_grader,
+) -> Tuple[bool, bool]:
+    if mode == "fused":
+        grade = await generation_grader.ainvoke({"documents": documents, "question": question, "generation": generation})
+        return grade.grounded, grade.addresses_question
+
+    if mode == "concurrent":
+        grades = await RunnableParallel(hallucination=hallucination_grader, answer=answer_grader).ainvoke(
+            {"documents": documents, "question": question, "generation": generation}
+        )
+        return grades["hallucination"].binary_score, grades["answer"].binary_score
+
+    hallucination_score = await hallucination_grader.ainvoke({"documents": documents, "generation": generation})
+    if not hallucination_score.binary_score:
+        return False, False
+    print("---GRADE GENERATION vs QUESTION---")
+    answer_score = await answer_grader.ainvoke({"question": question, "generation": generation})
+    return True, answer_score.binary_score
+
+# Define the decision table of the generation grading (the same for every grading mode)
+def decide_generation(grounded: bool, addresses_question: bool) -> str:
+    # If the generation is not grounded in the documents, return not supported
+    if not grounded:
+        print("---DECISION: GENERATION IS NOT GROUNDED IN DOCUMENTS, RETRYING---")
+        return "Not supported"
+
+    # Check if the generation addresses the question
+    print("---DECISION: GENERATION IS GROUNDED IN DOCUMENTS---")
+    if addresses_question:
+        print("---DECISION: GENERATION ADDRESSES QUESTION---")
+        return "Useful" # Return useful if the generation addresses the question
+    print("---DECISION: GENERATION DOES NOT ADDRESS QUESTION---")
+    return "Not useful" # Return not useful if the generation does not address the question
+
+# Define the function to check if the retry following a grade still fits in the budget of the run
+def retry_budget_exhausted(state: Mapping[str, Any]) -> Optional[str]:
+    """
+    "Not useful" retries the generation, "Not supported" searches the web then generates again
+
+    Returns:
+        The reason why the retry does not fit in the budget, None if it does (or if there is nothing to retry)
+    """
+    grade = state["generation_grade"]
+    if grade == "Not useful":
+        return exhausted_budget(state, generation=True)
+    if grade == "Not supported":
+        return exhausted_budget(state, generation=True, web_search=True)
+    return None
+
+# Define the function to keep the best graded generation of the run
+def keep_best_generation(state: GraphState, grade: str) -> Dict[str, Any]:
+    best_grade = state.get("best_generation_grade")
+    if best_grade and GRADE_RANKS[grade] <= GRADE_RANKS[best_grade]:
+        return {}
+    return {"best_generation": state["generation"], "best_generation_grade": grade}
+
+# Define the grade generation node
+def grade_generation_node(state: GraphState) -> Dict[str, Any]:
+    """
+    Grade the last generation against the documents and the question, the grade decides the next step of the run
+    """
+    print("---CHECKING HALLUCINATIONS---")
+
+    with track_token_usage() as usage:
+        grounded, addresses_question = grade_generation(
+            state["question"],
+            state["documents"],
+            state["generation"],
+            hallucination_grader=hallucination_grader,
+            answer_grader=answer_grader,
+            generation_grader=generation_grader,
+        )
+    grade = decide_generation(grounded, addresses_question)
+    return {
+        "generation_grade": grade,
+        "tokens_used": total_tokens(usage),
+        "elapsed_seconds": time.time() - state["started_at"],
+        **keep_best_generation(state, grade),
+    }
+
+# Define the async grade generation node
+async def agrade_generation_node(state: GraphState) -> Dict[str, Any]:
+    print("---CHECKING HALLUCINATIONS---")
+
+    with track_token_usage() as usage:
+        grounded, addresses_question = await agrade_generation(
+            state["question"],
+            state["documents"],
+            state["generation"],
+            hallucination_grader=hallucination_grader,
+            answer_grader=answer_grader,
+            generation_grader=generation_grader,
+        )
+    grade = decide_generation(grounded, addresses_question)
+    return {
+        "generation_grade": grade,
+        "tokens_used": total_tokens(usage),
+        "elapsed_seconds": time.time() - state["started_at"],
+        **keep_best_generation(state, grade),
+    }
+
+# Define the budget fallback node (reached instead of a retry the budget cannot afford)
+def budget_fallback_node(state: GraphState) -> Dict[str, Any]:
+    """
+    End the run with the best graded generation so far instead of the last one
+    """
+    reason = retry_budget_exhausted(state)
+    print(f"---BUDGET EXHAUSTED: {reason}, RETURNING THE BEST GENERATION SO FAR ({state['best_generation_grade']})---")
+    return {
+        "generation": state["best_generation"],
+        "generation_grade": state["best_generation_grade"],
+        "budget_exhausted": reason,
+        "elapsed_seconds": time.time() - state["started_at"],
+    }
+
+async def abudget_fallback_node(state: GraphState) -> Dict[str, Any]:
+    return budget_fallback_node(state)
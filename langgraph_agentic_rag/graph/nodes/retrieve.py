@@ -1,4 +1,4 @@
-from typing import Any, Dict, List
+from typing import Any, Dict
 
 from graph.state import GraphState
 from ingestion import retriever
@@ -14,4 +14,12 @@ def retrieve_node(state: GraphState) -> Dict[str, Any]:
     documents = retriever.invoke(question)
 
     # Update the field of document in our current state
-    return {"documents": documents}
\ No newline at end of file
+    return {"documents": documents}
+
+# Define the async retrieve node (used by rag_app.ainvoke / astream)
+async def aretrieve_node(state: GraphState) -> Dict[str, Any]:
+    print(f"Retrieving documents for question: {state['question']}")
+
+    # Retrieve the relevant documents without blocking the event loop
+    documents = await retriever.ainvoke(state["question"])
+    return {"documents": documents}
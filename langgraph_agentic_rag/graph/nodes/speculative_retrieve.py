@@ -0,0 +1,139 @@
+import asyncio
+import threading
+import time
+from typing import Any, Dict, List, Tuple
+
+from langchain.schema import Document
+from langchain_core.runnables import Runnable
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+
+from graph.budget import total_tokens, track_token_usage
+from graph.chains.embedding_router import embedding_question_router
+from graph.chains.router import question_router
+from graph.config import ROUTER_MODE
+from graph.state import GraphState
+from ingestion import retriever
+
+# Use the local embedding router (the LLM router only decides the ambiguous questions)
+if ROUTER_MODE == "embedding":
+    question_router = embedding_question_router
+
+
+# Define the speculation statistics (shared by all the runs of the process)
+class SpeculationStats:
+    """
+    Counts how often the speculative retrieval was used or wasted and how much latency it saved.
+    The saved latency of a run is the time of the sequential path (router + retrieval) minus the time of the
+    speculative node, counted only when the retrieval result was used.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.used = 0
+        self.wasted = 0
+        self.latency_saved = 0.0
+
+    def record(self, datasource: str, router_time: float, retrieval_time: float, elapsed: float) -> None:
+        with self.lock:
+            if datasource == "vectorstore":
+                self.used += 1
+                self.latency_saved += max(router_time + retrieval_time - elapsed, 0.0)
+            else:
+                self.wasted += 1
+
+    @property
+    def wasted_ratio(self) -> float:
+        total = self.used + self.wasted
+        return self.wasted / total if total else 0.0
+
+    def report(self) -> str:
+        average_saved = self.latency_saved / self.used if self.used else 0.0
+        return (
+            f"speculative retrievals: {self.used} used, {self.wasted} wasted ({self.wasted_ratio:.0%}), "
+            f"{average_saved * 1000:.0f} ms saved per vectorstore question"
+        )
+
+speculation_stats = SpeculationStats()
+
+# Define the function to route the question while the retrieval is already running
+def speculative_retrieve(
+    question: str,
+    router: Runnable = question_router,
+    retriever: Runnable = retriever,
+    stats: SpeculationStats = speculation_stats,
+) -> Tuple[str, List[Document]]:
+    """
+    Run the question router and the retrieval at the same time
+
+    Returns:
+        The datasource picked by the router and the retrieved documents (empty when the router picked web search)
+    """
+    timings = {}
+
+    def timed(name, runnable, runnable_input):
+        start = time.perf_counter()
+        result = runnable.invoke(runnable_input)
+        timings[name] = time.perf_counter() - start
+        return result
+
+    start = time.perf_counter()
+    executor = ContextThreadPoolExecutor(max_workers=2)
+    retrieval = executor.submit(timed, "retrieval", retriever, question)
+    try:
+        datasource = timed("router", router, {"question": question}).datasource
+        documents = retrieval.result() if datasource == "vectorstore" else []
+    finally:
+        # When the router picks web search the retrieval result is not needed, don't wait for it
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    stats.record(datasource, timings["router"], timings.get("retrieval", 0.0), time.perf_counter() - start)
+    return datasource, documents
+
+# Define the async version of speculative_retrieve
+async def aspeculative_retrieve(
+    question: str,
+    router: Runnable = question_router,
+    retriever: Runnable = retriever,
+    stats: SpeculationStats = speculation_stats,
+) -> Tuple[str, List[Document]]:
+    timings = {}
+
+    async def timed(name, runnable, runnable_input):
+        start = time.perf_counter()
+        result = await runnable.ainvoke(runnable_input)
+        timings[name] = time.perf_counter() - start
+        return result
+
+    start = time.perf_counter()
+    retrieval = asyncio.ensure_future(timed("retrieval", retriever, question))
+    try:
+        datasource = (await timed("router", router, {"question": question})).datasource
+        documents = await retrieval if datasource == "vectorstore" else []
+    finally:
+        # The retrieval is cancelled if it is still running when the router picks web search
+        retrieval.cancel()
+
+    stats.record(datasource, timings["router"], timings.get("retrieval", 0.0), time.perf_counter() - start)
+    return datasource, documents
+
+# Define the speculative retrieve node (entry point of the graph when RAG_ENTRY_MODE is "speculative")
+def speculative_retrieve_node(state: GraphState) -> Dict[str, Any]:
+    """
+    Route the question and retrieve the documents concurrently, most questions go to the vectorstore anyway.
+    The retrieved documents are discarded when the router picks web search.
+    """
+    print("---ROUTING QUESTION WITH SPECULATIVE RETRIEVAL---")
+
+    with track_token_usage() as usage:
+        datasource, documents = speculative_retrieve(state["question"], router=question_router, retriever=retriever)
+    print(f"---DECISION: {datasource.upper()}---")
+    return {"datasource": datasource, "documents": documents, "tokens_used": total_tokens(usage)}
+
+# Define the async speculative retrieve node
+async def aspeculative_retrieve_node(state: GraphState) -> Dict[str, Any]:
+    print("---ROUTING QUESTION WITH SPECULATIVE RETRIEVAL---")
+
+    with track_token_usage() as usage:
+        datasource, documents = await aspeculative_retrieve(state["question"], router=question_router, retriever=retriever)
+    print(f"---DECISION: {datasource.upper()}---")
+    return {"datasource": datasource, "documents": documents, "tokens_used": total_tokens(usage)}
@@ -0,0 +1,18 @@
+import time
+from typing import Any, Dict
+
+from graph.budget import start_budget
+from graph.state import GraphState
+
+# Define the start node (entry point of every run, starts the clock and fills the budget with the defaults)
+def start_run_node(state: GraphState) -> Dict[str, Any]:
+    budget = start_budget(state.get("budget"))
+    print(
+        f"---BUDGET: {budget['max_generations']} GENERATION(S), {budget['max_web_searches']} WEB SEARCH(ES), "
+        f"{budget['deadline_seconds']:g}s, {budget['max_tokens']} TOKENS---"
+    )
+    return {"budget": budget, "started_at": time.time(), "budget_exhausted": ""}
+
+# Define the async start node (nothing to await, avoids running the sync node in a thread)
+async def astart_run_node(state: GraphState) -> Dict[str, Any]:
+    return start_run_node(state)
@@ -1,8 +1,7 @@
-from typing import Any, Dict
+from typing import Any, Dict, List
 import os
 import sys
 from dotenv import load_dotenv
-from langchain_tavily import TavilySearch
 from langchain.schema import Document
 
 # Try to import from the project structure, fallback to path modification if needed
@@ -14,11 +13,31 @@ except ModuleNotFoundError:
     project_root = os.path.join(current_dir, '..', '..')
     sys.path.insert(0, os.path.abspath(project_root))
     from graph.state import GraphState
+from graph.chains.lazy import lazy_chain
 
 load_dotenv()
 
+# Make the shared modules of the repository root importable (search_cache)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+
+# Define the function that creates the TavilySearch client (called on the first web search, not at import)
+def build_web_search_tool():
+    from search_cache import CachedTavilySearch # Repeated questions and retries are answered from the search cache
+
+    return CachedTavilySearch(max_results=2, api_key=os.getenv("TAVILY_API_KEY"))
+
 # Initialize the TavilySearch client
-web_search_tool = TavilySearch(max_results=2, api_key=os.getenv("TAVILY_API_KEY"))
+web_search_tool = lazy_chain(build_web_search_tool, name="web_search_tool")
+
+# Define the function to turn the Tavily results into a document
+def join_web_results(tavily_results: List[dict]) -> Document:
+    # Join the content from all search results
+    joined_tavily_result = "\n".join(
+        [tavily_result["content"] for tavily_result in tavily_results]
+    )
+
+    # Create a Document object from the joined results
+    return Document(page_content=joined_tavily_result)
 
 # Define the web search node
 def web_search_node(state: GraphState) -> Dict[str, Any]:
@@ -27,33 +46,27 @@ def web_search_node(state: GraphState) -> Dict[str, Any]:
     """
     print("---WEB SEARCH---")
 
-    # Get the question and document from the state
+    # Get the question from the state
     question = state["question"]
 
-    if "documents" in state: # if the route to web search in first time then give error
-        documents = state["documents"]
-    else:
-        documents = None
-    
     # Invoke the web search tool
     tavily_results = web_search_tool.invoke({"query": question})["results"]
-    
-    # Join the content from all search results
-    joined_tavily_result = "\n".join(
-        [tavily_result["content"] for tavily_result in tavily_results]
-    )
 
-    # Create a Document object from the joined results
-    web_results = Document(page_content=joined_tavily_result)
+    # Return only the new document, the documents reducer adds it to the state documents unless the same content is there
+    # already (the search counts against the budget of the run)
+    return {"documents": [join_web_results(tavily_results)], "web_searches": 1}
 
-    # Set-up condition to check if the documents are not None
-    if documents is not None:
-        documents.append(web_results)
-    else:
-        documents = [web_results]
+# Define the async web search node
+async def aweb_search_node(state: GraphState) -> Dict[str, Any]:
+    """
+    Search the web for the latest information on the given query, without blocking the event loop.
+    """
+    print("---WEB SEARCH---")
+
+    question = state["question"]
 
-    # Return the updated state
-    return {"documents": documents}
+    tavily_results = (await web_search_tool.ainvoke({"query": question}))["results"]
+    return {"documents": [join_web_results(tavily_results)], "web_searches": 1}
 
 if __name__ == "__main__":
     state = {"question": "agentic memory", "document": None}
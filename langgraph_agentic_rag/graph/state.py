@@ -1,7 +1,45 @@
-from typing import List, TypedDict, Annotated
+import hashlib
+from typing import List, Optional, TypedDict, Annotated
 from langchain.schema import Document
 import operator
 
+from graph.budget import RunBudget
+
+# Define the explicit updates of the documents (a plain list appends the documents that are not in the state yet)
+class ReplaceDocuments(list):
+    """Documents replacing all the documents of the state (for example the documents kept by the grader)"""
+
+class RemoveDocuments(list):
+    """Documents removed from the state (matched by content)"""
+
+# Define the content hash used to recognise the same document coming back from another retrieval or web search
+def document_hash(document: Document) -> str:
+    return hashlib.sha256(document.page_content.encode("utf-8")).hexdigest()
+
+# Define the reducer of the documents: deduplicated by content, with explicit replace / remove updates
+def merge_documents(current: Optional[List[Document]], update: Optional[List[Document]]) -> List[Document]:
+    """
+    Merge an update returned by a node into the documents of the state
+
+    Returns:
+        A new list (the state list is never modified): the deduplicated update for ReplaceDocuments, the current documents
+        without the removed ones for RemoveDocuments, otherwise the current documents followed by the new ones
+    """
+    current = current or []
+    if update is None:
+        return current
+    if isinstance(update, RemoveDocuments):
+        removed = {document_hash(document) for document in update}
+        return [document for document in current if document_hash(document) not in removed]
+
+    merged, seen = [], set()
+    for document in (update if isinstance(update, ReplaceDocuments) else [*current, *update]):
+        content_hash = document_hash(document)
+        if content_hash not in seen:
+            seen.add(content_hash)
+            merged.append(document)
+    return merged
+
 # Define the state of the graph
 class GraphState(TypedDict):
     """
@@ -11,10 +49,32 @@ class GraphState(TypedDict):
         question: question
         generation: LLM generation
         web_search: whether to add search for extra relevant information or not (boolean)
-        documents: list of documents
+        documents: list of documents, deduplicated by content (see merge_documents)
+        datasource: datasource picked by the question router ("vectorstore" or "websearch"), set by the speculative entry node
+        budget: limits of the run (optional in the input, filled with the defaults by the start node)
+        started_at: wall clock start time of the run (time.time())
+        generations: number of generations so far
+        web_searches: number of web searches so far
+        tokens_used: LLM tokens spent so far (prompt + completion)
+        elapsed_seconds: wall clock time of the run when the last generation was graded
+        generation_grade: grade of the last generation ("Useful", "Not useful" or "Not supported")
+        best_generation: best graded generation so far, returned when the budget stops the retries
+        best_generation_grade: grade of best_generation
+        budget_exhausted: why the budget stopped the retries, empty if it did not
     """
 
     question: str
     generation: str
     web_search: bool
-    documents: Annotated[List[Document], operator.add]
\ No newline at end of file
+    datasource: str
+    documents: Annotated[List[Document], merge_documents]
+    budget: RunBudget
+    started_at: float
+    generations: Annotated[int, operator.add] # The nodes return increments, concurrent nodes can both count
+    web_searches: Annotated[int, operator.add]
+    tokens_used: Annotated[int, operator.add]
+    elapsed_seconds: float
+    generation_grade: str
+    best_generation: str
+    best_generation_grade: str
+    budget_exhausted: str
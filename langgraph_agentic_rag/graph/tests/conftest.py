@@ -0,0 +1,45 @@
+"""
+Fixtures shared by the tests of rag_app (no API calls, every chain is replaced by a fake).
+"""
+import os
+from collections import Counter
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("TAVILY_API_KEY", "tvly-test")
+
+import pytest
+from langchain_core.runnables import Runnable, RunnableLambda
+
+from graph.fake_chains import DEFAULT_OUTPUTS, install_fake_chains
+
+
+# Define the fakes of the chains of a test, with the number of calls of every chain
+class FakeChains:
+    def __init__(self, monkeypatch):
+        self.monkeypatch = monkeypatch
+        self.calls = Counter()
+
+    def set(self, name: str, fake) -> None:
+        """
+        Replace the chain with a runnable, or with a function of the chain input (its calls are counted)
+        """
+        if not isinstance(fake, Runnable):
+            fake = RunnableLambda(self._counted(name, fake))
+        install_fake_chains({name: fake}, self.monkeypatch.setattr)
+
+    def _counted(self, name: str, function):
+        def call(chain_input):
+            self.calls[name] += 1
+            return function(chain_input)
+        return call
+
+
+@pytest.fixture
+def fake_chains(monkeypatch) -> FakeChains:
+    """
+    Every chain returns its output of graph.fake_chains.DEFAULT_OUTPUTS until the test replaces it
+    """
+    chains = FakeChains(monkeypatch)
+    for name, output in DEFAULT_OUTPUTS.items():
+        chains.set(name, lambda _, output=output: output)
+    return chains
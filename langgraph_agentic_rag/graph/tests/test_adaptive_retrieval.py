@@ -0,0 +1,69 @@
+"""
+Tests of the adaptive-k retrieval (no API calls, the collection is replaced by a fake).
+Run from the langgraph_agentic_rag directory: pytest -s -v graph/tests
+"""
+import asyncio
+from types import SimpleNamespace
+
+from langchain.schema import Document
+
+import ingestion
+from ingestion import PersistedCollectionRetriever, adaptive_k, cosine_similarities
+
+
+def scored(*similarities):
+    return [(Document(page_content=f"chunk {i}"), similarity) for i, similarity in enumerate(similarities)]
+
+
+def contents(documents):
+    return [doc.page_content for doc in documents]
+
+
+def test_adaptive_k_cuts_below_relative_cutoff() -> None:
+    # 0.45 < 0.8 x 0.6
+    assert contents(adaptive_k(scored(0.6, 0.58, 0.55, 0.45, 0.44), min_k=1, max_k=6, relative_cutoff=0.8, gap=1.0)) == [
+        "chunk 0",
+        "chunk 1",
+        "chunk 2",
+    ]
+
+
+def test_adaptive_k_cuts_at_gap() -> None:
+    # 0.58 -> 0.49 is a drop of 0.09, above the cutoff but wider than the gap
+    assert contents(adaptive_k(scored(0.6, 0.58, 0.49, 0.48), min_k=1, max_k=6, relative_cutoff=0.5, gap=0.08)) == [
+        "chunk 0",
+        "chunk 1",
+    ]
+
+
+def test_adaptive_k_min_and_max() -> None:
+    # The min_k most similar are kept whatever their similarity, never more than max_k
+    assert contents(adaptive_k(scored(0.6, 0.2, 0.1), min_k=2, max_k=6, relative_cutoff=0.8, gap=0.08)) == ["chunk 0", "chunk 1"]
+    assert len(adaptive_k(scored(0.6, 0.6, 0.6, 0.6, 0.6), min_k=1, max_k=3, relative_cutoff=0.8, gap=0.08)) == 3
+    assert adaptive_k([], min_k=2) == []
+
+
+def fake_vectorstore(distances, space=None):
+    metadata = {"hnsw:space": space} if space else {}
+    results = [(Document(page_content=f"chunk {i}"), distance) for i, distance in enumerate(distances)]
+    return SimpleNamespace(
+        _collection=SimpleNamespace(metadata=metadata),
+        similarity_search_with_score=lambda query, k: results[:k],
+    )
+
+
+def test_cosine_similarities() -> None:
+    # Squared L2 between unit vectors is 2 - 2 x cosine, the cosine space stores 1 - cosine
+    assert [s for _, s in cosine_similarities(fake_vectorstore([]), scored(0.8, 1.2))] == [0.6, 0.4]
+    assert [s for _, s in cosine_similarities(fake_vectorstore([], "cosine"), scored(0.4))] == [0.6]
+
+
+def test_adaptive_retriever(monkeypatch) -> None:
+    # Similarities 0.6, 0.58, 0.56, 0.3, 0.28 (squared L2 distances on unit vectors)
+    vectorstore = fake_vectorstore([0.8, 0.84, 0.88, 1.4, 1.44])
+    monkeypatch.setattr(ingestion, "get_vectorstore", lambda: vectorstore)
+    retriever = PersistedCollectionRetriever(mode="adaptive", min_k=1, max_k=5, relative_cutoff=0.8, gap=0.08)
+
+    assert contents(retriever.invoke("What is agent memory?")) == ["chunk 0", "chunk 1", "chunk 2"]
+    vectorstore.asimilarity_search_with_score = lambda query, k: asyncio.sleep(0, vectorstore.similarity_search_with_score(query, k))
+    assert contents(asyncio.run(retriever.ainvoke("What is agent memory?"))) == ["chunk 0", "chunk 1", "chunk 2"]
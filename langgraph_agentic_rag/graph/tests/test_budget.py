@@ -0,0 +1,101 @@
+"""
+Tests of the budget of a run of rag_app: every limit stops the retries and the run ends with the best graded generation
+(no API calls, every chain is replaced by a fake).
+Run from the langgraph_agentic_rag directory: pytest -s -v graph/tests
+"""
+import asyncio
+import itertools
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import RunnableLambda
+
+import graph.graph as rag_graph
+from graph.chains.answer_grader import AnswerGrader
+from graph.chains.hallucination_grader import HallucinationGrader
+
+QUESTION = "What is agent memory?"
+TOKENS_PER_GENERATION = 150
+
+
+# Define the fakes of the chains: the n-th generation is "answer n" (150 tokens) and is graded by `grades`,
+# "answer n" -> (grounded, addresses the question), a generation missing from it is grounded but not useful
+@pytest.fixture
+def grades(fake_chains):
+    grades = {}
+
+    def grade_hallucination(inputs):
+        return HallucinationGrader(binary_score=grades.get(inputs["generation"], (True, False))[0])
+
+    def grade_answer(inputs):
+        return AnswerGrader(binary_score=grades.get(inputs["generation"], (True, False))[1])
+
+    generations = GenericFakeChatModel(
+        messages=(
+            AIMessage(
+                content=f"answer {n}",
+                usage_metadata={"input_tokens": 100, "output_tokens": 50, "total_tokens": TOKENS_PER_GENERATION},
+                response_metadata={"model_name": "fake-model"},
+            )
+            for n in itertools.count(1)
+        )
+    )
+    fake_chains.set("generation", RunnableLambda(lambda inputs: inputs["question"]) | generations | StrOutputParser())
+    fake_chains.set("hallucination_grader", grade_hallucination)
+    fake_chains.set("answer_grader", grade_answer)
+    return grades
+
+
+# Define the runs of the graph, every test runs on both the sync and the async path
+@pytest.fixture(params=["invoke", "ainvoke"])
+def run(request):
+    rag_app = rag_graph.get_rag_app(None)
+
+    def run(budget):
+        inputs = {"question": QUESTION, "budget": budget}
+        if request.param == "ainvoke":
+            return asyncio.run(rag_app.ainvoke(inputs))
+        return rag_app.invoke(inputs)
+
+    return run
+
+
+def test_useful_generation_ends_the_run(grades, run) -> None:
+    grades["answer 2"] = (True, True)
+    result = run({"max_generations": 3})
+    assert (result["generation"], result["generation_grade"], result["generations"]) == ("answer 2", "Useful", 2)
+    assert result["budget_exhausted"] == ""
+
+
+def test_max_generations_returns_the_best_generation(grades, run) -> None:
+    # "answer 1" is grounded but does not address the question, "answer 2" is not grounded
+    grades["answer 2"] = (False, False)
+    result = run({"max_generations": 2})
+    assert result["budget_exhausted"] == "max_generations (2) reached"
+    assert (result["generation"], result["generation_grade"], result["generations"]) == ("answer 1", "Not useful", 2)
+    assert result["web_searches"] == 0
+
+
+def test_max_web_searches(grades, run) -> None:
+    grades.update({"answer 1": (False, False), "answer 2": (False, False)})
+    result = run({"max_generations": 5, "max_web_searches": 1})
+    assert result["budget_exhausted"] == "max_web_searches (1) reached"
+    assert (result["generations"], result["web_searches"]) == (2, 1)
+    assert (result["generation"], result["generation_grade"]) == ("answer 1", "Not supported")
+
+
+def test_deadline(grades, run) -> None:
+    result = run({"max_generations": 5, "deadline_seconds": 0})
+    assert result["budget_exhausted"] == "deadline (0s) passed"
+    assert (result["generation"], result["generation_grade"], result["generations"]) == ("answer 1", "Not useful", 1)
+
+
+def test_max_tokens(grades, run) -> None:
+    # The second generation goes over the token budget, the better graded first one is returned
+    grades["answer 2"] = (False, False)
+    result = run({"max_generations": 5, "max_tokens": 2 * TOKENS_PER_GENERATION})
+    assert result["budget_exhausted"] == f"max_tokens ({2 * TOKENS_PER_GENERATION}) reached"
+    assert result["tokens_used"] == 2 * TOKENS_PER_GENERATION
+    assert (result["generation"], result["generation_grade"], result["generations"]) == ("answer 1", "Not useful", 2)
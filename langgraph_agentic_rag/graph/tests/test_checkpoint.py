@@ -0,0 +1,146 @@
+"""
+Tests of the SQLite checkpointing of rag_app (no API calls, every chain is replaced by a fake).
+Run from the langgraph_agentic_rag directory: pytest -s -v graph/tests
+"""
+import asyncio
+import enum
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from langchain.schema import Document
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.types import Interrupt
+
+import graph.graph as rag_graph
+from graph.chains.retrieval_grader import GradeDocuments
+from graph.checkpoint import CompactDocumentSerializer, run_config
+from graph.state import RemoveDocuments, ReplaceDocuments
+
+QUESTION = {"question": "What is agent memory?"}
+
+
+def docs(*contents):
+    return [Document(page_content=content, metadata={"source": "https://lilianweng.github.io/posts/2023-06-23-agent/"}) for content in contents]
+
+
+def test_compact_serializer_round_trip() -> None:
+    serde = CompactDocumentSerializer()
+    state = {
+        "question": "What is agent memory?",
+        "documents": docs("agent memory 1", "agent memory 2") + [Document(page_content="web result", id="doc-1")],
+        "budget": {"max_generations": 3, "deadline_seconds": 60.0},
+        "generations": 2,
+    }
+    assert serde.loads_typed(serde.dumps_typed(state)) == state
+    # The explicit documents updates keep their type (the default serializer turns them into plain lists)
+    assert type(serde.loads_typed(serde.dumps_typed(ReplaceDocuments(docs("a"))))) is ReplaceDocuments
+    assert type(serde.loads_typed(serde.dumps_typed(RemoveDocuments(docs("a"))))) is RemoveDocuments
+    # Smaller than the default serializer, which stores the module, class and field names of every document
+    assert len(serde.dumps_typed(state)[1]) < len(JsonPlusSerializer().dumps_typed(state)[1]) / 2
+
+
+def test_compact_serializer_falls_back_to_jsonplus() -> None:
+    serde = CompactDocumentSerializer()
+    value = {"grade": GradeDocuments(binary_score="yes")}
+    type_, data = serde.dumps_typed(value)
+    assert type_ == "msgpack"
+    assert serde.loads_typed((type_, data)) == value
+
+
+class Datasource(enum.Enum):
+    VECTORSTORE = "vectorstore"
+
+
+def test_compact_serializer_keeps_tuples() -> None:
+    serde = CompactDocumentSerializer()
+    for value in [(1, 2), {"pair": ("question", 1), "documents": docs("a")}, ((1, 2), [3, (4,)])]:
+        type_, data = serde.dumps_typed(value)
+        assert type_ == "rag_msgpack"
+        assert serde.loads_typed((type_, data)) == value
+    assert type(serde.loads_typed(serde.dumps_typed((1, 2)))) is tuple
+    assert type(serde.loads_typed(serde.dumps_typed({"pair": ("question", 1)}))["pair"]) is tuple
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        Interrupt(value={"question": "What is agent memory?"}, id="interrupt-1"),
+        [Interrupt(value="approve?", id="interrupt-2")],
+        datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc),
+        Datasource.VECTORSTORE,
+        uuid.UUID("12345678-1234-5678-1234-567812345678"),
+    ],
+)
+def test_compact_serializer_falls_back_for_types_msgpack_would_lose(value) -> None:
+    # Encoded natively, these would come back as dicts, strings or plain values
+    serde = CompactDocumentSerializer()
+    type_, data = serde.dumps_typed(value)
+    assert type_ != "rag_msgpack"
+    restored = serde.loads_typed((type_, data))
+    assert restored == value
+    assert type(restored) is type(value)
+
+
+# Define the fakes of the chains, the generation fails on its first call (the run is interrupted at the generate node)
+@pytest.fixture
+def calls(fake_chains):
+    def generate(_):
+        if fake_chains.calls["generation"] == 1:
+            raise ConnectionError("LLM provider unavailable")
+        return "Agent memory is short-term and long-term memory."
+
+    fake_chains.set("retriever", lambda _: docs("agent memory 1", "agent memory 2"))
+    fake_chains.set("generation", generate)
+    return fake_chains.calls
+
+
+def assert_resumed_without_repeating_calls(calls, result) -> None:
+    assert result["generation"] == "Agent memory is short-term and long-term memory."
+    assert result["generations"] == 1
+    assert [document.page_content for document in result["documents"]] == ["agent memory 1", "agent memory 2"]
+    # The router, the retriever and the grader ran before the failure only, the generation is the only call made twice
+    assert calls == {
+        "router": 1,
+        "retriever": 1,
+        "retrieval_grader": 2,
+        "generation": 2,
+        "hallucination_grader": 1,
+        "answer_grader": 1,
+    }
+
+
+def test_failed_run_resumes_from_last_completed_node(calls, tmp_path) -> None:
+    checkpoint_path = str(tmp_path / "checkpoints.sqlite")
+    config = run_config("run-1")
+
+    with pytest.raises(ConnectionError):
+        rag_graph.get_rag_app(checkpoint_path).invoke(QUESTION, config)
+
+    # A new app on the same file, as after a restart of the process
+    rag_graph.get_rag_app.cache_clear()
+    result = rag_graph.resume_rag_run("run-1", checkpoint_path)
+    assert_resumed_without_repeating_calls(calls, result)
+
+    # Resuming a finished run returns its state without calling anything
+    assert rag_graph.resume_rag_run("run-1", checkpoint_path)["generation"] == result["generation"]
+    assert calls["generation"] == 2
+    rag_graph.get_rag_app.cache_clear()
+
+
+def test_failed_async_run_resumes_from_last_completed_node(calls, tmp_path) -> None:
+    checkpoint_path = str(tmp_path / "checkpoints.sqlite")
+
+    async def run():
+        with pytest.raises(ConnectionError):
+            await rag_graph.get_rag_app(checkpoint_path).ainvoke(QUESTION, run_config("run-1"))
+        return await rag_graph.aresume_rag_run("run-1", checkpoint_path)
+
+    assert_resumed_without_repeating_calls(calls, asyncio.run(run()))
+    rag_graph.get_rag_app.cache_clear()
+
+
+def test_resume_unknown_run(tmp_path) -> None:
+    with pytest.raises(ValueError):
+        rag_graph.resume_rag_run("missing", str(tmp_path / "checkpoints.sqlite"))
+    rag_graph.get_rag_app.cache_clear()
@@ -0,0 +1,109 @@
+"""
+Tests of the node and LLM call instrumentation (graph_metrics, at the repository root) on rag_app, with fake chains.
+Run from the langgraph_agentic_rag directory: pytest -s -v graph/tests
+"""
+import json
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+
+from typing import Any, List, Optional
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+
+import graph.graph as rag_graph
+from graph.chains.answer_grader import AnswerGrader
+from graph_metrics import GraphMetrics, graph_metrics_var
+
+
+# Define the fake model of the generation chain, with the usage metadata of a real provider
+class UsageChatModel(BaseChatModel):
+    failures: int = 0  # number of calls failing before the first answer
+
+    @property
+    def _llm_type(self) -> str:
+        return "usage-chat-model"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("LLM provider unavailable")
+        message = AIMessage(
+            content="Agent memory is short-term and long-term memory.",
+            usage_metadata={"input_tokens": 120, "output_tokens": 12, "total_tokens": 132},
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+@pytest.fixture
+def metrics(tmp_path):
+    metrics = GraphMetrics(path=str(tmp_path / "metrics.jsonl"))
+    token = graph_metrics_var.set(metrics.handler)
+    yield metrics
+    graph_metrics_var.reset(token)
+
+
+def test_nodes_and_llm_calls_are_recorded(metrics, fake_chains) -> None:
+    # The first generation is graded "not useful", so the generate node runs twice
+    useful = iter([False, True])
+    fake_chains.set("generation", RunnableLambda(lambda x: x["question"]) | UsageChatModel() | StrOutputParser())
+    fake_chains.set("answer_grader", lambda _: AnswerGrader(binary_score=next(useful)))
+
+    rag_graph.get_rag_app().invoke({"question": "What is agent memory?"})
+    metrics.flush()
+
+    with open(metrics.path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    nodes = [(record["node"], record["retries"]) for record in records if record["kind"] == "node"]
+    assert nodes == [
+        ("start_run_node", 0),
+        ("retrieve_node", 0),
+        ("grade_documents_node", 0),
+        ("generate_node", 0),
+        ("grade_generation_node", 0),
+        ("generate_node", 1),
+        ("grade_generation_node", 1),
+    ]
+    assert all(record["graph"] == "rag_app" and record["wall_seconds"] >= 0 and record["queue_seconds"] >= 0 for record in records)
+
+    # The LLM calls are attributed to their node, the node adds up their tokens
+    llm_calls = [record for record in records if record["kind"] == "llm"]
+    assert [(record["node"], record["prompt_tokens"], record["completion_tokens"]) for record in llm_calls] == [("generate_node", 120, 12)] * 2
+    generate = [record for record in records if record["kind"] == "node" and record["node"] == "generate_node"]
+    assert [record["prompt_tokens"] for record in generate] == [120, 120]
+
+    text = metrics.prometheus_text()
+    assert 'langgraph_node_duration_seconds_count{graph="rag_app",node="generate_node"} 2' in text
+    assert 'langgraph_node_retries_total{graph="rag_app",node="generate_node"} 1' in text
+    assert 'langgraph_llm_prompt_tokens_total{graph="rag_app",node="generate_node",model="UsageChatModel"} 240' in text
+    assert "generate_node" in metrics.report()
+
+
+def test_failed_node_is_recorded(metrics, fake_chains) -> None:
+    def fail(_):
+        raise ConnectionError("vector store unavailable")
+
+    fake_chains.set("retriever", fail)
+    with pytest.raises(ConnectionError):
+        rag_graph.get_rag_app().invoke({"question": "What is agent memory?"})
+
+    assert metrics.aggregates[("node", "rag_app", "retrieve_node", "retrieve_node")].errors == 1
+    # The handler keeps no run open once the graph is done
+    assert not (metrics.handler.runs or metrics.handler.nodes or metrics.handler.tasks or metrics.handler.chains or metrics.handler.llms)
+
+
+def test_llm_retries_are_recorded(metrics, fake_chains) -> None:
+    model = UsageChatModel(failures=2).with_retry(stop_after_attempt=3, wait_exponential_jitter=False)
+    fake_chains.set("generation", RunnableLambda(lambda x: x["question"]) | model | StrOutputParser())
+
+    rag_graph.get_rag_app().invoke({"question": "What is agent memory?"})
+
+    llm_calls = metrics.aggregates[("llm", "rag_app", "generate_node", "UsageChatModel")]
+    assert (llm_calls.count, llm_calls.errors, llm_calls.retries) == (3, 2, 0 + 1 + 2)
+    assert metrics.aggregates[("node", "rag_app", "generate_node", "generate_node")].retries == 2
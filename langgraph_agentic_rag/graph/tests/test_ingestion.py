@@ -0,0 +1,63 @@
+"""
+Tests of the build step of the collection (no network nor API calls: the pages, the splitter and the embeddings are
+replaced by fakes, the collection is a real Chroma one in a temporary directory).
+Run from the langgraph_agentic_rag directory: pytest -s -v graph/tests
+"""
+import os
+
+import pytest
+from langchain.schema import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+import ingestion
+import web_loader
+
+
+@pytest.fixture
+def build_env(monkeypatch, tmp_path):
+    chroma_path = str(tmp_path / "chroma")
+    monkeypatch.setattr(ingestion, "CHROMA_PATH", chroma_path)
+    monkeypatch.setattr(ingestion, "MANIFEST_PATH", os.path.join(chroma_path, "ingestion_manifest.json"))
+    monkeypatch.setattr(ingestion, "HTML_CACHE_PATH", str(tmp_path / "html_cache.sqlite"))
+    monkeypatch.setattr(ingestion, "build_router_centroids", lambda vectorstore: None)
+    monkeypatch.setattr(ingestion, "get_embeddings", lambda: DeterministicFakeEmbedding(size=8))
+    monkeypatch.setattr(ingestion, "get_text_splitter", lambda: RecursiveCharacterTextSplitter(chunk_size=40, chunk_overlap=0))
+    pages = [
+        Document(page_content=f"Post {i} about agents, memory and planning. " * 3, metadata={"source": url})
+        for i, url in enumerate(ingestion.urls)
+    ]
+    monkeypatch.setattr(web_loader, "load_urls", lambda urls, **kwargs: pages)
+    ingestion.get_vectorstore.cache_clear()
+    yield
+    ingestion.get_vectorstore.cache_clear()
+
+
+def test_interrupted_rebuild_is_redone(build_env, monkeypatch) -> None:
+    from langchain_chroma import Chroma
+
+    assert ingestion.build_index() is True
+    assert ingestion.build_index() is False
+    assert ingestion.get_vectorstore()._collection.count() > 0
+
+    # A forced rebuild killed while embedding, after the old collection was deleted
+    def interrupted(*args, **kwargs):
+        raise KeyboardInterrupt
+
+    with monkeypatch.context() as patch:
+        patch.setattr(Chroma, "from_documents", interrupted)
+        with pytest.raises(KeyboardInterrupt):
+            ingestion.build_index(force=True)
+
+    # The sources did not change, but nothing is served until the build is redone, and the next run redoes it
+    assert not os.path.exists(ingestion.MANIFEST_PATH)
+    with pytest.raises(RuntimeError):
+        ingestion.get_vectorstore()
+    assert ingestion.build_index() is True
+    assert ingestion.get_vectorstore()._collection.count() > 0
+
+
+def test_missing_collection_is_not_created(build_env) -> None:
+    with pytest.raises(RuntimeError):
+        ingestion.get_vectorstore()
+    assert not os.path.exists(ingestion.CHROMA_PATH)
@@ -0,0 +1,141 @@
+"""
+Tests of the shared web search cache (search_cache, at the repository root): TTL, LRU eviction, SQLite backend and the
+cached Tavily tool (no API calls, the Tavily search is replaced by a fake).
+Run from the langgraph_agentic_rag directory: pytest -s -v graph/tests
+"""
+import asyncio
+import os
+import sys
+
+os.environ.setdefault("TAVILY_API_KEY", "tvly-test")
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+
+import pytest
+from langchain_tavily import TavilySearch
+
+import search_cache as search_cache_module
+from search_cache import CachedTavilySearch, SearchCache, cache_key
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(search_cache_module.time, "time", lambda: now[0])
+    return now
+
+
+def test_entries_expire_after_ttl(clock) -> None:
+    cache = SearchCache(ttl_seconds=60, max_entries=10, path=None)
+    cache.put("key", {"results": [1]})
+    clock[0] += 59
+    assert cache.get("key") == {"results": [1]}
+    clock[0] += 2
+    assert cache.get("key") is None
+    assert (cache.stats.hits, cache.stats.misses, cache.stats.expired) == (1, 1, 1)
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entries_are_evicted(clock) -> None:
+    cache = SearchCache(ttl_seconds=60, max_entries=2, path=None)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now the least recently used
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats.evictions == 1
+
+
+def test_hits_return_copies() -> None:
+    cache = SearchCache(ttl_seconds=60, max_entries=2, path=None)
+    cache.put("key", {"results": []})
+    cache.get("key")["results"].append("modified")
+    assert cache.get("key") == {"results": []}
+
+
+def test_sqlite_backend_is_reloaded(clock, tmp_path) -> None:
+    path = str(tmp_path / "search_cache.sqlite")
+    cache = SearchCache(ttl_seconds=60, max_entries=2, path=path)
+    for operation in (lambda: cache.put("a", 1), lambda: cache.put("b", 2), lambda: cache.get("a"), lambda: cache.put("c", 3)):
+        clock[0] += 1
+        operation()  # "b", the least recently used, is dropped from the file as well
+
+    # Another process (or a restart) reads the entries from the file
+    reloaded = SearchCache(ttl_seconds=60, max_entries=2, path=path)
+    assert (reloaded.get("a"), reloaded.get("b"), reloaded.get("c")) == (1, None, 3)
+    clock[0] += 60
+    assert SearchCache(ttl_seconds=60, max_entries=2, path=path).get("a") is None
+
+
+def test_rows_read_from_sqlite_are_evicted_like_puts(clock, tmp_path) -> None:
+    path = str(tmp_path / "search_cache.sqlite")
+    cache = SearchCache(ttl_seconds=60, max_entries=3, path=path)
+    for key in "abc":
+        cache.put(key, key)
+
+    reloaded = SearchCache(ttl_seconds=60, max_entries=2, path=path)
+    assert [reloaded.get(key) for key in "abc"] == ["a", "b", "c"]
+    assert len(reloaded) == 2 and list(reloaded.entries) == ["b", "c"]
+    assert reloaded.stats.evictions == 1
+
+
+def test_sqlite_access_times_are_written_in_batches(clock, tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(search_cache_module, "USED_AT_BATCH_SIZE", 3)
+    path = str(tmp_path / "search_cache.sqlite")
+    cache = SearchCache(ttl_seconds=60, max_entries=3, path=path)
+    for key in "abc":
+        clock[0] += 1
+        cache.put(key, key)
+
+    def used_at(key):
+        return cache.connection.execute("SELECT used_at FROM search_cache WHERE key = ?", (key,)).fetchone()[0]
+
+    # The hits do not write to the file until the batch holds 3 entries (a repeated hit only updates its time)
+    clock[0] += 1
+    changes = cache.connection.total_changes
+    assert [cache.get(key) for key in "aba"] == ["a", "b", "a"]
+    assert cache.connection.total_changes == changes and used_at("a") == 1_000_001
+    assert cache.get("c") == "c"
+    assert [used_at(key) for key in "abc"] == [1_000_004] * 3
+
+    # A put writes the pending access times before dropping the least recently used row ("c", not the hits)
+    clock[0] += 1
+    assert (cache.get("a"), cache.get("b")) == ("a", "b")
+    cache.put("d", "d")
+    assert [row[0] for row in cache.connection.execute("SELECT key FROM search_cache ORDER BY key")] == ["a", "b", "d"]
+
+
+def test_cache_key_normalizes_the_query() -> None:
+    assert cache_key("What is  agent memory? ", {"max_results": 3}) == cache_key("what is agent memory?", {"max_results": 3})
+    assert cache_key("what is agent memory?", {"max_results": 3}) != cache_key("what is agent memory?", {"max_results": 5})
+
+
+@pytest.fixture
+def fake_tavily(monkeypatch):
+    calls = []
+
+    def run(self, query, run_manager=None, **kwargs):
+        calls.append(query)
+        return {"query": query, "results": [{"content": "agent memory"}]}
+
+    async def arun(self, query, run_manager=None, **kwargs):
+        return run(self, query, run_manager, **kwargs)
+
+    monkeypatch.setattr(TavilySearch, "_run", run)
+    monkeypatch.setattr(TavilySearch, "_arun", arun)
+    return calls
+
+
+def test_tool_uses_the_injected_cache(fake_tavily) -> None:
+    shared = search_cache_module.search_cache
+    shared_lookups = shared.stats.hits + shared.stats.misses
+    mine = SearchCache(ttl_seconds=60, max_entries=10, path=None)
+    tool = CachedTavilySearch(max_results=3, cache=mine)
+
+    assert tool.invoke({"query": "What is agent memory?"}) == tool.invoke({"query": "what is agent memory?"})
+    assert asyncio.run(tool.ainvoke({"query": "What is agent memory?"}))["results"] == [{"content": "agent memory"}]
+    assert fake_tavily == ["What is agent memory?"]
+    assert len(mine) == 1
+    assert (mine.stats.hits, mine.stats.misses) == (2, 1)
+    # The shared cache is not used
+    assert shared.stats.hits + shared.stats.misses == shared_lookups
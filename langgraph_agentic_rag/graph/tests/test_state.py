@@ -0,0 +1,72 @@
+"""
+Tests of the documents reducer of GraphState (no API calls, every chain is replaced by a fake).
+Run from the langgraph_agentic_rag directory: pytest -s -v graph/tests
+"""
+from langchain.schema import Document
+
+import graph.graph as rag_graph
+from graph.chains.hallucination_grader import HallucinationGrader
+from graph.chains.retrieval_grader import GradeDocuments
+from graph.chains.router import RouterQuery
+from graph.state import RemoveDocuments, ReplaceDocuments, merge_documents
+
+
+def docs(*contents):
+    return [Document(page_content=content) for content in contents]
+
+
+def contents(documents):
+    return [document.page_content for document in documents]
+
+
+def test_merge_documents_appends_only_new_content() -> None:
+    merged = merge_documents(docs("a", "b"), docs("b", "c", "c"))
+    assert contents(merged) == ["a", "b", "c"]
+
+
+def test_merge_documents_replace_and_remove() -> None:
+    current = docs("a", "b", "c")
+    assert contents(merge_documents(current, ReplaceDocuments(docs("b", "b")))) == ["b"]
+    assert contents(merge_documents(current, RemoveDocuments(docs("a", "x")))) == ["b", "c"]
+    assert contents(merge_documents(current, ReplaceDocuments())) == []
+    assert contents(current) == ["a", "b", "c"]  # the state list is never modified
+
+
+def test_documents_stay_bounded_across_retries(fake_chains) -> None:
+    # Every generation is graded "not grounded", so the run loops web search -> generate until the budget stops it
+    retrieved = docs("agent memory 1", "agent memory 2", "agent memory 3", "pizza recipe")
+    context_sizes = []
+
+    def generate(generation_input):
+        context_sizes.append(len(generation_input["context"]))
+        return "Agent memory is ..."
+
+    fake_chains.set("retriever", lambda _: retrieved)
+    fake_chains.set(
+        "retrieval_grader",
+        lambda grader_input: GradeDocuments(binary_score="no" if "pizza" in grader_input["document"] else "yes"),
+    )
+    fake_chains.set("generation", generate)
+    fake_chains.set("hallucination_grader", lambda _: HallucinationGrader(binary_score=False))
+
+    result = rag_graph.get_rag_app().invoke(
+        {"question": "What is agent memory?", "budget": {"max_generations": 6, "max_web_searches": 6}},
+        {"recursion_limit": 100},
+    )
+
+    assert result["generations"] == 6
+    assert result["web_searches"] == 6
+    # The irrelevant document is dropped by the grader, the web result is added once however many times it comes back
+    assert contents(result["documents"]) == ["agent memory 1", "agent memory 2", "agent memory 3", "web result"]
+    assert context_sizes == [4] * 6
+
+
+def test_web_search_route_does_not_retrieve(fake_chains) -> None:
+    # Only the router picks the node after the start of the run, the vectorstore documents never reach the state
+    fake_chains.set("router", lambda _: RouterQuery(datasource="websearch"))
+
+    result = rag_graph.get_rag_app().invoke({"question": "What is the weather in Paris?"})
+
+    assert fake_chains.calls["retriever"] == 0
+    assert contents(result["documents"]) == ["web result"]
+    assert result["generation"] == "Agent memory is ..."
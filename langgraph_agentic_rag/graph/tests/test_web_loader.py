@@ -0,0 +1,133 @@
+"""
+Tests of the concurrent, cached web loading of the build step, against a local HTTP stand-in of the blog (no network).
+Run from the langgraph_agentic_rag directory: pytest -s -v graph/tests
+"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+from langchain_community.document_loaders import WebBaseLoader
+
+from web_loader import HtmlCache, load_urls, parse_page
+
+PAGE = """<html lang="en"><head><title>Post {number}</title><meta name="description" content="About post {number}"></head>
+<body><h1>Post {number}</h1><p>LLM powered autonomous agents, version {version}. Café, naïve, déjà vu.</p></body></html>"""
+
+
+# Define the stand-in blog: every page answers after a delay, with an ETag, and 304 to a matching If-None-Match
+class BlogHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        time.sleep(server.delay)
+        with server.lock:
+            server.in_flight -= 1
+
+        if server.failing:
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        number = self.path.strip("/").split("-")[-1]
+        etag = f'"{number}-v{server.version}"'
+        if self.headers.get("If-None-Match") == etag:
+            with server.lock:
+                server.not_modified += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = PAGE.format(number=number, version=server.version).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", f"text/html; charset={server.charset}")
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def blog():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), BlogHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.requests = server.in_flight = server.max_in_flight = server.not_modified = 0
+    server.delay, server.version, server.failing, server.charset = 0.1, 1, False, "utf-8"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.urls = [f"http://127.0.0.1:{server.server_address[1]}/posts/post-{i}" for i in range(12)]
+    yield server
+    server.shutdown()
+
+
+def test_pages_are_loaded_concurrently_in_url_order(blog) -> None:
+    start = time.perf_counter()
+    docs = load_urls(blog.urls, max_workers=4)
+    elapsed = time.perf_counter() - start
+
+    assert [doc.metadata["source"] for doc in docs] == blog.urls
+    assert blog.max_in_flight == 4
+    assert elapsed < 0.6 * len(blog.urls) * blog.delay
+    # Same text and metadata as WebBaseLoader, the manifest of the build does not change
+    assert docs[3] == WebBaseLoader(blog.urls[3]).load()[0]
+
+
+def test_cached_pages_are_revalidated(blog, tmp_path) -> None:
+    cache = HtmlCache(str(tmp_path / "html_cache.sqlite"))
+    first = load_urls(blog.urls, cache=cache)
+    assert cache.downloads == len(blog.urls)
+
+    # Unchanged pages: every request is conditional and answered 304, the stored HTML is reused
+    assert load_urls(blog.urls, cache=cache) == first
+    assert cache.revalidated == blog.not_modified == len(blog.urls)
+
+    # Changed pages are downloaded again
+    blog.version = 2
+    changed = load_urls(blog.urls, cache=cache)
+    assert cache.downloads == 2 * len(blog.urls)
+    assert "version 2" in changed[0].page_content
+
+
+def test_stored_copy_is_used_when_the_fetch_fails(blog, tmp_path) -> None:
+    cache = HtmlCache(str(tmp_path / "html_cache.sqlite"))
+    docs = load_urls(blog.urls[:2], cache=cache)
+
+    blog.failing = True
+    assert load_urls(blog.urls[:2], cache=cache) == docs
+    assert cache.fallbacks == 2
+    # A page never stored cannot be loaded
+    with pytest.raises(requests.HTTPError):
+        load_urls(blog.urls[2:3], cache=cache)
+
+
+def test_pages_are_decoded_like_web_base_loader(blog) -> None:
+    # WebBaseLoader ignores a wrong declared charset (it decodes with the detected encoding), so does load_urls
+    blog.delay, blog.charset = 0, "iso-8859-1"
+    doc = load_urls(blog.urls[:1])[0]
+    assert doc == WebBaseLoader(blog.urls[0]).load()[0]
+    assert "Café, naïve, déjà vu." in doc.page_content
+
+
+def test_metadata_defaults_are_those_of_web_base_loader() -> None:
+    # A description without content and an html tag without lang get the WebBaseLoader placeholders
+    html = '<html><head><title>Post</title><meta name="description"></head><body>Text</body></html>'
+    assert parse_page("https://blog/post", html).metadata == {
+        "source": "https://blog/post",
+        "title": "Post",
+        "description": "No description found.",
+        "language": "No language found.",
+    }
+    # Missing tags are left out
+    assert parse_page("https://blog/post", "<p>Text</p>").metadata == {"source": "https://blog/post"}
@@ -1,13 +1,102 @@
+"""
+Build step and retriever of the agentic RAG vector store.
+
+Build (or refresh) the persisted Chroma collection explicitly, from the repository root:
+python langgraph_agentic_rag/ingestion.py [--force]
+
+The build fetches the urls concurrently (revalidating the HTML cached by the previous build, see web_loader.py),
+hashes their content and compares it with the manifest stored next to the collection: when the url list and the
+content are unchanged nothing is re-embedded, otherwise the collection is rebuilt from scratch (so vectors are never
+duplicated). Importing this module does not touch the network nor import Chroma and the OpenAI client: `retriever`
+opens the persisted collection on its first query.
+"""
+import hashlib
+import json
 import os
+import sys
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Tuple
+
+import numpy as np
 from dotenv import load_dotenv
-from langchain_community.document_loaders import WebBaseLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from langchain_chroma import Chroma
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from graph.config import (
+    RAG_RETRIEVAL_GAP,
+    RAG_RETRIEVAL_K,
+    RAG_RETRIEVAL_MAX_K,
+    RAG_RETRIEVAL_MIN_K,
+    RAG_RETRIEVAL_MODE,
+    RAG_RETRIEVAL_RELATIVE_CUTOFF,
+)
+
+if TYPE_CHECKING:
+    from langchain_chroma import Chroma
+    from langchain_core.embeddings import Embeddings
 
 load_dotenv()
 openai_api_key = os.getenv("OPENAI_API_KEY")
 
+# Define the embedding model and dimension (text-embedding-3-small supports shortened embeddings)
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", "1536"))
+
+# Define the function to create the embedding client on first use (importing langchain_openai is slow)
+@lru_cache(maxsize=1)
+def get_embeddings() -> "Embeddings":
+    from graph.chains.clients import SharedQueryEmbeddings, get_embeddings_client
+    from graph.chains.llm_cache import CachedQueryEmbeddings, llm_cache
+
+    embeddings = get_embeddings_client(EMBEDDING_MODEL, EMBEDDING_DIMENSIONS) # Through the connection pool of the chat models
+    if llm_cache.mode != "off":
+        # Answer the query embeddings from the record / replay cache of the LLM responses (RAG_LLM_CACHE_MODE)
+        embeddings = CachedQueryEmbeddings(embeddings, model=f"{EMBEDDING_MODEL}:{EMBEDDING_DIMENSIONS}")
+    # The embedding router and the retriever embed the question once between them
+    return SharedQueryEmbeddings(embeddings)
+
+# Keep `from ingestion import embeddings` working, the client is still only created when it is first accessed
+def __getattr__(name: str):
+    if name == "embeddings":
+        return get_embeddings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Stored in the collection metadata so that queries can check they use the same embedding configuration
+collection_metadata = {"embedding_model": EMBEDDING_MODEL, "embedding_dimensions": EMBEDDING_DIMENSIONS}
+
+# Define where the collection, the build manifest and the router centroids are persisted
+COLLECTION_NAME = "rag-chroma"
+CHROMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".chroma_db")
+MANIFEST_PATH = os.path.join(CHROMA_PATH, "ingestion_manifest.json")
+ROUTER_CENTROIDS_PATH = os.path.join(CHROMA_PATH, "router_centroids.json")
+
+# Define the chunking parameters (part of the manifest, changing them triggers a rebuild)
+CHUNK_SIZE = 500
+CHUNK_OVERLAP = 100
+
+# Define the fetching of the urls: pages fetched at the same time and the raw HTML cache revalidated on every build
+FETCH_MAX_WORKERS = int(os.getenv("INGESTION_FETCH_WORKERS", "16"))
+FETCH_TIMEOUT = float(os.getenv("INGESTION_FETCH_TIMEOUT", "30"))
+HTML_CACHE_PATH = os.getenv("INGESTION_HTML_CACHE_PATH") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".html_cache.sqlite"
+)
+
+# Define a function to guard against querying a collection built with another embedding configuration
+def check_collection_embeddings(vectorstore: "Chroma") -> None:
+    """
+    Raise if the collection was built with a different embedding model or dimension.
+    Collections created before the metadata was recorded are full 1536-dim text-embedding-3-small ones.
+    """
+    metadata = vectorstore._collection.metadata or {}
+    built_with = (metadata.get("embedding_model", EMBEDDING_MODEL), metadata.get("embedding_dimensions", 1536))
+    if built_with != (EMBEDDING_MODEL, EMBEDDING_DIMENSIONS):
+        raise ValueError(
+            f"Collection 'rag-chroma' was built with {built_with[0]} at {built_with[1]} dimensions "
+            f"but queries use {EMBEDDING_MODEL} at {EMBEDDING_DIMENSIONS} dimensions. "
+            f"Set EMBEDDING_DIMENSIONS={built_with[1]} or rebuild the collection."
+        )
+
 # Define the url data source
 urls = [
     "https://lilianweng.github.io/posts/2023-06-23-agent/",
@@ -15,34 +104,204 @@ urls = [
     "https://lilianweng.github.io/posts/2023-10-25-adv-attack-llm/",
 ]
 
-# Load the documents and store them in a list
-doc_batches = [WebBaseLoader(url).load() for url in urls]
-docs = [doc for doc_batch in doc_batches for doc in doc_batch]
-
-# Equivalent for loop version:
-# docs = []
-# for doc_batch in doc_batches:
-#     for doc in doc_batch:
-#         docs.append(doc)
-
-# Split the documents into chunks
-text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(chunk_size=500, chunk_overlap=100)
-docs_split = text_splitter.split_documents(docs)
-
-# Store the documents in a vector database (run this once)
-vectorstore = Chroma.from_documents(
-    documents=docs_split,
-    collection_name="rag-chroma",
-    embedding=OpenAIEmbeddings(model="text-embedding-3-small", openai_api_key=openai_api_key),
-    persist_directory="langgraph_agentic_rag/.chroma_db",
-)
+# Define the topic of every url, the local question router keeps one embedding centroid per topic
+url_topics = {
+    urls[0]: "agents",
+    urls[1]: "prompt engineering",
+    urls[2]: "adversarial attacks",
+}
+
+# Define a function to compute the topic centroids from the vectors already stored in the collection
+def build_router_centroids(vectorstore: "Chroma", path: str = ROUTER_CENTROIDS_PATH) -> None:
+    """
+    Average the normalized chunk embeddings of every topic (no extra embedding call) and save the
+    normalized centroids next to the collection
+    """
+    stored = vectorstore._collection.get(include=["embeddings", "metadatas"])
+    vectors = np.asarray(stored["embeddings"], dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    sources = np.array([metadata.get("source") for metadata in stored["metadatas"]])
+
+    centroids = {}
+    for url, topic in url_topics.items():
+        centroid = vectors[sources == url].mean(axis=0)
+        centroids[topic] = (centroid / np.linalg.norm(centroid)).tolist()
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({**collection_metadata, "centroids": centroids}, f)
+
+# Define the function to create the text splitter once, all the documents and builds share its tiktoken encoder
+@lru_cache(maxsize=1)
+def get_text_splitter():
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    return RecursiveCharacterTextSplitter.from_tiktoken_encoder(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+
+# Define a function to describe the current sources, compared with the manifest of the last build
+def build_manifest(docs: List[Document]) -> dict:
+    content_hash = hashlib.sha256()
+    for doc in docs:
+        content_hash.update(doc.metadata.get("source", "").encode("utf-8"))
+        content_hash.update(doc.page_content.encode("utf-8"))
+    return {
+        "urls": urls,
+        "content_sha256": content_hash.hexdigest(),
+        "chunk_size": CHUNK_SIZE,
+        "chunk_overlap": CHUNK_OVERLAP,
+        **collection_metadata,
+    }
+
+# Define a function to read the manifest of the last build
+def read_manifest() -> dict:
+    if not os.path.exists(MANIFEST_PATH):
+        return {}
+    with open(MANIFEST_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+# Define the build step (the only place that fetches the urls and embeds the chunks)
+def build_index(force: bool = False) -> bool:
+    """
+    Build the collection if the sources changed since the last build (or if `force`)
+
+    Returns:
+        True if the collection was (re)built, False if it was already up to date
+    """
+    # Only the build step needs the loader
+    from langchain_chroma import Chroma
+
+    from web_loader import HtmlCache, load_urls
+
+    # Load the documents concurrently, in the order of the urls
+    html_cache = HtmlCache(HTML_CACHE_PATH)
+    docs = load_urls(urls, max_workers=FETCH_MAX_WORKERS, cache=html_cache, timeout=FETCH_TIMEOUT)
+    print(html_cache.report())
+
+    # Skip the embedding when the urls and their content are the same as in the last build
+    manifest = build_manifest(docs)
+    if not force and read_manifest() == manifest:
+        print(f"Collection '{COLLECTION_NAME}' is up to date ({manifest['content_sha256'][:12]}), nothing to embed")
+        return False
+
+    # Split the documents into chunks
+    docs_split = get_text_splitter().split_documents(docs)
+
+    # Remove the manifest first: until the new one is written, an interrupted build is redone on the next run (and the
+    # collection is not served) even if the sources still match the old manifest
+    if os.path.exists(MANIFEST_PATH):
+        os.remove(MANIFEST_PATH)
+    get_vectorstore.cache_clear()
+
+    # Start from an empty collection so a rebuild never duplicates the vectors
+    embeddings = get_embeddings()
+    Chroma(collection_name=COLLECTION_NAME, embedding_function=embeddings, persist_directory=CHROMA_PATH).delete_collection()
+    vectorstore = Chroma.from_documents(
+        documents=docs_split,
+        collection_name=COLLECTION_NAME,
+        embedding=embeddings,
+        persist_directory=CHROMA_PATH,
+        collection_metadata=collection_metadata,
+    )
+    build_router_centroids(vectorstore)
+
+    # Write the manifest last, an interrupted build is redone on the next run
+    with open(MANIFEST_PATH, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    get_vectorstore.cache_clear()
+    print(f"Collection '{COLLECTION_NAME}' built with {len(docs_split)} chunks")
+    return True
+
+# Define the function to open the persisted collection (once, on first use)
+@lru_cache(maxsize=1)
+def get_vectorstore() -> "Chroma":
+    from langchain_chroma import Chroma # Importing chromadb takes most of the import time of the app
+
+    # The manifest is written once the collection is complete: without it the collection is missing, empty or partial
+    # (and opening it would create an empty one)
+    if not os.path.exists(MANIFEST_PATH):
+        raise RuntimeError(
+            f"No complete collection built at {CHROMA_PATH}, run the build step first: python langgraph_agentic_rag/ingestion.py"
+        )
+    persisted_vectorstore = Chroma(
+        collection_name=COLLECTION_NAME,
+        embedding_function=get_embeddings(),
+        persist_directory=CHROMA_PATH,
+        collection_metadata=collection_metadata,
+    )
+    check_collection_embeddings(persisted_vectorstore)
+    return persisted_vectorstore
+
+# Define a function to turn the Chroma distances into cosine similarities (higher is more similar)
+def cosine_similarities(vectorstore: "Chroma", results: List[Tuple[Document, float]]) -> List[Tuple[Document, float]]:
+    """
+    The collections are built with the default squared L2 distance, on unit vectors (the OpenAI embeddings are
+    normalized) it is 2 - 2 x cosine. The cosine and inner product spaces store 1 - cosine.
+    """
+    space = (vectorstore._collection.metadata or {}).get("hnsw:space", "l2")
+    scale = 2.0 if space == "l2" else 1.0
+    return [(doc, 1.0 - distance / scale) for doc, distance in results]
+
+# Define a function to cut the search results where their similarity falls off (results sorted by decreasing similarity)
+def adaptive_k(
+    scored_docs: List[Tuple[Document, float]],
+    min_k: int = RAG_RETRIEVAL_MIN_K,
+    max_k: int = RAG_RETRIEVAL_MAX_K,
+    relative_cutoff: float = RAG_RETRIEVAL_RELATIVE_CUTOFF,
+    gap: float = RAG_RETRIEVAL_GAP,
+) -> List[Document]:
+    """
+    Keep the min_k most similar documents, then the next ones up to max_k, stopping at the first document whose
+    similarity is below relative_cutoff x the best similarity or more than gap below the previous document
+
+    Returns:
+        Between min_k and max_k documents (fewer if the search returned fewer), in similarity order
+    """
+    if not scored_docs:
+        return []
+    best = scored_docs[0][1]
+    start = max(min_k, 1)
+    kept = [doc for doc, _ in scored_docs[:start]]
+    for i in range(start, min(max_k, len(scored_docs))):
+        doc, similarity = scored_docs[i]
+        if similarity < relative_cutoff * best or scored_docs[i - 1][1] - similarity > gap:
+            break
+        kept.append(doc)
+    return kept
+
+# Define a retriever that opens the persisted collection on its first query
+class PersistedCollectionRetriever(BaseRetriever):
+    """
+    Similarity search retriever over the persisted collection, nothing is opened at import time.
+    The "fixed" mode returns the k most similar documents, the "adaptive" mode cuts the max_k most similar ones with
+    adaptive_k, so the clearly irrelevant documents never reach the grader.
+    """
+
+    mode: str = RAG_RETRIEVAL_MODE
+    k: int = RAG_RETRIEVAL_K
+    min_k: int = RAG_RETRIEVAL_MIN_K
+    max_k: int = RAG_RETRIEVAL_MAX_K
+    relative_cutoff: float = RAG_RETRIEVAL_RELATIVE_CUTOFF
+    gap: float = RAG_RETRIEVAL_GAP
+
+    def _cut(self, vectorstore: "Chroma", results: List[Tuple[Document, float]]) -> List[Document]:
+        return adaptive_k(cosine_similarities(vectorstore, results), self.min_k, self.max_k, self.relative_cutoff, self.gap)
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        vectorstore = get_vectorstore()
+        if self.mode == "adaptive":
+            return self._cut(vectorstore, vectorstore.similarity_search_with_score(query, k=self.max_k))
+        return vectorstore.as_retriever(search_kwargs={"k": self.k}).invoke(query, config={"callbacks": run_manager.get_child()})
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        vectorstore = get_vectorstore()
+        if self.mode == "adaptive":
+            return self._cut(vectorstore, await vectorstore.asimilarity_search_with_score(query, k=self.max_k))
+        return await vectorstore.as_retriever(search_kwargs={"k": self.k}).ainvoke(
+            query, config={"callbacks": run_manager.get_child()}
+        )
 
-# # Turn the vectorstore into a retriever (to perform similarity search)
-# retriever = vectorstore.as_retriever()
+retriever = PersistedCollectionRetriever()
 
-# We can also use this approach after we already created the vectorstore (because the vectorstore variable is commented)
-retriever = Chroma(
-    collection_name="rag-chroma",
-    embedding_function=OpenAIEmbeddings(model="text-embedding-3-small", openai_api_key=openai_api_key),
-    persist_directory="langgraph_agentic_rag/.chroma_db",
-).as_retriever()
\ No newline at end of file
+if __name__ == "__main__":
+    build_index(force="--force" in sys.argv)
@@ -1,14 +1,68 @@
 import os
+import sys
 from dotenv import load_dotenv
-from graph.graph import rag_app
+from graph.checkpoint import run_config
+from graph.config import RAG_CHECKPOINT_PATH, RAG_ENTRY_MODE
+from graph.graph import draw_rag_graph, get_rag_app, resume_rag_run
+from graph.nodes.speculative_retrieve import speculation_stats
 
 load_dotenv()
 
+# Make the shared modules of the repository root importable (search_cache, graph_metrics)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
 if __name__ == "__main__":
+    # Save the graph to png and exit: python main.py draw
+    if sys.argv[1:] == ["draw"]:
+        draw_rag_graph()
+        sys.exit()
+
+    # Resume a failed or interrupted run from its last completed node (RAG_CHECKPOINT_PATH): python main.py resume <thread_id>
+    if sys.argv[1:2] == ["resume"] and len(sys.argv) == 3:
+        print(resume_rag_run(sys.argv[2]))
+        sys.exit()
+
     print("Hello From Langgraph Agentic RAG Application")
+    rag_app = get_rag_app()
+
+    # Record the latency and the tokens of every node and LLM call (GRAPH_METRICS_PATH / GRAPH_METRICS_PORT to export them)
+    from graph_metrics import enable_graph_metrics
+    metrics = enable_graph_metrics()
+
+    # Checkpoint the runs when RAG_CHECKPOINT_PATH is set, every run gets its own thread id
+    config = {}
+    if RAG_CHECKPOINT_PATH:
+        config = run_config()
+        print(f"checkpointed run, resume it with: python main.py resume {config['configurable']['thread_id']}")
 
     # Experiment 1: Agent memory (inside the knowledge store, from the first url source)
-    print(rag_app.invoke(input={"question": "What is agent memory?"}))
+    result = rag_app.invoke(input={"question": "What is agent memory?"}, config=config)
+    print(result)
+
+    # Report the budget consumption of the run (a run can pass its own limits: {"question": ..., "budget": {"max_generations": 2}})
+    print(
+        f"generations: {result['generations']}/{result['budget']['max_generations']}, "
+        f"web searches: {result['web_searches']}/{result['budget']['max_web_searches']}, "
+        f"tokens: {result['tokens_used']}/{result['budget']['max_tokens']}, "
+        f"elapsed: {result['elapsed_seconds']:.1f}/{result['budget']['deadline_seconds']:g}s"
+        + (f", stopped: {result['budget_exhausted']}" if result["budget_exhausted"] else "")
+    )
+
+    # Report the latency and the tokens per node and LLM call
+    print(metrics.report())
+
+    # Report the web search cache (repeated questions and web search retries are answered from it)
+    from search_cache import search_cache
+    print(search_cache.stats.report())
+
+    # Report the record / replay cache of the LLM responses (RAG_LLM_CACHE_MODE)
+    from graph.chains.llm_cache import llm_cache
+    if llm_cache.mode != "off":
+        print(llm_cache.report())
+
+    # Report how much the speculative retrieval saved (RAG_ENTRY_MODE=speculative)
+    if RAG_ENTRY_MODE == "speculative":
+        print(speculation_stats.report())
 
     # # Experiment 2: Few-show prompting (inside the knowledge store, from the second url source)
     # print(rag_app.invoke(input={"question": "Can you explain the concept of few-shot prompting?"}))
@@ -0,0 +1,172 @@
+"""
+Concurrent, cached loading of the web pages of the agentic RAG corpus (used by the build step of ingestion.py).
+
+The pages are fetched by a bounded pool of threads sharing one HTTP session (its keep-alive connections are reused
+across the pages of the same host), then decoded and parsed like WebBaseLoader: same text and metadata, so the content
+hash of the build manifest does not change. The HTML of every page is kept in a SQLite file with its ETag / Last-Modified
+validators and the document parsed from it. The next build revalidates it with a conditional request, and a 304 answer
+reuses the stored document instead of downloading and parsing the page again (parsing holds the GIL, it is what
+limits the concurrent loading). A page that cannot be fetched falls back to its stored copy, if there is one.
+"""
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, NamedTuple, Optional
+
+import requests
+from bs4 import BeautifulSoup
+from langchain_community.document_loaders.web_base import default_header_template
+from langchain_core.documents import Document
+from requests.adapters import HTTPAdapter
+
+# Define a page stored in the cache
+class CachedPage(NamedTuple):
+    html: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    document: Document
+
+# Define the SQLite cache of the raw HTML
+class HtmlCache:
+    """
+    Raw HTML of the pages with their validators and parsed documents, shared by the fetching threads.
+    The file is only opened on the first lookup.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.downloads = 0
+        self.revalidated = 0
+        self.fallbacks = 0
+        self.lock = threading.Lock()
+        self.connection = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.path, check_same_thread=False)
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS html_cache "
+                "(url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, html TEXT, text TEXT, metadata TEXT, fetched_at REAL)"
+            )
+            self.connection.commit()
+        return self.connection
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        with self.lock:
+            row = self._connect().execute(
+                "SELECT html, etag, last_modified, text, metadata FROM html_cache WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        html, etag, last_modified, text, metadata = row
+        return CachedPage(html, etag, last_modified, Document(page_content=text, metadata=json.loads(metadata)))
+
+    def put(self, url: str, page: CachedPage) -> None:
+        with self.lock:
+            connection = self._connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO html_cache (url, etag, last_modified, html, text, metadata, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    url,
+                    page.etag,
+                    page.last_modified,
+                    page.html,
+                    page.document.page_content,
+                    json.dumps(page.document.metadata),
+                    time.time(),
+                ),
+            )
+            connection.commit()
+
+    def count(self, outcome: str) -> None:
+        with self.lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def report(self) -> str:
+        return f"html cache: {self.downloads} downloaded, {self.revalidated} not modified, {self.fallbacks} stale copies"
+
+# Define the function to create the HTTP session shared by the fetching threads
+def create_session(max_workers: int) -> requests.Session:
+    session = requests.Session()
+    session.headers.update(default_header_template)
+    # One keep-alive connection per thread and host
+    adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+# Define the function to read the metadata of a page, the same keys and defaults as WebBaseLoader
+def build_metadata(soup: BeautifulSoup, url: str) -> dict:
+    metadata = {"source": url}
+    if title := soup.find("title"):
+        metadata["title"] = title.get_text()
+    if description := soup.find("meta", attrs={"name": "description"}):
+        metadata["description"] = description.get("content", "No description found.")
+    if html := soup.find("html"):
+        metadata["language"] = html.get("lang", "No language found.")
+    return metadata
+
+# Define the function to parse a page into a document, with the text and metadata of WebBaseLoader
+def parse_page(url: str, html: str) -> Document:
+    soup = BeautifulSoup(html, "html.parser")
+    return Document(page_content=soup.get_text(), metadata=build_metadata(soup, url))
+
+# Define the function to load a page, revalidating the cached copy
+def load_url(session: requests.Session, url: str, cache: Optional[HtmlCache] = None, timeout: float = 30) -> Document:
+    cached = cache.get(url) if cache is not None else None
+    headers = {}
+    if cached is not None and cached.etag:
+        headers["If-None-Match"] = cached.etag
+    if cached is not None and cached.last_modified:
+        headers["If-Modified-Since"] = cached.last_modified
+
+    try:
+        response = session.get(url, headers=headers, timeout=timeout)
+        if response.status_code == 304 and cached is not None:
+            cache.count("revalidated")
+            return cached.document
+        response.raise_for_status()
+    except requests.RequestException:
+        if cached is None:
+            raise
+        print(f"---FETCH FAILED, USING THE CACHED COPY OF {url}---")
+        cache.count("fallbacks")
+        return cached.document
+
+    # Decode like WebBaseLoader: always with the detected encoding, even when the server declares a charset
+    response.encoding = response.apparent_encoding
+    html = response.text
+    document = parse_page(url, html)
+    if cache is not None:
+        cache.count("downloads")
+        cache.put(url, CachedPage(html, response.headers.get("ETag"), response.headers.get("Last-Modified"), document))
+    return document
+
+# Define the function to load the pages concurrently
+def load_urls(
+    urls: List[str],
+    max_workers: int = 8,
+    cache: Optional[HtmlCache] = None,
+    session: Optional[requests.Session] = None,
+    timeout: float = 30,
+) -> List[Document]:
+    """
+    Fetch and parse the pages with at most `max_workers` requests in flight
+
+    Args:
+        urls: The pages to load
+        max_workers: Maximum number of pages fetched at the same time
+        cache: The raw HTML cache (None to always download the pages)
+        session: The HTTP session (one sized for max_workers by default)
+        timeout: Timeout of a request in seconds
+
+    Returns:
+        One document per url, in the order of the urls
+    """
+    session = session or create_session(max_workers)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda url: load_url(session, url, cache, timeout), urls))
@@ -8,10 +8,15 @@ from langchain.schema import SystemMessage, HumanMessage
 from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph import StateGraph, START, MessagesState
 import os
+import sys
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Make the shared modules of the repository root importable (graph_metrics)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from graph_metrics import enable_graph_metrics
+
 # Initialize the LLM
 llm = ChatOpenAI(model="gpt-4.1", api_key=os.getenv("OPENAI_API_KEY"), temperature=0)
 
@@ -42,10 +47,12 @@ builder.add_edge(START, "chat")
 memory = MemorySaver()
 
 # Compile the graph
-chat_app = builder.compile(checkpointer=memory)
+chat_app = builder.compile(checkpointer=memory, name="ephemeral_memory_chat")
 
 # Run the chat
 if __name__ == "__main__":
+    # Record the latency and the tokens of every chat turn (GRAPH_METRICS_PATH / GRAPH_METRICS_PORT to export them)
+    metrics = enable_graph_metrics()
     thread_id = 1
 
     #  Create a loop for the chat
@@ -72,4 +79,7 @@ if __name__ == "__main__":
 
         # Quit the chat
         if user_input.lower() == "quit":
-            break
\ No newline at end of file
+            break
+
+    # Report the latency and the tokens of the chat turns
+    print(metrics.report())
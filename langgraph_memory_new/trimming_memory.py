@@ -9,10 +9,15 @@ from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph import StateGraph, START, MessagesState
 from langchain_core.messages import trim_messages
 import os
+import sys
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Make the shared modules of the repository root importable (graph_metrics)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from graph_metrics import enable_graph_metrics
+
 # Initialize the LLM
 llm = ChatOpenAI(model="gpt-4.1", api_key=os.getenv("OPENAI_API_KEY"), temperature=0)
 
@@ -44,10 +49,12 @@ builder.add_edge(START, "chat")
 
 # Compile graph with MemorySaver
 memory = MemorySaver()
-chat_app = builder.compile(checkpointer=memory)
+chat_app = builder.compile(checkpointer=memory, name="trimming_memory_chat")
 
 # Run the chat
 if __name__ == "__main__":
+    # Record the latency and the tokens of every chat turn (GRAPH_METRICS_PATH / GRAPH_METRICS_PORT to export them)
+    metrics = enable_graph_metrics()
     thread_id = 1
 
     # Create a loop for the chat
@@ -74,4 +81,5 @@ if __name__ == "__main__":
         if user_input.lower() == "quit":
             break
 
-    
+    # Report the latency and the tokens of the chat turns
+    print(metrics.report())
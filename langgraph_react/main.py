@@ -1,11 +1,17 @@
 import os
+import sys
+from functools import lru_cache
 from dotenv import load_dotenv
 from langgraph.graph import MessagesState, StateGraph, START, END
-from nodes import run_agent_reasoning, tool_node
+from langgraph.graph.state import CompiledStateGraph
+from nodes import run_agent_reasoning, build_tool_node
 from langchain_core.messages import HumanMessage
 
 load_dotenv("../.env")
 
+# Make the shared modules of the repository root importable (graph_metrics)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
 # Define the nodes names
 AGENT_REASON = "agent_reason"
 ACT = "act"
@@ -21,31 +27,48 @@ def should_continue(state: MessagesState) -> str:
     return ACT
 
 # Create a graph with edges
-graph = StateGraph(MessagesState)
-graph.add_node(AGENT_REASON, run_agent_reasoning)
-graph.add_node(ACT, tool_node)
+def build_graph() -> StateGraph:
+    graph = StateGraph(MessagesState)
+    graph.add_node(AGENT_REASON, run_agent_reasoning)
+    graph.add_node(ACT, build_tool_node())
+
+    # Set up the entry point using START
+    graph.add_edge(START, AGENT_REASON)
+
+    # Set up the conditional edges
+    graph.add_conditional_edges(AGENT_REASON, should_continue, {
+        END: END,
+        ACT: ACT
+    })
 
-# Set up the entry point using START
-graph.add_edge(START, AGENT_REASON)
+    # Set up the edge from the act node to the agent reasoning node
+    graph.add_edge(ACT, AGENT_REASON)
 
-# Set up the conditional edges
-graph.add_conditional_edges(AGENT_REASON, should_continue, {
-    END: END,
-    ACT: ACT
-})
+    return graph
 
-# Set up the edge from the act node to the agent reasoning node
-graph.add_edge(ACT, AGENT_REASON)
+# Compile the graph on first use
+@lru_cache(maxsize=1)
+def get_app() -> CompiledStateGraph:
+    return build_graph().compile(name="react_agent")
 
-# Compile the graph and draw it
-app = graph.compile()
-app.get_graph().draw_mermaid_png(output_file_path="langgraph_react/react_graph.png")
+# Draw the graph (renders through the mermaid.ink api, so only on request: python main.py draw)
+def draw_graph(output_file_path: str = "langgraph_react/react_graph.png") -> None:
+    get_app().get_graph().draw_mermaid_png(output_file_path=output_file_path)
 
 if __name__ == "__main__":
+    if sys.argv[1:] == ["draw"]:
+        draw_graph()
+        sys.exit()
+
     print(f"Hello ReAct LangGraph! with Function Calling!")
 
-    result = app.invoke({"messages": [HumanMessage(content="What is the weather in Tokyo? List it and then triple it")]})
+    # Record the latency and the tokens of every node and LLM call (GRAPH_METRICS_PATH / GRAPH_METRICS_PORT to export them)
+    from graph_metrics import enable_graph_metrics
+    metrics = enable_graph_metrics()
+
+    result = get_app().invoke({"messages": [HumanMessage(content="What is the weather in Tokyo? List it and then triple it")]})
     print(result["messages"][LAST].content)
+    print(metrics.report())
 
     # # Optional : Save the result to a file
     # with open("langgraph_react/result.txt", "w") as f:
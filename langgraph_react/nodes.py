@@ -2,7 +2,7 @@ from dotenv import load_dotenv
 from langgraph.graph import MessagesState
 from langgraph.prebuilt import ToolNode
 
-from react import llm, tools
+from react import get_llm, get_tools
 
 load_dotenv("../.env")
 
@@ -20,11 +20,12 @@ def run_agent_reasoning(state: MessagesState) -> MessagesState:
     messages = [{"role": "system", 
                  "content": SYSTEM_MESSAGE}, 
                  *state["messages"]]
-    response = llm.invoke(messages)
+    response = get_llm().invoke(messages)
     return {"messages": [response]}
 
-# Create a node that will run the tool node
-tool_node = ToolNode(tools)
+# Create a node that will run the tool node (built with the graph, the tools are created on first use)
+def build_tool_node() -> ToolNode:
+    return ToolNode(get_tools())
 
 
 
@@ -1,11 +1,14 @@
 import os
+import sys
+from functools import lru_cache
 from dotenv import load_dotenv
 from langchain_core.tools import tool
-from langchain_openai import ChatOpenAI
-from langchain_tavily import TavilySearch
 
 load_dotenv("../.env")
 
+# Make the shared modules of the repository root importable (search_cache)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
 # Define a custom tool
 @tool
 def triple(num: float) -> float:
@@ -20,11 +23,19 @@ def triple(num: float) -> float:
     """
     return num * 3
 
-# Create a list of tools including a TavilySearch tool
-tools = [TavilySearch(max_results=1), triple]
+# Create a list of tools including a TavilySearch tool (created on first use, not at import, repeated searches hit the cache)
+@lru_cache(maxsize=1)
+def get_tools() -> list:
+    from search_cache import CachedTavilySearch
+
+    return [CachedTavilySearch(max_results=1), triple]
+
+# Initialize the LLM (on first use, importing langchain_openai and creating the client is the slowest part of the startup)
+@lru_cache(maxsize=1)
+def get_llm():
+    from langchain_openai import ChatOpenAI
 
-# Initialize the LLM
-llm = ChatOpenAI(model="gpt-4.1", 
-                 temperature=0, 
-                 api_key=os.getenv("OPENAI_API_KEY")
-).bind_tools(tools) # Using this method, we dont need to handle any parsing because the LLM vendors will handle it for us
\ No newline at end of file
+    return ChatOpenAI(model="gpt-4.1", 
+                      temperature=0, 
+                      api_key=os.getenv("OPENAI_API_KEY")
+    ).bind_tools(get_tools()) # Using this method, we dont need to handle any parsing because the LLM vendors will handle it for us
@@ -1,6 +1,6 @@
 import os
+from functools import lru_cache
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_openai import ChatOpenAI
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -31,12 +31,21 @@ generation_prompt = ChatPromptTemplate.from_messages(
     ]
 )   
 
-# Define the LLM
-llm = ChatOpenAI(model="gpt-4.1", api_key=os.getenv("OPENAI_API_KEY"))
+# Define the LLM (created on first use, importing langchain_openai and creating the client is the slowest part of the startup)
+@lru_cache(maxsize=1)
+def get_llm():
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(model="gpt-4.1", api_key=os.getenv("OPENAI_API_KEY"))
 
 # Define the chains for the critique and generation agents
-generate_chain = generation_prompt | llm
-reflect_chain = reflection_prompt | llm
+@lru_cache(maxsize=1)
+def get_generate_chain():
+    return generation_prompt | get_llm()
+
+@lru_cache(maxsize=1)
+def get_reflect_chain():
+    return reflection_prompt | get_llm()
 
 
 
@@ -1,13 +1,19 @@
 import os
+import sys
+from functools import lru_cache
 from typing import List, Sequence
 from dotenv import load_dotenv
 
 from langchain_core.messages import BaseMessage, HumanMessage
 from langgraph.graph import START, END, MessageGraph # MessageGraph is a StateGraph where every node receives a list of messages
-from chains import generate_chain, reflect_chain
+from langgraph.graph.state import CompiledStateGraph
+from chains import get_generate_chain, get_reflect_chain
 
 load_dotenv()
 
+# Make the shared modules of the repository root importable (graph_metrics)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
 # Define the nodes names
 GENERATE = "generate"
 REFLECT = "reflect"
@@ -26,34 +32,50 @@ def should_continue(state: List[BaseMessage]):
 
 # Define what gonna happen in the generation node
 def generation_node(state: Sequence[BaseMessage]):
-    return generate_chain.invoke({"messages": state})
+    return get_generate_chain().invoke({"messages": state})
 
 # Define what gonna happen in the reflection node
 def reflection_node(state: Sequence[BaseMessage]) -> List[BaseMessage]:
-    res = reflect_chain.invoke({"messages": state})
+    res = get_reflect_chain().invoke({"messages": state})
     return [HumanMessage(content=res.content)] # In here we use the HumanMessage cause we want to trick the agent into thinking that the critique is from the user
 
 # Define the graph
-graph = MessageGraph() 
-graph.add_node(GENERATE, generation_node) # Add the generation node to the graph
-graph.add_node(REFLECT, reflection_node) # Add the reflection node to the graph
-graph.add_edge(START, GENERATE) # Set the entry point to the generation node
-
-# Set up the conditional edges
-graph.add_conditional_edges(GENERATE, should_continue, {
-    END: END,
-    REFLECT: REFLECT
-})
-graph.add_edge(REFLECT, GENERATE) # Set up the edge from the reflection node to the generation node
-
-# Compile the graph
-app = graph.compile()
-# print(app.get_graph().draw_mermaid()) # This will print the graph in mermaid format
-app.get_graph().draw_mermaid_png(output_file_path="langgraph_reflection_agent/reflection_graph.png")
+def build_graph() -> MessageGraph:
+    graph = MessageGraph() 
+    graph.add_node(GENERATE, generation_node) # Add the generation node to the graph
+    graph.add_node(REFLECT, reflection_node) # Add the reflection node to the graph
+    graph.add_edge(START, GENERATE) # Set the entry point to the generation node
+
+    # Set up the conditional edges
+    graph.add_conditional_edges(GENERATE, should_continue, {
+        END: END,
+        REFLECT: REFLECT
+    })
+    graph.add_edge(REFLECT, GENERATE) # Set up the edge from the reflection node to the generation node
+
+    return graph
+
+# Compile the graph on first use
+@lru_cache(maxsize=1)
+def get_app() -> CompiledStateGraph:
+    return build_graph().compile(name="reflection_agent")
+
+# Draw the graph (renders through the mermaid.ink api, so only on request: python main.py draw)
+def draw_graph(output_file_path: str = "langgraph_reflection_agent/reflection_graph.png") -> None:
+    # print(get_app().get_graph().draw_mermaid()) # This will print the graph in mermaid format
+    get_app().get_graph().draw_mermaid_png(output_file_path=output_file_path)
 
 if __name__ == "__main__":
+    if sys.argv[1:] == ["draw"]:
+        draw_graph()
+        sys.exit()
+
     print("Hello Langgraph Reflection Agent")
 
+    # Record the latency and the tokens of every node and LLM call (GRAPH_METRICS_PATH / GRAPH_METRICS_PORT to export them)
+    from graph_metrics import enable_graph_metrics
+    metrics = enable_graph_metrics()
+
     inputs = [HumanMessage(content="""Make this tweet better:"
                                     @LangChainAI
             — newly Tool Calling feature is seriously underrated.
@@ -63,5 +85,5 @@ if __name__ == "__main__":
             Made a video covering their newest blog post
 
                                   """)]
-    response = app.invoke(inputs)
-
+    response = get_app().invoke(inputs)
+    print(metrics.report())
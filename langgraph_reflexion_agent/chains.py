@@ -1,5 +1,6 @@
 import os
 import datetime
+from functools import lru_cache
 from dotenv import load_dotenv
 
 from langchain_core.output_parsers.openai_tools import ( # Leverage opeai function calling to structure the output
@@ -8,15 +9,18 @@ from langchain_core.output_parsers.openai_tools import ( # Leverage opeai functi
 )
 from langchain_core.messages import HumanMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_openai import ChatOpenAI
 from langgraph.graph import StateGraph, START, END
 
 from schemas import Reflection, AnswerQuestion, ReviseAnswer
 
 load_dotenv()
 
-# Define the model
-llm = ChatOpenAI(model="gpt-4.1", api_key=os.getenv("OPENAI_API_KEY"))
+# Define the model (created on first use, importing langchain_openai and creating the client is the slowest part of the startup)
+@lru_cache(maxsize=1)
+def get_llm():
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(model="gpt-4.1", api_key=os.getenv("OPENAI_API_KEY"))
 
 # Define the output parser
 json_output_parser = JsonOutputToolsParser(return_id=True)
@@ -43,8 +47,10 @@ Current time: {time}
 first_responder_prompt_template = actor_prompt_template.partial(first_instruction="Provide a detailed ~250 word answer")
 
 # First responder chain
-first_responder_chain = first_responder_prompt_template | llm.bind_tools(
-    [AnswerQuestion], tool_choice="AnswerQuestion") # The tool_choice will force the model to use the AnswerQuestion tool
+@lru_cache(maxsize=1)
+def get_first_responder_chain():
+    return first_responder_prompt_template | get_llm().bind_tools(
+        [AnswerQuestion], tool_choice="AnswerQuestion") # The tool_choice will force the model to use the AnswerQuestion tool
 
 # Add revision instruction to the prompt template (this will be plugged into the {first_instruction} variable)
 revise_instructions = """Revise your previous answer using the new information.
@@ -57,8 +63,10 @@ revise_instructions = """Revise your previous answer using the new information.
 """
 
 # Add revision chain
-revise_chain = actor_prompt_template.partial(first_instruction=revise_instructions) | llm.bind_tools(
-    tools=[ReviseAnswer], tool_choice="ReviseAnswer")
+@lru_cache(maxsize=1)
+def get_revise_chain():
+    return actor_prompt_template.partial(first_instruction=revise_instructions) | get_llm().bind_tools(
+        tools=[ReviseAnswer], tool_choice="ReviseAnswer")
 
 if __name__ == "__main__":
     print("Hello Langgraph Reflexion Agent")
@@ -68,7 +76,7 @@ if __name__ == "__main__":
     
     chain = (
         first_responder_prompt_template
-        | llm.bind_tools(tools=[AnswerQuestion], tool_choice="AnswerQuestion")
+        | get_llm().bind_tools(tools=[AnswerQuestion], tool_choice="AnswerQuestion")
         | pydantic_output_parser
     )
 
@@ -1,14 +1,21 @@
+import os
+import sys
 from dotenv import load_dotenv
+from functools import lru_cache
 from typing import List
 
 from langchain_core.messages import BaseMessage, ToolMessage
 from langgraph.graph import MessageGraph, START, END
+from langgraph.graph.state import CompiledStateGraph
 
-from chains import first_responder_chain, revise_chain
+from chains import get_first_responder_chain, get_revise_chain
 from tool_executor import execute_tools
 
 load_dotenv()
 
+# Make the shared modules of the repository root importable (graph_metrics)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
 # Define parameter and node names   
 MAX_ITERATIONS = 2
 FIRST_RESPONDER = "first_responder"
@@ -22,26 +29,43 @@ def event_loop(state: List[BaseMessage]) -> str:
         return END
     return EXECUTE_TOOLS
 
-# Define the graph
-graph = MessageGraph()
-graph.add_node(FIRST_RESPONDER, first_responder_chain)
-graph.add_node(EXECUTE_TOOLS, execute_tools)
-graph.add_node(REVISE, revise_chain)
+# Define the graph (the chains and their model client are created here, when the graph is first compiled)
+def build_graph() -> MessageGraph:
+    graph = MessageGraph()
+    graph.add_node(FIRST_RESPONDER, get_first_responder_chain())
+    graph.add_node(EXECUTE_TOOLS, execute_tools)
+    graph.add_node(REVISE, get_revise_chain())
+
+    # Set up the edges
+    graph.add_edge(FIRST_RESPONDER, EXECUTE_TOOLS)
+    graph.add_edge(EXECUTE_TOOLS, REVISE)
+    graph.add_conditional_edges(REVISE, event_loop)
+
+    # Set up entry point
+    graph.add_edge(START, FIRST_RESPONDER)
 
-# Set up the edges
-graph.add_edge(FIRST_RESPONDER, EXECUTE_TOOLS)
-graph.add_edge(EXECUTE_TOOLS, REVISE)
-graph.add_conditional_edges(REVISE, event_loop)
+    return graph
 
-# Set up entry point
-graph.add_edge(START, FIRST_RESPONDER)
+# Compile the graph on first use
+@lru_cache(maxsize=1)
+def get_app() -> CompiledStateGraph:
+    return build_graph().compile(name="reflexion_agent")
 
-# Compile the graph
-app = graph.compile()
-app.get_graph().draw_mermaid_png(output_file_path="langgraph_reflexion_agent/reflexion_graph.png")
+# Draw the graph (renders through the mermaid.ink api, so only on request: python main.py draw)
+def draw_graph(output_file_path: str = "langgraph_reflexion_agent/reflexion_graph.png") -> None:
+    get_app().get_graph().draw_mermaid_png(output_file_path=output_file_path)
 
 if __name__ == "__main__":
+    if sys.argv[1:] == ["draw"]:
+        draw_graph()
+        sys.exit()
+
     print("Hello Langgraph Reflexion Agent")
 
-    result = app.invoke("Write about AI-powered SOC / autonomous SOC promblem domain, and list startups that do that and raised capital")
-    print(result)
\ No newline at end of file
+    # Record the latency and the tokens of every node and LLM call (GRAPH_METRICS_PATH / GRAPH_METRICS_PORT to export them)
+    from graph_metrics import enable_graph_metrics
+    metrics = enable_graph_metrics()
+
+    result = get_app().invoke("Write about AI-powered SOC / autonomous SOC promblem domain, and list startups that do that and raised capital")
+    print(result)
+    print(metrics.report())
\ No newline at end of file
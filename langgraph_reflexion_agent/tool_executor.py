@@ -1,5 +1,6 @@
+import os
+import sys
 from dotenv import load_dotenv
-from langchain_tavily import TavilySearch
 from langchain_core.tools import StructuredTool
 from langgraph.prebuilt import ToolNode
 from schemas import AnswerQuestion, ReviseAnswer
@@ -7,10 +8,15 @@ from typing import List
 
 load_dotenv()
 
+# Make the shared modules of the repository root importable (search_cache)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
 # Define the base tavily tool
 def run_queries(search_queries: List[str], **kwargs):
     """Run the generated queries"""
-    tavily_tool = TavilySearch(max_results=3)
+    from search_cache import CachedTavilySearch # Imported on the first search, not when the graph is loaded
+
+    tavily_tool = CachedTavilySearch(max_results=3) # The queries already searched in a previous iteration hit the cache
     results = tavily_tool.batch([{"query": query} for query in search_queries]) # batch is a method that allows us to run concurrently
     return results
 
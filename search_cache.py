@@ -0,0 +1,258 @@
+"""
+Shared web search result cache of the example apps (agentic RAG web search node, ReAct agent, reflexion agent,
+ice breaker, basic function calling).
+
+Results are keyed on the normalized query and the search parameters, expire after a TTL and the least recently
+used entries are evicted above a maximum size. Set SEARCH_CACHE_PATH to also keep them in a SQLite file, shared by
+the processes and kept across restarts. Only successful searches are cached.
+
+Configuration (environment variables):
+    SEARCH_CACHE_TTL_SECONDS: time to live of a result (default 3600)
+    SEARCH_CACHE_MAX_ENTRIES: maximum number of results kept (default 1024)
+    SEARCH_CACHE_PATH: SQLite file of the persistent backend (default unset, in memory only)
+
+The apps import it from the repository root: `from search_cache import CachedTavilySearch, search_cache`.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from dotenv import load_dotenv
+from langchain_tavily import TavilySearch
+from pydantic import Field
+
+load_dotenv()
+
+SEARCH_CACHE_TTL_SECONDS = float(os.getenv("SEARCH_CACHE_TTL_SECONDS", "3600"))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1024"))
+SEARCH_CACHE_PATH = os.getenv("SEARCH_CACHE_PATH") or None
+
+# Number of hits whose access time is kept in memory before it is written to the SQLite file (it is also written with
+# every put, before the least recently used rows are dropped)
+USED_AT_BATCH_SIZE = 64
+
+# Define the function to normalize a query, the same question typed differently hits the same entry
+def normalize_query(query: str) -> str:
+    return re.sub(r"\s+", " ", query).strip().lower()
+
+# Define the function to build the cache key of a search
+def cache_key(query: str, params: Optional[Dict[str, Any]] = None) -> str:
+    payload = json.dumps({"query": normalize_query(query), "params": params or {}}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+# Define the cache statistics (exposed as `search_cache.stats`)
+class SearchCacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "hit_rate": self.hit_rate,
+        }
+
+    def report(self) -> str:
+        return (
+            f"search cache: {self.hits} hits, {self.misses} misses ({self.hit_rate:.0%} hit rate), "
+            f"{self.expired} expired, {self.evictions} evicted"
+        )
+
+# Define the search result cache
+class SearchCache:
+    """
+    TTL + LRU cache of search results in memory, optionally backed by a SQLite file.
+    The values are stored as JSON, every hit returns a fresh copy that the caller can modify.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = SEARCH_CACHE_TTL_SECONDS,
+        max_entries: int = SEARCH_CACHE_MAX_ENTRIES,
+        path: Optional[str] = SEARCH_CACHE_PATH,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.path = path
+        self.stats = SearchCacheStats()
+        self.lock = threading.Lock()
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, json value), oldest use first
+        self.pending_used_at: Dict[str, float] = {}  # key -> access time of the hits not written to the file yet
+        self.connection = None
+        if path:
+            self.connection = sqlite3.connect(path, check_same_thread=False)
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS search_cache (key TEXT PRIMARY KEY, expires_at REAL, used_at REAL, value TEXT)"
+            )
+            self.connection.commit()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None and self.connection is not None:
+                entry = self.connection.execute(
+                    "SELECT expires_at, value FROM search_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if entry is not None:
+                    self.entries[key] = entry
+
+            if entry is not None and entry[0] <= now:
+                self.stats.expired += 1
+                self._delete(key)
+                entry = None
+            if entry is None:
+                self.stats.misses += 1
+                return None
+
+            self.stats.hits += 1
+            self.entries.move_to_end(key)
+            self._evict()  # a row read from the file takes the place of the least recently used entry
+            if self.connection is not None:
+                self.pending_used_at[key] = now
+                if len(self.pending_used_at) >= USED_AT_BATCH_SIZE:
+                    self._write_used_at()
+                    self.connection.commit()
+            return json.loads(entry[1])
+
+    def put(self, key: str, value: Any) -> None:
+        now = time.time()
+        entry = (now + self.ttl_seconds, json.dumps(value, default=str))
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            self._evict()
+
+            if self.connection is not None:
+                self.pending_used_at.pop(key, None)
+                self._write_used_at()
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO search_cache (key, expires_at, used_at, value) VALUES (?, ?, ?, ?)",
+                    (key, entry[0], now, entry[1]),
+                )
+                # Keep the file bounded as well: drop the expired rows, then the least recently used ones
+                self.connection.execute("DELETE FROM search_cache WHERE expires_at <= ?", (now,))
+                self.connection.execute(
+                    "DELETE FROM search_cache WHERE key NOT IN (SELECT key FROM search_cache ORDER BY used_at DESC LIMIT ?)",
+                    (self.max_entries,),
+                )
+                self.connection.commit()
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.pending_used_at.clear()
+            if self.connection is not None:
+                self.connection.execute("DELETE FROM search_cache")
+                self.connection.commit()
+
+    def _evict(self) -> None:
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def _write_used_at(self) -> None:
+        # The access times only order the rows dropped by put, so they are written in batches (committed by the caller)
+        if self.pending_used_at:
+            self.connection.executemany(
+                "UPDATE search_cache SET used_at = ? WHERE key = ?",
+                [(used_at, key) for key, used_at in self.pending_used_at.items()],
+            )
+            self.pending_used_at.clear()
+
+    def _delete(self, key: str) -> None:
+        self.entries.pop(key, None)
+        self.pending_used_at.pop(key, None)
+        if self.connection is not None:
+            self.connection.execute("DELETE FROM search_cache WHERE key = ?", (key,))
+            self.connection.commit()
+
+    def get_or_search(self, query: str, params: Dict[str, Any], search: Callable[[], Any], cacheable=None) -> Any:
+        """
+        Return the cached result of the search, or run `search()` and cache its result if `cacheable(result)`
+        """
+        key = cache_key(query, params)
+        result = self.get(key)
+        if result is None:
+            result = search()
+            if cacheable is None or cacheable(result):
+                self.put(key, result)
+        return result
+
+    async def aget_or_search(
+        self, query: str, params: Dict[str, Any], search: Callable[[], Awaitable[Any]], cacheable=None
+    ) -> Any:
+        key = cache_key(query, params)
+        result = self.get(key)
+        if result is None:
+            result = await search()
+            if cacheable is None or cacheable(result):
+                self.put(key, result)
+        return result
+
+# The cache shared by every search of the process
+search_cache = SearchCache()
+
+# Define the settings of the Tavily tool that change its results (part of the cache key)
+TAVILY_RESULT_SETTINGS = {
+    "max_results",
+    "topic",
+    "search_depth",
+    "include_domains",
+    "exclude_domains",
+    "time_range",
+    "include_images",
+    "include_answer",
+    "include_raw_content",
+    "include_image_descriptions",
+    "country",
+}
+
+# Define a drop-in TavilySearch tool that answers repeated searches from the cache
+class CachedTavilySearch(TavilySearch):
+    """TavilySearch with the results cached by query and parameters (failed searches are not cached)"""
+
+    cache: Optional[SearchCache] = Field(default=None, exclude=True, description="Cache to use, the shared search_cache if None")
+
+    # An empty SearchCache is falsy (it has a length), compare with None
+    def _cache(self) -> SearchCache:
+        return self.cache if self.cache is not None else search_cache
+
+    def _cache_params(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        settings = self.model_dump(include=TAVILY_RESULT_SETTINGS)
+        return {**settings, **{name: value for name, value in kwargs.items() if value is not None}}
+
+    def _run(self, query: str, run_manager=None, **kwargs) -> Dict[str, Any]:
+        return self._cache().get_or_search(
+            query,
+            self._cache_params(kwargs),
+            lambda: super(CachedTavilySearch, self)._run(query, run_manager=run_manager, **kwargs),
+            cacheable=lambda result: "error" not in result,
+        )
+
+    async def _arun(self, query: str, run_manager=None, **kwargs) -> Dict[str, Any]:
+        return await self._cache().aget_or_search(
+            query,
+            self._cache_params(kwargs),
+            lambda: super(CachedTavilySearch, self)._arun(query, run_manager=run_manager, **kwargs),
+            cacheable=lambda result: "error" not in result,
+        )
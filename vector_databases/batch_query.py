@@ -0,0 +1,121 @@
+"""
+Batched, vectorized query API for offline retrieval evaluation.
+
+Instead of one embedding request and one FAISS search per question (`vectorstore.as_retriever()` in a
+loop), the questions are embedded in large batches and every batch is searched with a single
+`index.search` call on the whole query matrix. Results come back as numpy arrays:
+- positions: (num_questions, k) FAISS positions of the hits (-1 when fewer than k vectors exist)
+- scores: (num_questions, k) L2 distances (lower is more similar)
+- the docstore ids of the hits can be looked up with `positions_to_ids`
+
+For very large question sets the arrays can be streamed to .npy files on disk batch by batch
+(memory-mapped), so memory stays bounded by one batch.
+
+Run this file directly to benchmark queries/sec of the batched API against the per-question
+retriever loop (synthetic index, no API key needed):
+python vector_databases/batch_query.py
+"""
+
+import os
+from typing import List, Optional, Tuple
+
+import faiss
+import numpy as np
+from langchain_community.vectorstores import FAISS
+
+# Define the default number of questions embedded and searched together
+BATCH_SIZE = 512
+
+
+def batch_search(
+    vectorstore: FAISS,
+    questions: List[str],
+    k: int = 4,
+    batch_size: int = BATCH_SIZE,
+    output_dir: Optional[str] = None,
+    normalize_L2: bool = False,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Embed the questions `batch_size` at a time and search each batch with one FAISS call.
+
+    Args:
+        vectorstore: FAISS vector store to search
+        questions: Questions to retrieve documents for
+        k: Number of hits per question
+        batch_size: Number of questions embedded and searched together
+        output_dir: If given, results are streamed into positions.npy and scores.npy in this folder
+            (memory-mapped) instead of being kept in RAM
+        normalize_L2: Normalize the query vectors, pass the same value the vector store was created with
+
+    Returns:
+        (positions, scores) arrays of shape (len(questions), k)
+    """
+    shape = (len(questions), k)
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+        positions = np.lib.format.open_memmap(os.path.join(output_dir, "positions.npy"), mode="w+", dtype=np.int64, shape=shape)
+        scores = np.lib.format.open_memmap(os.path.join(output_dir, "scores.npy"), mode="w+", dtype=np.float32, shape=shape)
+    else:
+        positions = np.empty(shape, dtype=np.int64)
+        scores = np.empty(shape, dtype=np.float32)
+
+    for start in range(0, len(questions), batch_size):
+        batch = questions[start : start + batch_size]
+
+        # One embeddings request for the whole batch (the client splits it further if needed)
+        query_matrix = np.array(vectorstore.embeddings.embed_documents(batch), dtype=np.float32)
+        if normalize_L2:
+            faiss.normalize_L2(query_matrix)
+
+        # One matrix search for the whole batch
+        batch_scores, batch_positions = vectorstore.index.search(query_matrix, k)
+        scores[start : start + len(batch)] = batch_scores
+        positions[start : start + len(batch)] = batch_positions
+
+        if output_dir is not None:
+            positions.flush()
+            scores.flush()
+
+    return positions, scores
+
+
+def positions_to_ids(vectorstore: FAISS, positions: np.ndarray) -> np.ndarray:
+    """Map FAISS positions to docstore ids (None where there was no hit)"""
+    lookup = np.array([vectorstore.index_to_docstore_id.get(i) for i in range(vectorstore.index.ntotal)] + [None], dtype=object)
+    return lookup[np.where(positions < 0, len(lookup) - 1, positions)]
+
+
+if __name__ == "__main__":
+    import time
+
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+
+    # Benchmark parameters
+    NUM_DOCUMENTS = 20_000
+    NUM_QUESTIONS = 2_000
+    DIMENSIONS = 1536
+    K = 4
+
+    # The fake embeddings are computed locally, so the numbers below measure the per-call overhead
+    # and the FAISS search, not the network (which makes the per-question loop even slower in practice)
+    embedding = DeterministicFakeEmbedding(size=DIMENSIONS)
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((NUM_DOCUMENTS, DIMENSIONS), dtype=np.float32)
+    vectorstore = FAISS.from_embeddings([(f"doc {i}", v) for i, v in enumerate(vectors.tolist())], embedding)
+    questions = [f"question number {i}" for i in range(NUM_QUESTIONS)]
+
+    start = time.perf_counter()
+    retriever = vectorstore.as_retriever(search_kwargs={"k": K})
+    loop_results = [retriever.invoke(question) for question in questions]
+    loop_qps = NUM_QUESTIONS / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    positions, scores = batch_search(vectorstore, questions, k=K)
+    batch_qps = NUM_QUESTIONS / (time.perf_counter() - start)
+
+    # Sanity check: both paths return the same documents
+    ids = positions_to_ids(vectorstore, positions)
+    assert all([doc.id for doc in docs] == list(row) for docs, row in zip(loop_results, ids))
+
+    print(f"retriever loop : {loop_qps:8.1f} queries/sec")
+    print(f"batch_search   : {batch_qps:8.1f} queries/sec ({batch_qps / loop_qps:.1f}x)")
@@ -0,0 +1,224 @@
+"""
+Token-budgeted context packing for the RAG chains.
+
+Instead of concatenating every retrieved chunk verbatim, the packer:
+1. drops exact duplicate chunks
+2. merges chunks of the same source (and page) whose `start_index` spans overlap or touch, directly or
+   through other retrieved chunks, so the overlapping region is only sent once
+3. fills a token budget with the merged blocks in rank order (best ranked chunk first)
+
+Token counts are computed once at ingestion time (`add_token_counts`) and stored in the chunk metadata,
+so packing at query time only has to tokenize the blocks that were actually merged.
+
+Run this file directly to compare prompt tokens (and generation latency if OPENAI_API_KEY is set)
+between the plain and the packed context on the benchmark queries:
+python vector_databases/context_packing.py
+"""
+
+import hashlib
+import json
+import os
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, List
+
+import tiktoken
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableLambda
+
+# Define the tokenizer used by gpt-4.1 and the default context budget
+TOKEN_ENCODING = "o200k_base"
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+
+# Chunks whose spans are separated by at most this many characters (stripped whitespace) are merged
+MAX_MERGE_GAP = 2
+
+
+@lru_cache(maxsize=1)
+def get_encoding() -> tiktoken.Encoding:
+    return tiktoken.get_encoding(TOKEN_ENCODING)
+
+
+def count_tokens(text: str) -> int:
+    return len(get_encoding().encode_ordinary(text))
+
+
+def add_token_counts(docs: List[Document]) -> List[Document]:
+    """Store the token count of every chunk in its metadata (run once at ingestion time)"""
+    for doc, tokens in zip(docs, get_encoding().encode_ordinary_batch([doc.page_content for doc in docs])):
+        doc.metadata["token_count"] = len(tokens)
+    return docs
+
+
+def _token_count(doc: Document) -> int:
+    # Fall back to counting when the chunk was ingested before the counts were cached
+    if "token_count" not in doc.metadata:
+        doc.metadata["token_count"] = count_tokens(doc.page_content)
+    return doc.metadata["token_count"]
+
+
+def _source_key(doc: Document) -> str:
+    # Chunks can only be merged when they come from the same source text (e.g. same file and same page)
+    metadata = {key: value for key, value in doc.metadata.items() if key not in ("start_index", "token_count")}
+    return json.dumps(metadata, sort_keys=True, default=str)
+
+
+class _Block:
+    """A contiguous span of one source text, made of one or more merged chunks"""
+
+    def __init__(self, doc: Document, rank: int):
+        # The best ranked chunk of the block gives its rank and metadata
+        self.doc = doc
+        self.rank = rank
+        self.start = doc.metadata.get("start_index")
+        self.text = doc.page_content
+        self.merged = False
+
+    @property
+    def end(self) -> int:
+        return self.start + len(self.text)
+
+    def touches(self, doc: Document) -> bool:
+        start = doc.metadata.get("start_index")
+        if self.start is None or start is None:
+            return False
+        return start <= self.end + MAX_MERGE_GAP and self.start <= start + len(doc.page_content) + MAX_MERGE_GAP
+
+    def merge(self, doc: Document, rank: int) -> None:
+        if rank < self.rank:
+            self.doc, self.rank = doc, rank
+        start, text = doc.metadata["start_index"], doc.page_content
+        end = start + len(text)
+        if start < self.start:
+            # The new chunk extends the block to the left
+            self.text = (text + "\n" + self.text) if end < self.start else text + self.text[end - self.start :]
+            self.start = start
+        elif end > self.end:
+            # The new chunk extends the block to the right
+            self.text = (self.text + "\n" + text) if start > self.end else self.text + text[self.end - start :]
+        self.merged = True
+
+    def to_document(self) -> Document:
+        if not self.merged:
+            return self.doc
+        metadata = {**self.doc.metadata, "start_index": self.start, "token_count": count_tokens(self.text)}
+        return Document(page_content=self.text, metadata=metadata)
+
+
+def pack_documents(docs: List[Document], max_tokens: int = CONTEXT_TOKEN_BUDGET) -> List[Document]:
+    """
+    Deduplicate, merge overlapping chunks of the same source and keep the best ranked blocks that fit
+    in `max_tokens`. The input is expected in rank order (as returned by the retriever).
+    """
+    docs_by_source: Dict[str, List[tuple]] = defaultdict(list)
+    seen = set()
+
+    for rank, doc in enumerate(docs):
+        content_hash = hashlib.sha1(doc.page_content.encode("utf-8")).hexdigest()
+        if content_hash in seen:
+            continue
+        seen.add(content_hash)
+        docs_by_source[_source_key(doc)].append((rank, doc))
+
+    # Sweep the chunks of every source in text order and extend the open block while they touch it,
+    # so chunks chaining through each other end up in one block whatever their rank order
+    # (chunks without a start index are never merged)
+    blocks: List[_Block] = []
+    for source_docs in docs_by_source.values():
+        block = None
+        for rank, doc in sorted(
+            source_docs,
+            key=lambda item: (item[1].metadata.get("start_index") is None, item[1].metadata.get("start_index") or 0, item[0]),
+        ):
+            if block is not None and block.touches(doc):
+                block.merge(doc, rank)
+            else:
+                block = _Block(doc, rank)
+                blocks.append(block)
+
+    # A block keeps the rank of its best ranked chunk
+    blocks.sort(key=lambda block: block.rank)
+
+    # Fill the budget in rank order, skipping blocks that do not fit anymore
+    # (a merged block that is too big falls back to its best ranked chunk)
+    packed, used_tokens = [], 0
+    for block in blocks:
+        candidates = [block.to_document(), block.doc] if block.merged else [block.doc]
+        for doc in candidates:
+            tokens = _token_count(doc)
+            if used_tokens + tokens <= max_tokens:
+                packed.append(doc)
+                used_tokens += tokens
+                break
+    return packed
+
+
+def format_docs(docs: List[Document]) -> str:
+    return "\n\n".join(doc.page_content for doc in docs)
+
+
+def get_context_packer(max_tokens: int = CONTEXT_TOKEN_BUDGET) -> RunnableLambda:
+    """Runnable to put between a retriever and a stuff documents chain"""
+    return RunnableLambda(lambda docs: pack_documents(docs, max_tokens=max_tokens), name="pack_documents")
+
+
+if __name__ == "__main__":
+    import time
+
+    from dotenv import load_dotenv
+    from langchain_community.document_loaders import PyPDFLoader
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    from hybrid_retrieval import BM25Index
+
+    load_dotenv()
+
+    # Benchmark parameters
+    K = 8
+    BENCHMARK_QUERIES = [
+        "Give me the gist of ReAct in 3 sentences",
+        "How does ReAct combine reasoning traces and actions?",
+        "What are the results of ReAct on HotpotQA and FEVER?",
+        "How does ReAct compare to chain-of-thought prompting?",
+        "What actions can the agent take in the Wikipedia API?",
+        "What are the limitations of ReAct?",
+    ]
+
+    # Chunk the ReAct paper like faiss_vectorstore.py does, with start indexes and cached token counts
+    documents = PyPDFLoader("./vector_databases/ReAct_paper.pdf").load()
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=1000, chunk_overlap=30, separators=["\n\n", "\n", " ", ""], add_start_index=True
+    )
+    chunks = add_token_counts(text_splitter.split_documents(documents))
+
+    # Retrieve with the FAISS index if it was built, else with a local BM25 index so the benchmark runs offline
+    if os.getenv("OPENAI_API_KEY") and os.path.exists("./vector_databases/faiss_index_react"):
+        from langchain_community.vectorstores import FAISS
+        from embedding_config import get_embeddings
+
+        vectorstore = FAISS.load_local("./vector_databases/faiss_index_react", get_embeddings(), allow_dangerous_deserialization=True)
+        retrieve = lambda query: vectorstore.similarity_search(query, k=K)
+    else:
+        bm25_index = BM25Index.from_documents(chunks)
+        retrieve = lambda query: [doc for doc, _ in bm25_index.search(query, k=K)]
+
+    llm = None
+    if os.getenv("OPENAI_API_KEY"):
+        from langchain_openai import ChatOpenAI
+
+        llm = ChatOpenAI(model="gpt-4.1", temperature=0)
+
+    totals = {"plain": [0, 0.0], "packed": [0, 0.0]}
+    for query in BENCHMARK_QUERIES:
+        retrieved = retrieve(query)
+        for mode, context_docs in (("plain", retrieved), ("packed", pack_documents(retrieved))):
+            prompt = f"Use the following pieces of context to answer the question.\n{format_docs(context_docs)}\nQuestion: {query}"
+            totals[mode][0] += count_tokens(prompt)
+            if llm is not None:
+                start = time.perf_counter()
+                llm.invoke(prompt)
+                totals[mode][1] += time.perf_counter() - start
+
+    for mode, (tokens, latency) in totals.items():
+        latency_report = f", {latency / len(BENCHMARK_QUERIES):.2f}s avg generation" if llm is not None else ""
+        print(f"{mode:<7}: {tokens / len(BENCHMARK_QUERIES):.0f} prompt tokens per query{latency_report}")
@@ -0,0 +1,82 @@
+"""
+Shared embedding configuration for the vector database examples.
+
+text-embedding-3-small supports shortened (Matryoshka style) embeddings through the `dimensions`
+parameter, so the dimension is configurable with the EMBEDDING_DIMENSIONS environment variable.
+The model and dimension used to build an index are stored next to it, and loading an index with a
+different configuration raises instead of silently returning garbage neighbours.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+from dotenv import load_dotenv
+from langchain_openai import OpenAIEmbeddings
+
+load_dotenv()
+
+# Define the embedding model and the dimension used for ingestion and queries
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", "1536"))
+
+# Name of the metadata file written into every saved index folder
+INDEX_METADATA_FILE = "embedding_metadata.json"
+
+
+def get_embeddings(dimensions: Optional[int] = None) -> OpenAIEmbeddings:
+    """Create the embeddings model with the configured (or the given) dimension"""
+    return OpenAIEmbeddings(
+        model=EMBEDDING_MODEL,
+        dimensions=dimensions or EMBEDDING_DIMENSIONS,
+        api_key=os.getenv("OPENAI_API_KEY"),
+    )
+
+
+def write_index_metadata(folder_path: str, dimensions: Optional[int] = None) -> None:
+    """Record which model and dimension the index in `folder_path` was built with"""
+    Path(folder_path).mkdir(parents=True, exist_ok=True)
+    with open(os.path.join(folder_path, INDEX_METADATA_FILE), "w") as f:
+        json.dump({"model": EMBEDDING_MODEL, "dimensions": dimensions or EMBEDDING_DIMENSIONS}, f)
+
+
+def check_index_metadata(folder_path: str, dimensions: Optional[int] = None) -> None:
+    """
+    Make sure the index in `folder_path` was built with the same model and dimension we query with.
+    Indexes built before the metadata file existed are full 1536-dim text-embedding-3-small indexes.
+    """
+    metadata_path = os.path.join(folder_path, INDEX_METADATA_FILE)
+    if os.path.exists(metadata_path):
+        with open(metadata_path) as f:
+            metadata = json.load(f)
+    else:
+        metadata = {"model": EMBEDDING_MODEL, "dimensions": 1536}
+
+    check_dimensions(
+        built_with=(metadata["model"], metadata["dimensions"]),
+        query_with=(EMBEDDING_MODEL, dimensions or EMBEDDING_DIMENSIONS),
+        index_name=folder_path,
+    )
+
+
+def check_dimensions(built_with: tuple, query_with: tuple, index_name: str) -> None:
+    """Raise if the (model, dimensions) an index was built with differs from the query configuration"""
+    if tuple(built_with) != tuple(query_with):
+        raise ValueError(
+            f"Index {index_name!r} was built with {built_with[0]} at {built_with[1]} dimensions "
+            f"but queries use {query_with[0]} at {query_with[1]} dimensions. "
+            f"Set EMBEDDING_DIMENSIONS={built_with[1]} or rebuild the index."
+        )
+
+
+def check_pinecone_index(index_name: str, dimensions: Optional[int] = None) -> None:
+    """Make sure the Pinecone index was created with the dimension we embed with (Pinecone only stores the dimension)"""
+    from pinecone import Pinecone
+
+    index_dimensions = Pinecone(api_key=os.getenv("PINECONE_API_KEY")).describe_index(index_name).dimension
+    check_dimensions(
+        built_with=(EMBEDDING_MODEL, index_dimensions),
+        query_with=(EMBEDDING_MODEL, dimensions or EMBEDDING_DIMENSIONS),
+        index_name=index_name,
+    )
@@ -0,0 +1,81 @@
+"""
+Offline evaluation of shortened text-embedding-3-small embeddings on our own corpus.
+
+The corpus (ReAct paper + medium blog) is chunked the same way as the ingestion scripts and embedded
+once at the full 1536 dimensions. Shortened embeddings are obtained by truncating and re-normalizing
+those vectors, which is what the API does for the `dimensions` parameter, so every dimension is
+evaluated without re-embedding the corpus.
+
+For every dimension we report:
+- recall@k: fraction of the pseudo-questions (first sentence of a random chunk) whose source chunk is in the top k
+- overlap@k: fraction of the 1536-dim top k that is also in the shortened top k
+- the size of the FAISS index
+
+Run from the root directory (needs OPENAI_API_KEY):
+python vector_databases/evaluate_embedding_dimensions.py
+"""
+
+import re
+
+import faiss
+import numpy as np
+from dotenv import load_dotenv
+from langchain_community.document_loaders import PyPDFLoader, TextLoader
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from embedding_config import get_embeddings
+
+load_dotenv()
+
+# Define the evaluation parameters
+DIMENSIONS = [256, 512, 1024, 1536]
+K = 4
+NUM_QUESTIONS = 200
+
+
+# Define a function to shorten full size embeddings to a given dimension
+def shorten(vectors: np.ndarray, dimensions: int) -> np.ndarray:
+    """Truncate to the first `dimensions` values and L2 normalize again"""
+    shortened = np.ascontiguousarray(vectors[:, :dimensions])
+    return shortened / np.linalg.norm(shortened, axis=1, keepdims=True)
+
+
+# Define a function to turn a chunk into a pseudo question that should retrieve it
+def pseudo_question(text: str) -> str:
+    sentences = [s.strip() for s in re.split(r"(?<=[.!?])\s+", text) if len(s.split()) >= 6]
+    return sentences[0] if sentences else text[:200]
+
+
+if __name__ == "__main__":
+    # Load and chunk the corpus like faiss_vectorstore.py and ingestion.py do
+    documents = PyPDFLoader("./vector_databases/ReAct_paper.pdf").load()
+    documents += TextLoader("./vector_databases/mediumblog1.txt", encoding="utf-8").load()
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=30)
+    chunks = [chunk.page_content for chunk in text_splitter.split_documents(documents)]
+    print(f"Corpus: {len(chunks)} chunks")
+
+    # Pick the pseudo questions and remember which chunk each one comes from
+    rng = np.random.default_rng(0)
+    sources = rng.choice(len(chunks), size=min(NUM_QUESTIONS, len(chunks)), replace=False)
+    questions = [pseudo_question(chunks[i]) for i in sources]
+
+    # Embed everything once at full size
+    embeddings = get_embeddings(dimensions=1536)
+    chunk_vectors = np.array(embeddings.embed_documents(chunks), dtype=np.float32)
+    question_vectors = np.array(embeddings.embed_documents(questions), dtype=np.float32)
+
+    # Reference ranking from the full size index
+    reference_index = faiss.IndexFlatL2(1536)
+    reference_index.add(chunk_vectors)
+    _, reference_top_k = reference_index.search(question_vectors, K)
+
+    print(f"{'dims':>6}{'recall@' + str(K):>11}{'overlap@' + str(K):>12}{'index KB':>10}")
+    for dimensions in DIMENSIONS:
+        index = faiss.IndexFlatL2(dimensions)
+        index.add(shorten(chunk_vectors, dimensions))
+        _, top_k = index.search(shorten(question_vectors, dimensions), K)
+
+        recall = np.mean([source in row for source, row in zip(sources, top_k)])
+        overlap = np.mean([len(set(row) & set(reference)) / K for row, reference in zip(top_k, reference_top_k)])
+        index_kb = len(faiss.serialize_index(index)) / 1024
+        print(f"{dimensions:>6}{recall:>11.3f}{overlap:>12.3f}{index_kb:>10.1f}")
@@ -1,37 +1,106 @@
 import os
+from itertools import islice
 from dotenv import load_dotenv
-from langchain_community.document_loaders import PyPDFLoader
 from langchain_community.vectorstores import FAISS
-from langchain_openai import OpenAIEmbeddings
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.chains.combine_documents import create_stuff_documents_chain
 from langchain.chains.retrieval import create_retrieval_chain
 from langchain_openai import ChatOpenAI 
 from langchain import hub
+from sharded_faiss import ShardedFAISS
+from quantized_faiss import QuantizedFAISS
+from embedding_config import get_embeddings, write_index_metadata, check_index_metadata
+from context_packing import add_token_counts, get_context_packer
+from parallel_pdf_loader import ParallelPyPDFLoader
 
 load_dotenv("../.env")
 
+# Number of FAISS shards to partition the vectors into (1 keeps the original single index)
+NUM_SHARDS = int(os.getenv("FAISS_NUM_SHARDS", "1"))
+
+# Vector storage mode: "float32" (original), "float16" or "int8" (re-scored with the float32 vectors kept on disk)
+VECTOR_STORAGE = os.getenv("FAISS_VECTOR_STORAGE", "float32")
+
+# Rebuild the index even if it was saved before (an existing index is otherwise loaded after checking its embedding dimension)
+REBUILD_INDEX = os.getenv("FAISS_REBUILD_INDEX", "false").lower() == "true"
+
+# Number of chunks embedded per request while the PDF pages are still being extracted
+EMBED_BATCH_SIZE = int(os.getenv("FAISS_EMBED_BATCH_SIZE", "64"))
+
+
+# Define the function to build the vector store of a PDF file
+def build_vectorstore(pdf_path, embeddings, num_shards=NUM_SHARDS, vector_storage=VECTOR_STORAGE):
+    """
+    Extract, split and embed the pages of the PDF into the store of the storage mode.
+    Raises a ValueError when no text could be extracted from the PDF (scanned pages for example).
+    """
+    # Load the PDF file (pages are extracted in parallel worker processes and streamed in page order)
+    loader = ParallelPyPDFLoader(pdf_path)
+
+    # Split every page into chunks as soon as it has been extracted
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=30, separators=["\n\n", "\n", " ", ""], add_start_index=True)
+    chunk_stream = (
+        chunk
+        for page in loader.lazy_load()
+        for chunk in add_token_counts(text_splitter.split_documents(documents=[page])) # Token counts are cached in the metadata for the context packer
+    )
+
+    if num_shards > 1:
+        # Partition the vectors across several FAISS shards that are searched concurrently
+        docs = list(chunk_stream)
+        vectorstore = ShardedFAISS.from_documents(documents=docs, embedding=embeddings, num_shards=num_shards) if docs else None
+    elif vector_storage != "float32":
+        # Keep the vectors as float16 / int8 codes to cut the index memory 2-4x
+        docs = list(chunk_stream)
+        vectorstore = QuantizedFAISS.from_documents(documents=docs, embedding=embeddings, quantization=vector_storage) if docs else None
+    else:
+        # Embed the chunks batch by batch while the later pages are still being extracted
+        # Note that the vectorstore will be stored in the RAM of our local machine
+        vectorstore = None
+        while batch := list(islice(chunk_stream, EMBED_BATCH_SIZE)):
+            if vectorstore is None:
+                vectorstore = FAISS.from_documents(documents=batch, embedding=embeddings)
+            else:
+                vectorstore.add_documents(batch)
+    # A PDF without extractable text (scanned pages for example) gives no chunks
+    if vectorstore is None:
+        raise ValueError(f"No text could be extracted from {pdf_path}, there is nothing to index")
+    return vectorstore
+
 
 if __name__ == "__main__":
+    # The shards are plain float32 FAISS indexes, quantized shards are not supported
+    if NUM_SHARDS > 1 and VECTOR_STORAGE != "float32":
+        raise ValueError(
+            f"FAISS_VECTOR_STORAGE={VECTOR_STORAGE} cannot be combined with FAISS_NUM_SHARDS={NUM_SHARDS}, "
+            "use one of them or FAISS_VECTOR_STORAGE=float32"
+        )
+
     print("Starting the application...")
 
-    # Load the PDF file
-    pdf_path = "./vector_databases/ReAct_paper.pdf"
-    loader = PyPDFLoader(pdf_path)
-    documents = loader.load()
+    # Pick the index folder and the store class of the storage mode
+    if NUM_SHARDS > 1:
+        index_path, store_cls = "./vector_databases/faiss_index_react_sharded", ShardedFAISS
+    elif VECTOR_STORAGE != "float32":
+        index_path, store_cls = f"./vector_databases/faiss_index_react_{VECTOR_STORAGE}", QuantizedFAISS
+    else:
+        index_path, store_cls = "./vector_databases/faiss_index_react", FAISS
 
-    # Split the documents into chunks
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=30, separators=["\n\n", "\n", " ", ""])
-    docs = text_splitter.split_documents(documents=documents)
+    # Initialize the embeddings (dimension set by EMBEDDING_DIMENSIONS)
+    embeddings = get_embeddings()
 
-    # Embed the chunks and store them in a FAISS vector store
-    embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
-    vectorstore = FAISS.from_documents(documents=docs, embedding=embeddings) # Note that the vectorstore will be stored in the RAM of our local machine
-    vectorstore.save_local("./vector_databases/faiss_index_react") # Persist the vectorstore to the local machine (if this is not done, the vectorstore will be lost when the program is closed)
+    # Embed the chunks and store them in a FAISS vector store, unless the index was already built
+    if REBUILD_INDEX or not os.path.exists(index_path):
+        vectorstore = build_vectorstore("./vector_databases/ReAct_paper.pdf", embeddings)
+        vectorstore.save_local(index_path) # Persist the vectorstore to the local machine (if this is not done, the vectorstore will be lost when the program is closed)
+        write_index_metadata(index_path) # Record the embedding model and dimension next to the index
+    else:
+        print(f"Using the existing index {index_path} (set FAISS_REBUILD_INDEX=true to rebuild it)")
+        check_index_metadata(index_path) # Refuse to query an index built with another embedding dimension
 
     # Load the vectorstore from the local machine
-    new_vectorstore = FAISS.load_local(
-        "./vector_databases/faiss_index_react",
+    new_vectorstore = store_cls.load_local(
+        index_path,
         embeddings,
         allow_dangerous_deserialization=True # This is a security risk, but we are using it here because we are loading the vectorstore from the local machine
     )
@@ -46,7 +115,7 @@ if __name__ == "__main__":
 
     # Create the retrieval chain
     retrieval_chain = create_retrieval_chain(
-        retriever=new_vectorstore.as_retriever(),
+        retriever=new_vectorstore.as_retriever() | get_context_packer(), # Merge overlapping chunks and fit the token budget before stuffing
         combine_docs_chain=combine_docs_chain
     )
 
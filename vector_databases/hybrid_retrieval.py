@@ -0,0 +1,243 @@
+"""
+Local BM25 retrieval and hybrid (BM25 + vector) retrieval with reciprocal rank fusion.
+
+The BM25 index is a plain inverted index built during ingestion and persisted as:
+- bm25.npz: postings (document ids + term frequencies) stored contiguously per term, the per-term
+  offsets into the postings and the document lengths, all as numpy arrays (loaded without pickle)
+- vocabulary.json: the sorted terms, term i owns postings[offsets[i]:offsets[i + 1]]
+- documents.jsonl: the chunk texts and metadata returned by the retriever
+
+The hybrid retriever runs the BM25 and the vector retriever concurrently and merges both rankings with
+reciprocal rank fusion (RRF). Queries that look like code identifiers (class names, snake_case
+functions, dotted paths) can skip the network embedding call and be answered by BM25 alone.
+"""
+
+import json
+import math
+import os
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List
+
+import numpy as np
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.runnables import RunnableParallel
+from pydantic import ConfigDict
+
+# Define the tokenization patterns
+TOKEN_PATTERN = re.compile(r"[A-Za-z0-9_]+")
+CAMEL_CASE_PATTERN = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+")
+IDENTIFIER_PATTERN = re.compile(
+    r"[A-Za-z_]\w*(\.\w+)+"  # dotted path: langchain.text_splitter
+    r"|\w*[a-z][A-Z]\w*"  # camelCase / PascalCase with an inner capital: RecursiveCharacterTextSplitter
+    r"|[A-Za-z]\w*_\w+"  # snake_case: create_retrieval_chain
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase word tokens. Identifiers are also split into their parts so that
+    "RecursiveCharacterTextSplitter" matches both the exact class name and "text splitter".
+    """
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text):
+        tokens.append(token.lower())
+        parts = [part.lower() for piece in token.split("_") for part in CAMEL_CASE_PATTERN.findall(piece)]
+        if len(parts) > 1:
+            tokens.extend(parts)
+    return tokens
+
+
+def looks_like_identifier(query: str) -> bool:
+    """True for short queries made of code identifiers, e.g. "RecursiveCharacterTextSplitter" or "create_retrieval_chain()" """
+    words = query.strip().rstrip("?").replace("()", "").split()
+    return 0 < len(words) <= 3 and any(IDENTIFIER_PATTERN.fullmatch(word) for word in words)
+
+
+class BM25Index:
+    """Compact inverted index with Okapi BM25 scoring"""
+
+    def __init__(
+        self,
+        vocabulary: List[str],
+        offsets: np.ndarray,
+        postings_doc_ids: np.ndarray,
+        postings_term_freqs: np.ndarray,
+        doc_lengths: np.ndarray,
+        documents: List[Document],
+        k1: float = 1.5,
+        b: float = 0.75,
+    ):
+        self.term_ids = {term: i for i, term in enumerate(vocabulary)}
+        self.vocabulary = vocabulary
+        self.offsets = offsets
+        self.postings_doc_ids = postings_doc_ids
+        self.postings_term_freqs = postings_term_freqs
+        self.doc_lengths = doc_lengths
+        self.documents = documents
+        self.k1 = k1
+        self.b = b
+        self.avg_doc_length = float(doc_lengths.mean()) if len(doc_lengths) else 0.0
+
+    @classmethod
+    def from_documents(cls, documents: List[Document], **kwargs) -> "BM25Index":
+        """Tokenize the documents and build the postings lists"""
+        postings: Dict[str, List[tuple]] = defaultdict(list)
+        doc_lengths = []
+        for doc_id, doc in enumerate(documents):
+            term_freqs = Counter(tokenize(doc.page_content))
+            doc_lengths.append(sum(term_freqs.values()))
+            for term, freq in term_freqs.items():
+                postings[term].append((doc_id, freq))
+
+        vocabulary = sorted(postings)
+        offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(postings[term]) for term in vocabulary])
+        postings_doc_ids = np.array([d for term in vocabulary for d, _ in postings[term]], dtype=np.int32)
+        # Chunks are short, so term frequencies fit in 16 bits (clipped just in case)
+        postings_term_freqs = np.array(
+            [min(f, 2**16 - 1) for term in vocabulary for _, f in postings[term]], dtype=np.uint16
+        )
+
+        return cls(
+            vocabulary,
+            offsets,
+            postings_doc_ids,
+            postings_term_freqs,
+            np.array(doc_lengths, dtype=np.int32),
+            list(documents),
+            **kwargs,
+        )
+
+    def save_local(self, folder_path: str) -> None:
+        os.makedirs(folder_path, exist_ok=True)
+        np.savez(
+            os.path.join(folder_path, "bm25.npz"),
+            offsets=self.offsets,
+            postings_doc_ids=self.postings_doc_ids,
+            postings_term_freqs=self.postings_term_freqs,
+            doc_lengths=self.doc_lengths,
+            params=np.array([self.k1, self.b]),
+        )
+        with open(os.path.join(folder_path, "vocabulary.json"), "w", encoding="utf-8") as f:
+            json.dump(self.vocabulary, f)
+        with open(os.path.join(folder_path, "documents.jsonl"), "w", encoding="utf-8") as f:
+            for doc in self.documents:
+                f.write(json.dumps({"page_content": doc.page_content, "metadata": doc.metadata}) + "\n")
+
+    @classmethod
+    def load_local(cls, folder_path: str) -> "BM25Index":
+        arrays = np.load(os.path.join(folder_path, "bm25.npz"))
+        with open(os.path.join(folder_path, "vocabulary.json"), encoding="utf-8") as f:
+            vocabulary = json.load(f)
+        with open(os.path.join(folder_path, "documents.jsonl"), encoding="utf-8") as f:
+            documents = [Document(**json.loads(line)) for line in f]
+
+        k1, b = arrays["params"]
+        return cls(
+            vocabulary,
+            arrays["offsets"],
+            arrays["postings_doc_ids"],
+            arrays["postings_term_freqs"],
+            arrays["doc_lengths"],
+            documents,
+            k1=float(k1),
+            b=float(b),
+        )
+
+    def search(self, query: str, k: int = 4) -> List[tuple]:
+        """Return the top k (document, score) pairs, documents without any query term are never returned"""
+        scores = np.zeros(len(self.documents), dtype=np.float32)
+        num_docs = len(self.documents)
+        for term in set(tokenize(query)):
+            term_id = self.term_ids.get(term)
+            if term_id is None:
+                continue
+
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            doc_ids = self.postings_doc_ids[start:end]
+            term_freqs = self.postings_term_freqs[start:end].astype(np.float32)
+
+            idf = math.log(1 + (num_docs - len(doc_ids) + 0.5) / (len(doc_ids) + 0.5))
+            length_norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_ids] / self.avg_doc_length)
+            scores[doc_ids] += idf * term_freqs * (self.k1 + 1) / (term_freqs + length_norm)
+
+        matched = np.flatnonzero(scores)
+        top = matched[np.argsort(-scores[matched], kind="stable")[:k]]
+        return [(self.documents[i], float(scores[i])) for i in top]
+
+
+class LocalBM25Retriever(BaseRetriever):
+    """Retriever over a persisted BM25Index, no network call needed"""
+
+    index: BM25Index
+    k: int = 4
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    @classmethod
+    def load_local(cls, folder_path: str, k: int = 4) -> "LocalBM25Retriever":
+        return cls(index=BM25Index.load_local(folder_path), k=k)
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return [doc for doc, _ in self.index.search(query, self.k)]
+
+
+# Define the reciprocal rank fusion function
+def reciprocal_rank_fusion(rankings: List[List[Document]], k: int = 4, rrf_k: int = 60) -> List[Document]:
+    """
+    Merge several rankings: every document scores sum(1 / (rrf_k + rank)) over the rankings it appears in.
+    Documents are identified by their source and content, so the same chunk coming from BM25 and from
+    the vector store is counted once.
+    """
+    scores: Dict[tuple, float] = defaultdict(float)
+    documents: Dict[tuple, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            key = (doc.metadata.get("source"), doc.page_content)
+            scores[key] += 1 / (rrf_k + rank)
+            documents.setdefault(key, doc)
+    return [documents[key] for key in sorted(scores, key=scores.get, reverse=True)[:k]]
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Runs the BM25 and the vector retriever concurrently and fuses their rankings with RRF.
+    With `identifier_fast_path`, identifier-looking queries that BM25 can answer skip the vector search.
+    """
+
+    bm25_retriever: BaseRetriever
+    vector_retriever: BaseRetriever
+    k: int = 4
+    rrf_k: int = 60
+    identifier_fast_path: bool = True
+
+    def _use_fast_path(self, query: str) -> bool:
+        return self.identifier_fast_path and looks_like_identifier(query)
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        config = {"callbacks": run_manager.get_child()}
+        if self._use_fast_path(query):
+            docs = self.bm25_retriever.invoke(query, config=config)
+            if docs:
+                return docs[: self.k]
+
+        # RunnableParallel runs both retrievers at the same time on a thread pool
+        results = RunnableParallel(bm25=self.bm25_retriever, vector=self.vector_retriever).invoke(query, config=config)
+        return reciprocal_rank_fusion([results["bm25"], results["vector"]], k=self.k, rrf_k=self.rrf_k)
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        config = {"callbacks": run_manager.get_child()}
+        if self._use_fast_path(query):
+            docs = await self.bm25_retriever.ainvoke(query, config=config)
+            if docs:
+                return docs[: self.k]
+
+        results = await RunnableParallel(bm25=self.bm25_retriever, vector=self.vector_retriever).ainvoke(
+            query, config=config
+        )
+        return reciprocal_rank_fusion([results["bm25"], results["vector"]], k=self.k, rrf_k=self.rrf_k)
@@ -2,12 +2,17 @@ import os
 from dotenv import load_dotenv
 from langchain_community.document_loaders import TextLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings
 from langchain_pinecone import PineconeVectorStore
+from embedding_config import get_embeddings, check_pinecone_index
+from hybrid_retrieval import BM25Index
+from context_packing import add_token_counts
 # from pinecone import Pinecone
 
 load_dotenv()
 
+# Define the local BM25 index read by main.py
+BM25_INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bm25_index")
+
 if __name__ == "__main__":
     # Load the data
     print("Ingesting data...")
@@ -17,14 +22,15 @@ if __name__ == "__main__":
 
     # Split the document into chunks
     print("Splitting data into chunks...")
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=0)
-    chunks = text_splitter.split_documents(document)
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=0, add_start_index=True) # start_index lets the context packer merge adjacent chunks
+    chunks = add_token_counts(text_splitter.split_documents(document)) # Cache the token count of every chunk in its metadata
     print(f"Created {len(chunks)} chunks")
     print("Data split successfully")
 
     # Embed the chunks
     print("Embedding data...")
-    embeddings = OpenAIEmbeddings(model="text-embedding-3-small", api_key=os.getenv("OPENAI_API_KEY"))
+    embeddings = get_embeddings() # The dimension is set by EMBEDDING_DIMENSIONS and must match the Pinecone index
+    check_pinecone_index(os.getenv("INDEX_NAME"))
     print("Data embedded successfully")
 
     # Store the chunks in the vector database
@@ -48,4 +54,9 @@ if __name__ == "__main__":
     # )
     # vectorstore.add_documents(chunks)
     
-    print("Data stored successfully in vector database!")
\ No newline at end of file
+    print("Data stored successfully in vector database!")
+
+    # Build the local BM25 index over the same chunks (used by the hybrid retriever for keyword / identifier lookups)
+    print("Building BM25 index...")
+    BM25Index.from_documents(chunks).save_local(BM25_INDEX_PATH)
+    print("BM25 index stored successfully!")
\ No newline at end of file
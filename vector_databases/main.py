@@ -2,8 +2,11 @@ import os
 
 from dotenv import load_dotenv
 from langchain_core.prompts import PromptTemplate
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
+from langchain_openai import ChatOpenAI
 from langchain_pinecone import PineconeVectorStore
+from embedding_config import get_embeddings, check_pinecone_index
+from hybrid_retrieval import HybridRetriever, LocalBM25Retriever
+from context_packing import pack_documents, CONTEXT_TOKEN_BUDGET
 
 from langchain import hub
 from langchain.chains.combine_documents import create_stuff_documents_chain
@@ -12,15 +15,19 @@ from langchain_core.runnables.passthrough import RunnablePassthrough
 
 load_dotenv("../.env")
 
+# Define the local BM25 index built by ingestion.py
+BM25_INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bm25_index")
+
 # Define a function to format the documents
+# Adjacent chunks are merged, duplicates dropped and the context is kept within the token budget
 def format_docs(docs):
-    return "\n\n".join([doc.page_content for doc in docs])
+    return "\n\n".join([doc.page_content for doc in pack_documents(docs, max_tokens=CONTEXT_TOKEN_BUDGET)])
 
 if __name__ == "__main__":
     print("Starting the application...")
 
     # Initialize the embeddings and LLM
-    embeddings = OpenAIEmbeddings(model="text-embedding-3-small", api_key=os.getenv("OPENAI_API_KEY"))
+    embeddings = get_embeddings() # Must use the same dimension the index was ingested with
     llm = ChatOpenAI(model="gpt-4.1", api_key=os.getenv("OPENAI_API_KEY"))
 
     # Testing the query
@@ -32,6 +39,7 @@ if __name__ == "__main__":
     # print(result.content)
 
     # Initialize the vector store
+    check_pinecone_index(os.getenv("INDEX_NAME"))
     vectorstore = PineconeVectorStore(index_name=os.getenv("INDEX_NAME"), embedding=embeddings)
 
     # # Create the new retrieval chain (with Retrieval Vector Database)
@@ -53,9 +61,16 @@ if __name__ == "__main__":
 
     custom_rag_prompt = PromptTemplate.from_template(template=template)
 
+    # Combine the local BM25 index (built by ingestion.py) with the dense retriever using reciprocal rank fusion
+    retriever = vectorstore.as_retriever()
+    if os.path.exists(BM25_INDEX_PATH):
+        retriever = HybridRetriever(bm25_retriever=LocalBM25Retriever.load_local(BM25_INDEX_PATH), vector_retriever=retriever)
+    else:
+        print("No BM25 index found, run ingestion.py to build it. Using dense retrieval only")
+
     # Create the chain (with Retrieval Vector Database)
     rag_chain = (
-        {"context": vectorstore.as_retriever() | format_docs, "question": RunnablePassthrough()} # Values that will be passed to the prompt template
+        {"context": retriever | format_docs, "question": RunnablePassthrough()} # Values that will be passed to the prompt template
         | custom_rag_prompt
         | llm
     )
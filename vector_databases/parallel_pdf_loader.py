@@ -0,0 +1,147 @@
+"""
+Parallel, streaming PDF loader.
+
+`PyPDFLoader(pdf_path).load()` extracts every page serially before returning anything. This loader
+extracts the pages in a process pool (pypdf text extraction is CPU bound, so threads would not help)
+and yields the pages in order as soon as they are ready, so splitting and embedding can start on the
+first pages while the later ones are still being parsed. The documents have the same content and
+metadata as the ones produced by PyPDFLoader.
+
+Run this file directly to benchmark pages/sec against PyPDFLoader for different worker counts:
+python vector_databases/parallel_pdf_loader.py
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import repeat
+from typing import Any, Dict, Iterator, List, Optional
+
+import pypdf
+from langchain_core.document_loaders import BaseLoader
+from langchain_core.documents import Document
+
+# Metadata keys every PDF parser of langchain_community sets
+STANDARD_METADATA_KEYS = {"source", "total_pages", "creationdate", "creator", "producer"}
+
+# PDF readers opened inside each worker process (file path -> reader), so every worker parses the file structure once
+_worker_readers: Dict[str, pypdf.PdfReader] = {}
+
+
+# The metadata helpers below mirror the private ones of langchain_community.document_loaders.parsers.pdf
+# (langchain-community 0.3.25), so the pages get the same metadata as with PyPDFLoader without importing private names
+def _purge_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalize the PDF document metadata: lowercase keys without the leading "/", ISO dates, str / int values"""
+    new_metadata: Dict[str, Any] = {}
+    map_key = {"page_count": "total_pages", "file_path": "source"}
+    for key, value in metadata.items():
+        if type(value) not in [str, int]:
+            value = str(value)
+        if key.startswith("/"):
+            key = key[1:]
+        key = key.lower()
+        if key in ["creationdate", "moddate"]:
+            try:
+                new_metadata[key] = datetime.strptime(value.replace("'", ""), "D:%Y%m%d%H%M%S%z").isoformat("T")
+            except ValueError:
+                new_metadata[key] = value
+        elif key in map_key:
+            # Also keep the key name used by the other PDF parsers
+            new_metadata[map_key[key]] = value
+            new_metadata[key] = value
+        elif isinstance(value, str):
+            new_metadata[key] = value.strip()
+        elif isinstance(value, int):
+            new_metadata[key] = value
+    return new_metadata
+
+
+def _validate_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Check that the page metadata has the standard keys and an integer page number"""
+    if not STANDARD_METADATA_KEYS.issubset(metadata.keys()):
+        raise ValueError("The PDF parser must valorize the standard metadata.")
+    if not isinstance(metadata.get("page", 0), int):
+        raise ValueError("The PDF metadata page must be a integer.")
+    return metadata
+
+
+def _extract_pages(file_path: str, page_numbers: List[int]) -> List[str]:
+    """Extract the text of a few pages inside a worker process"""
+    if file_path not in _worker_readers:
+        _worker_readers[file_path] = pypdf.PdfReader(file_path)
+    reader = _worker_readers[file_path]
+    return [reader.pages[page_number].extract_text(extraction_mode="plain").strip() for page_number in page_numbers]
+
+
+class ParallelPyPDFLoader(BaseLoader):
+    """
+    Load a PDF with one document per page, extracting the pages on a process pool.
+
+    Args:
+        file_path: Path of the PDF file
+        max_workers: Number of worker processes, defaults to the number of cores
+        pages_per_task: Pages extracted per task (bigger tasks mean less inter-process overhead,
+            smaller ones mean the first pages are available sooner)
+    """
+
+    def __init__(self, file_path: str, max_workers: Optional[int] = None, pages_per_task: int = 4):
+        self.file_path = str(file_path)
+        self.max_workers = max_workers or os.cpu_count()
+        self.pages_per_task = pages_per_task
+
+    def lazy_load(self) -> Iterator[Document]:
+        # Read the document level metadata in the main process, like PyPDFParser does
+        reader = pypdf.PdfReader(self.file_path)
+        total_pages = len(reader.pages)
+        doc_metadata = _purge_metadata(
+            {"producer": "PyPDF", "creator": "PyPDF", "creationdate": ""}
+            | dict(reader.metadata or {})
+            | {"source": self.file_path, "total_pages": total_pages}
+        )
+        page_labels = reader.page_labels
+
+        tasks = [
+            list(range(start, min(start + self.pages_per_task, total_pages)))
+            for start in range(0, total_pages, self.pages_per_task)
+        ]
+
+        # executor.map yields the results in submission order, each one as soon as it (and the ones before it) are done
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            for page_numbers, texts in zip(tasks, executor.map(_extract_pages, repeat(self.file_path), tasks)):
+                for page_number, text in zip(page_numbers, texts):
+                    yield Document(
+                        page_content=text,
+                        metadata=_validate_metadata(
+                            doc_metadata | {"page": page_number, "page_label": page_labels[page_number]}
+                        ),
+                    )
+
+
+if __name__ == "__main__":
+    import time
+
+    from langchain_community.document_loaders import PyPDFLoader
+
+    # Benchmark parameters
+    PDF_PATH = "./vector_databases/ReAct_paper.pdf"
+    WORKER_COUNTS = sorted({1, 2, 4, os.cpu_count()})
+
+    start = time.perf_counter()
+    serial_pages = PyPDFLoader(PDF_PATH).load()
+    elapsed = time.perf_counter() - start
+    print(f"PyPDFLoader (serial)      : {len(serial_pages) / elapsed:7.1f} pages/sec")
+
+    for workers in WORKER_COUNTS:
+        start = time.perf_counter()
+        first_page_at = None
+        pages = []
+        for page in ParallelPyPDFLoader(PDF_PATH, max_workers=workers).lazy_load():
+            first_page_at = first_page_at or time.perf_counter() - start
+            pages.append(page)
+        elapsed = time.perf_counter() - start
+
+        assert [page.page_content for page in pages] == [page.page_content for page in serial_pages]
+        print(
+            f"ParallelPyPDFLoader ({workers:>2} workers): {len(pages) / elapsed:7.1f} pages/sec, "
+            f"first page after {first_page_at * 1000:.0f} ms"
+        )
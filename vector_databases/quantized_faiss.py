@@ -0,0 +1,312 @@
+"""
+Quantized FAISS vector store.
+
+The vectors are kept in a FAISS scalar quantizer index as float16 (2x smaller) or int8 (4x smaller)
+codes instead of float32. The full precision float32 vectors are written next to the index on disk
+(`full_precision.npy`) and memory-mapped at query time, so the top candidates found in the quantized
+index can optionally be re-scored with exact distances (L2 or inner product, like the float32 FAISS store)
+without keeping the float32 copy in RAM.
+
+Run this file directly to benchmark recall / latency / memory of every mode against the float32
+`faiss_index_react` build (falls back to synthetic 1536-dim vectors if the index was not built yet):
+python vector_databases/quantized_faiss.py
+"""
+
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_community.vectorstores.utils import DistanceStrategy
+
+# Map the storage modes to the FAISS scalar quantizer types
+QUANTIZATION_TYPES = {
+    "float16": faiss.ScalarQuantizer.QT_fp16,
+    "int8": faiss.ScalarQuantizer.QT_8bit,
+}
+
+# Map the supported distance strategies to the FAISS metrics of the quantized index
+METRIC_TYPES = {
+    DistanceStrategy.EUCLIDEAN_DISTANCE: faiss.METRIC_L2,
+    DistanceStrategy.MAX_INNER_PRODUCT: faiss.METRIC_INNER_PRODUCT,
+}
+
+# File holding the full precision vectors, row i is the vector stored at position i of the FAISS index
+FULL_PRECISION_FILE = "full_precision.npy"
+
+
+class QuantizedFAISS(FAISS):
+    """
+    FAISS store backed by a float16 / int8 scalar quantizer index with optional exact re-scoring.
+
+    Args:
+        rescore: Re-rank the candidates with the full precision vectors (needs them in memory or on disk)
+        rescore_factor: How many candidates to pull from the quantized index per requested result
+        full_precision: float32 matrix (or memory-mapped .npy file) with one row per indexed vector,
+            normalized like the indexed vectors when normalize_L2 is set
+    """
+
+    def __init__(
+        self,
+        *args: Any,
+        rescore: bool = True,
+        rescore_factor: int = 4,
+        full_precision: Optional[np.ndarray] = None,
+        **kwargs: Any,
+    ):
+        super().__init__(*args, **kwargs)
+        if self.distance_strategy not in METRIC_TYPES:
+            raise ValueError(
+                f"distance_strategy must be one of {[strategy.value for strategy in METRIC_TYPES]}, "
+                f"got {self.distance_strategy!r}"
+            )
+        self.rescore = rescore
+        self.rescore_factor = rescore_factor
+        self.full_precision = full_precision
+
+    # Define the constructors
+    @classmethod
+    def from_embeddings(
+        cls,
+        text_embeddings: Iterable[Tuple[str, List[float]]],
+        embedding: Embeddings,
+        metadatas: Optional[Iterable[dict]] = None,
+        ids: Optional[List[str]] = None,
+        quantization: str = "int8",
+        **kwargs: Any,
+    ) -> "QuantizedFAISS":
+        """Train the scalar quantizer on the vectors and add them to a new quantized index"""
+        if quantization not in QUANTIZATION_TYPES:
+            raise ValueError(f"quantization must be one of {list(QUANTIZATION_TYPES)}, got {quantization!r}")
+
+        text_embeddings = list(text_embeddings)
+        vectors = np.array([vector for _, vector in text_embeddings], dtype=np.float32)
+        distance_strategy = kwargs.get("distance_strategy", DistanceStrategy.EUCLIDEAN_DISTANCE)
+        if distance_strategy not in METRIC_TYPES:
+            raise ValueError(
+                f"distance_strategy must be one of {[strategy.value for strategy in METRIC_TYPES]}, "
+                f"got {distance_strategy!r}"
+            )
+        if kwargs.get("normalize_L2"):
+            faiss.normalize_L2(vectors)
+
+        # The int8 quantizer learns the per-dimension value ranges from the data (as they are indexed)
+        index = faiss.IndexScalarQuantizer(vectors.shape[1], QUANTIZATION_TYPES[quantization], METRIC_TYPES[distance_strategy])
+        index.train(vectors)
+
+        store = cls(embedding, index, InMemoryDocstore(), {}, **kwargs)
+        store.add_embeddings(text_embeddings, metadatas=metadatas, ids=ids)
+        return store
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> "QuantizedFAISS":
+        vectors = embedding.embed_documents(texts)
+        return cls.from_embeddings(zip(texts, vectors), embedding, metadatas=metadatas, ids=ids, **kwargs)
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        vectors = self._embed_documents(texts)
+        return self.add_embeddings(zip(texts, vectors), metadatas=metadatas, ids=ids, **kwargs)
+
+    def add_embeddings(
+        self,
+        text_embeddings: Iterable[Tuple[str, List[float]]],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """Add the vectors to the quantized index and keep their full precision copy for re-scoring"""
+        text_embeddings = list(text_embeddings)
+        vectors = np.array([vector for _, vector in text_embeddings], dtype=np.float32)
+        if self._normalize_L2:
+            # Keep the rows the index is searched with, the query is normalized too
+            faiss.normalize_L2(vectors)
+        if self.full_precision is None:
+            self.full_precision = vectors
+        else:
+            self.full_precision = np.concatenate([self.full_precision, vectors])
+        return super().add_embeddings(text_embeddings, metadatas=metadatas, ids=ids, **kwargs)
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        """Delete the vectors from the quantized index and drop their rows from the full precision copy"""
+        deleted_ids = set(ids or [])
+        positions = [position for position, doc_id in self.index_to_docstore_id.items() if doc_id in deleted_ids]
+        deleted = super().delete(ids, **kwargs)
+        if self.full_precision is not None:
+            # The remaining rows move up like the FAISS positions do (a memory-mapped copy is read into RAM)
+            self.full_precision = np.delete(np.asarray(self.full_precision, dtype=np.float32), positions, axis=0)
+        return deleted
+
+    def merge_from(self, target: FAISS) -> None:
+        """Append the vectors of another store, with their full precision copy"""
+        if self.full_precision is not None and getattr(target, "full_precision", None) is None:
+            raise ValueError("Can only merge a QuantizedFAISS store that has its full precision vectors")
+        super().merge_from(target)
+        if self.full_precision is not None:
+            self.full_precision = np.concatenate(
+                [np.asarray(self.full_precision, dtype=np.float32), np.asarray(target.full_precision, dtype=np.float32)]
+            )
+
+    # Define the persistence methods
+    def save_local(self, folder_path: str, index_name: str = "index") -> None:
+        """Save the quantized index and write the full precision vectors next to it"""
+        super().save_local(folder_path, index_name)
+        if self.full_precision is not None:
+            full_precision_path = Path(folder_path) / FULL_PRECISION_FILE
+            np.save(full_precision_path, np.asarray(self.full_precision, dtype=np.float32))
+
+            # From now on only read the rows that are needed for re-scoring
+            self.full_precision = np.load(full_precision_path, mmap_mode="r")
+
+    @classmethod
+    def load_local(
+        cls,
+        folder_path: str,
+        embeddings: Embeddings,
+        index_name: str = "index",
+        **kwargs: Any,
+    ) -> "QuantizedFAISS":
+        store = super().load_local(folder_path, embeddings, index_name, **kwargs)
+        full_precision_path = Path(folder_path) / FULL_PRECISION_FILE
+        if full_precision_path.exists():
+            store.full_precision = np.load(full_precision_path, mmap_mode="r")
+        return store
+
+    # Define the search method
+    def similarity_search_with_score_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Union[Callable, Dict[str, Any]]] = None,
+        fetch_k: int = 20,
+        **kwargs: Any,
+    ) -> List[Tuple[Document, float]]:
+        """
+        Search the quantized index, then re-score the top `k * rescore_factor` candidates with their
+        exact distance to the query: L2 (lower score represents more similarity) or inner product
+        with MAX_INNER_PRODUCT (higher score represents more similarity), like FAISS.
+        """
+        if not self.rescore or self.full_precision is None:
+            return super().similarity_search_with_score_by_vector(embedding, k, filter, fetch_k, **kwargs)
+
+        query = np.array([embedding], dtype=np.float32)
+        if self._normalize_L2:
+            faiss.normalize_L2(query)
+
+        num_candidates = k * self.rescore_factor if filter is None else max(fetch_k, k * self.rescore_factor)
+        _, indices = self.index.search(query, num_candidates)
+        candidates = indices[0][indices[0] != -1]
+
+        # Exact distances, reading only the candidate rows from the (memory-mapped) full precision matrix
+        exact_vectors = np.asarray(self.full_precision[np.sort(candidates)], dtype=np.float32)
+        if self.distance_strategy == DistanceStrategy.MAX_INNER_PRODUCT:
+            exact_scores = exact_vectors @ query[0]
+            order = np.argsort(-exact_scores)
+        else:
+            exact_scores = ((exact_vectors - query) ** 2).sum(axis=1)
+            order = np.argsort(exact_scores)
+
+        filter_func = self._create_filter_func(filter) if filter is not None else None
+        score_threshold = kwargs.get("score_threshold")
+
+        docs = []
+        for position, score in zip(np.sort(candidates)[order], exact_scores[order]):
+            doc = self.docstore.search(self.index_to_docstore_id[position])
+            if filter_func is not None and not filter_func(doc.metadata):
+                continue
+            if score_threshold is not None and (
+                score < score_threshold
+                if self.distance_strategy == DistanceStrategy.MAX_INNER_PRODUCT
+                else score > score_threshold
+            ):
+                continue
+            docs.append((doc, float(score)))
+            if len(docs) == k:
+                break
+        return docs
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+
+    # Benchmark parameters
+    FLOAT32_INDEX_PATH = "./vector_databases/faiss_index_react/index.faiss"
+    NUM_SYNTHETIC_VECTORS = 20_000
+    NUM_QUERIES = 200
+    K = 4
+
+    # Use the vectors of the float32 build as the corpus if it exists, else synthetic unit vectors
+    if os.path.exists(FLOAT32_INDEX_PATH):
+        flat_index = faiss.read_index(FLOAT32_INDEX_PATH)
+        vectors = flat_index.reconstruct_n(0, flat_index.ntotal)
+        print(f"Loaded {len(vectors)} vectors from {FLOAT32_INDEX_PATH}")
+    else:
+        vectors = np.random.default_rng(0).standard_normal((NUM_SYNTHETIC_VECTORS, 1536), dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        print(f"{FLOAT32_INDEX_PATH} not found, using {len(vectors)} synthetic 1536-dim vectors")
+
+    # Queries are perturbed corpus vectors, so they have real near neighbours like actual questions do
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.integers(0, len(vectors), NUM_QUERIES)]
+    queries = queries + 0.05 * rng.standard_normal(queries.shape, dtype=np.float32)
+
+    # Ground truth from the exact float32 index
+    exact_index = faiss.IndexFlatL2(vectors.shape[1])
+    exact_index.add(vectors)
+    _, ground_truth = exact_index.search(queries, K)
+
+    embedding = DeterministicFakeEmbedding(size=vectors.shape[1])
+    text_embeddings = [(f"chunk {i}", vector) for i, vector in enumerate(vectors.tolist())]
+
+    def run_queries(search: Callable[[List[float]], List[int]]) -> Tuple[float, float]:
+        hits, start = 0, time.perf_counter()
+        for query, expected in zip(queries, ground_truth):
+            hits += len(set(search(query.tolist())) & set(expected.tolist()))
+        return hits / ground_truth.size, (time.perf_counter() - start) / NUM_QUERIES * 1000
+
+    recall, latency_ms = run_queries(lambda q: exact_index.search(np.array([q], dtype=np.float32), K)[1][0].tolist())
+    index_bytes = len(faiss.serialize_index(exact_index))
+    print(f"{'mode':<18}{'recall@' + str(K):>10}{'latency ms':>12}{'index MB':>10}")
+    print(f"{'float32':<18}{recall:>10.3f}{latency_ms:>12.3f}{index_bytes / 1e6:>10.2f}")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for quantization in QUANTIZATION_TYPES:
+            store = QuantizedFAISS.from_embeddings(text_embeddings, embedding, quantization=quantization)
+            store.save_local(os.path.join(tmp_dir, quantization))
+            store = QuantizedFAISS.load_local(
+                os.path.join(tmp_dir, quantization), embedding, allow_dangerous_deserialization=True
+            )
+            docstore_position = {doc_id: position for position, doc_id in store.index_to_docstore_id.items()}
+
+            for rescore in (False, True):
+                store.rescore = rescore
+                recall, latency_ms = run_queries(
+                    lambda q: [
+                        docstore_position[doc.id]
+                        for doc, _ in store.similarity_search_with_score_by_vector(q, K)
+                    ]
+                )
+                mode = quantization + (" + rescore" if rescore else "")
+                index_bytes = len(faiss.serialize_index(store.index))
+                print(f"{mode:<18}{recall:>10.3f}{latency_ms:>12.3f}{index_bytes / 1e6:>10.2f}")
@@ -0,0 +1,338 @@
+"""
+Sharded FAISS vector store.
+
+The vectors are partitioned across N FAISS shards (one folder per shard on disk), every query is
+embedded once and then searched on all shards concurrently (thread pool or process pool), and the
+per-shard top-k results are merged into a single global top-k.
+
+Run this file directly to benchmark queries/sec scaling with the number of shards and workers on
+synthetic embeddings (no API key needed):
+python vector_databases/sharded_faiss.py
+"""
+
+import heapq
+import json
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+# Name of the file that describes the shard layout of a saved store
+SHARDS_MANIFEST = "shards.json"
+
+# Shard loaded by a worker process. Every shard has its own single-worker pool, so a process only ever holds one shard
+_worker_shard: Optional[FAISS] = None
+
+
+def _shard_folder(folder_path: str, shard_id: int) -> str:
+    return os.path.join(folder_path, f"shard_{shard_id}")
+
+
+class _QueryVectorsOnly(Embeddings):
+    """Embeddings of the shards loaded in the worker processes, the queries are embedded once in the main process"""
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        raise NotImplementedError("The worker shards are only searched by vector")
+
+    def embed_query(self, text: str) -> List[float]:
+        raise NotImplementedError("The worker shards are only searched by vector")
+
+
+def _load_shard_in_worker(shard_path: str) -> None:
+    """Initializer of a worker process: read its shard from disk once"""
+    global _worker_shard
+    _worker_shard = FAISS.load_local(shard_path, _QueryVectorsOnly(), allow_dangerous_deserialization=True)
+
+
+def _search_shard_in_worker(embedding: List[float], k: int, kwargs: Dict[str, Any]) -> List[Tuple[Document, float]]:
+    """Search the shard of this worker process, with the same search arguments (filter, fetch_k...) as FAISS"""
+    return _worker_shard.similarity_search_with_score_by_vector(embedding, k, **kwargs)
+
+
+class ShardedFAISS(VectorStore):
+    """
+    Vector store that splits the vectors across several FAISS indexes and searches them concurrently.
+
+    Args:
+        embedding: Embeddings model used to embed the documents and the queries
+        shards: List of FAISS stores, one per shard (empty for the process executor, the shards stay on disk)
+        folder_path: Folder the shards were saved to (required for the process executor)
+        executor: "thread" to search the in-memory shards on a thread pool (FAISS releases the GIL),
+            "process" to search the saved shards loaded inside worker processes, one process per shard.
+            The process store is read-only: the workers only see what was saved
+        max_workers: Size of the thread pool, defaults to the number of shards
+        num_shards: Number of saved shards (process executor)
+    """
+
+    def __init__(
+        self,
+        embedding: Embeddings,
+        shards: List[FAISS],
+        folder_path: Optional[str] = None,
+        executor: str = "thread",
+        max_workers: Optional[int] = None,
+        num_shards: Optional[int] = None,
+    ):
+        if executor not in ("thread", "process"):
+            raise ValueError(f"executor must be 'thread' or 'process', got {executor!r}")
+        if executor == "process" and folder_path is None:
+            raise ValueError("The process executor needs the shards on disk, save the store and use load_local()")
+
+        self.embedding = embedding
+        self.shards = shards
+        self.folder_path = folder_path
+        self.executor = executor
+        self._num_shards = num_shards if num_shards is not None else len(shards)
+        self.max_workers = max_workers or self._num_shards
+        self._pools: Optional[List[Executor]] = None
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+
+    @property
+    def num_shards(self) -> int:
+        return self._num_shards
+
+    def _check_writable(self) -> None:
+        # The workers load their shard once, a change made in this process would never reach them
+        if self.executor == "process":
+            raise ValueError(
+                "A store searched by worker processes is read-only, "
+                "update it with executor='thread', save it and load it again"
+            )
+
+    def _get_pools(self) -> List[Executor]:
+        # The pools are created once and reused by every query
+        if self._pools is None:
+            if self.executor == "process":
+                # One single-worker pool per shard: each process loads its own shard and no other
+                # (the main process does not load any), so the processes together hold the index once
+                self._pools = [
+                    ProcessPoolExecutor(
+                        max_workers=1,
+                        initializer=_load_shard_in_worker,
+                        initargs=(_shard_folder(self.folder_path, shard_id),),
+                    )
+                    for shard_id in range(self.num_shards)
+                ]
+            else:
+                self._pools = [ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="faiss-shard")]
+        return self._pools
+
+    def close(self) -> None:
+        """Shut down the worker pools"""
+        if self._pools is not None:
+            for pool in self._pools:
+                pool.shutdown()
+            self._pools = None
+
+    # Define the constructors
+    @classmethod
+    def from_embeddings(
+        cls,
+        text_embeddings: Iterable[Tuple[str, List[float]]],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        num_shards: int = 4,
+        **kwargs: Any,
+    ) -> "ShardedFAISS":
+        """Build the store from already computed embeddings, assigning the vectors to the shards round-robin"""
+        if num_shards < 1:
+            raise ValueError("num_shards must be at least 1")
+
+        text_embeddings = list(text_embeddings)
+        shards = []
+        for shard_id in range(num_shards):
+            positions = range(shard_id, len(text_embeddings), num_shards)
+            if not positions:
+                break
+            shards.append(
+                FAISS.from_embeddings(
+                    [text_embeddings[i] for i in positions],
+                    embedding,
+                    metadatas=[metadatas[i] for i in positions] if metadatas else None,
+                    ids=[ids[i] for i in positions] if ids else None,
+                )
+            )
+        return cls(embedding, shards, **kwargs)
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        num_shards: int = 4,
+        **kwargs: Any,
+    ) -> "ShardedFAISS":
+        """Embed the texts once and partition the vectors across `num_shards` FAISS indexes"""
+        vectors = embedding.embed_documents(texts)
+        return cls.from_embeddings(
+            zip(texts, vectors), embedding, metadatas=metadatas, ids=ids, num_shards=num_shards, **kwargs
+        )
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """Embed the texts and add each one to the currently smallest shard"""
+        self._check_writable()
+        texts = list(texts)
+        vectors = self.embedding.embed_documents(texts)
+        added_ids = []
+        for i, (text, vector) in enumerate(zip(texts, vectors)):
+            shard = min(self.shards, key=lambda s: s.index.ntotal)
+            added_ids += shard.add_embeddings(
+                [(text, vector)],
+                metadatas=[metadatas[i]] if metadatas else None,
+                ids=[ids[i]] if ids else None,
+            )
+        return added_ids
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        """Delete the ids from the shards holding them"""
+        self._check_writable()
+        if ids is None:
+            raise ValueError("No ids provided to delete.")
+        missing_ids = set(ids).difference(
+            doc_id for shard in self.shards for doc_id in shard.index_to_docstore_id.values()
+        )
+        if missing_ids:
+            raise ValueError(f"Some specified ids do not exist in the current store. Ids not found: {missing_ids}")
+        for shard in self.shards:
+            shard_doc_ids = set(shard.index_to_docstore_id.values())
+            shard_ids = [doc_id for doc_id in ids if doc_id in shard_doc_ids]
+            if shard_ids:
+                shard.delete(shard_ids)
+        return True
+
+    # Define the persistence methods
+    def save_local(self, folder_path: str) -> None:
+        """Save every shard to its own sub folder together with a small manifest"""
+        self._check_writable()
+        Path(folder_path).mkdir(parents=True, exist_ok=True)
+        for shard_id, shard in enumerate(self.shards):
+            shard.save_local(_shard_folder(folder_path, shard_id))
+        with open(os.path.join(folder_path, SHARDS_MANIFEST), "w") as f:
+            json.dump({"num_shards": self.num_shards}, f)
+        self.folder_path = folder_path
+
+    @classmethod
+    def load_local(
+        cls,
+        folder_path: str,
+        embeddings: Embeddings,
+        *,
+        allow_dangerous_deserialization: bool = False,
+        **kwargs: Any,
+    ) -> "ShardedFAISS":
+        """Load the shards saved with save_local(), with executor="process" only the worker processes load them"""
+        with open(os.path.join(folder_path, SHARDS_MANIFEST)) as f:
+            num_shards = json.load(f)["num_shards"]
+
+        if kwargs.get("executor") == "process":
+            if not allow_dangerous_deserialization:
+                raise ValueError("Loading the shards deserializes pickle files, set allow_dangerous_deserialization=True")
+            return cls(embeddings, [], folder_path=folder_path, num_shards=num_shards, **kwargs)
+
+        shards = [
+            FAISS.load_local(
+                _shard_folder(folder_path, shard_id),
+                embeddings,
+                allow_dangerous_deserialization=allow_dangerous_deserialization,
+            )
+            for shard_id in range(num_shards)
+        ]
+        return cls(embeddings, shards, folder_path=folder_path, **kwargs)
+
+    # Define the search methods
+    def similarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        """Search every shard concurrently and merge the per-shard top-k into the global top-k (lowest L2 distance first)"""
+        pools = self._get_pools()
+        if self.executor == "process":
+            if callable(kwargs.get("filter")):
+                raise ValueError("The process executor cannot send a callable filter to the workers, use a dict filter")
+            futures = [pool.submit(_search_shard_in_worker, embedding, k, kwargs) for pool in pools]
+        else:
+            futures = [
+                pools[0].submit(shard.similarity_search_with_score_by_vector, embedding, k, **kwargs)
+                for shard in self.shards
+            ]
+
+        candidates = [doc_and_score for future in futures for doc_and_score in future.result()]
+        return heapq.nsmallest(k, candidates, key=lambda doc_and_score: doc_and_score[1])
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self.embedding.embed_query(query), k, **kwargs)
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, **kwargs)]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, **kwargs)]
+
+    def _select_relevance_score_fn(self):
+        # All shards are plain FAISS L2 indexes
+        return self._euclidean_relevance_score_fn
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    import faiss
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+
+    # Benchmark parameters
+    NUM_VECTORS = 100_000
+    DIMENSIONS = 512
+    NUM_QUERIES = 200
+    K = 4
+    SHARD_COUNTS = [1, 2, 4, 8]
+
+    # Pin FAISS to a single OpenMP thread so that the scaling comes from the shards and not from FAISS itself
+    faiss.omp_set_num_threads(1)
+
+    print(f"Building {NUM_VECTORS} synthetic {DIMENSIONS}-dim vectors ({os.cpu_count()} cores available)...")
+    rng = np.random.default_rng(42)
+    vectors = rng.standard_normal((NUM_VECTORS, DIMENSIONS), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = rng.standard_normal((NUM_QUERIES, DIMENSIONS), dtype=np.float32)
+    embedding = DeterministicFakeEmbedding(size=DIMENSIONS)
+    text_embeddings = [(f"doc {i}", vector) for i, vector in enumerate(vectors.tolist())]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for num_shards in SHARD_COUNTS:
+            store = ShardedFAISS.from_embeddings(text_embeddings, embedding, num_shards=num_shards)
+            folder_path = os.path.join(tmp_dir, f"sharded_{num_shards}")
+            store.save_local(folder_path)
+
+            for executor in ("thread", "process"):
+                store = ShardedFAISS.load_local(
+                    folder_path, embedding, allow_dangerous_deserialization=True, executor=executor
+                )
+                # Warm up the pools so that every worker has loaded its shard before timing
+                for query in queries[: 4 * num_shards]:
+                    store.similarity_search_with_score_by_vector(query.tolist(), K)
+
+                start = time.perf_counter()
+                for query in queries:
+                    store.similarity_search_with_score_by_vector(query.tolist(), K)
+                elapsed = time.perf_counter() - start
+                store.close()
+
+                print(f"shards={num_shards} executor={executor:<7} -> {NUM_QUERIES / elapsed:8.1f} queries/sec")
@@ -0,0 +1,56 @@
+"""
+Tests for the batched query API (no network needed, synthetic vectors and a fake embedding).
+To run them go to the root directory and run the command:
+pytest -s -v vector_databases/tests
+"""
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+import pytest
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from batch_query import batch_search, positions_to_ids
+
+DIMENSIONS = 16
+K = 4
+
+
+# Define test for the batched results against one similarity search per question
+@pytest.mark.parametrize("normalize_L2", [False, True])
+@pytest.mark.parametrize("to_disk", [False, True])
+def test_batch_search_equals_per_query_search(tmp_path, normalize_L2, to_disk) -> None:
+    embedding = DeterministicFakeEmbedding(size=DIMENSIONS)
+    vectors = np.random.default_rng(0).standard_normal((200, DIMENSIONS)).astype(np.float32) * 3
+    vectorstore = FAISS.from_embeddings(
+        [(f"doc {i}", vector) for i, vector in enumerate(vectors.tolist())], embedding, normalize_L2=normalize_L2
+    )
+    questions = [f"question number {i}" for i in range(25)]
+
+    # A batch size that does not divide the number of questions checks the last partial batch
+    positions, scores = batch_search(
+        vectorstore,
+        questions,
+        k=K,
+        batch_size=10,
+        output_dir=str(tmp_path) if to_disk else None,
+        normalize_L2=normalize_L2,
+    )
+    ids = positions_to_ids(vectorstore, positions)
+
+    assert positions.shape == scores.shape == (len(questions), K)
+    for question, row_ids, row_scores in zip(questions, ids, scores):
+        expected = vectorstore.similarity_search_with_score_by_vector(embedding.embed_query(question), k=K)
+        assert list(row_ids) == [doc.id for doc, _ in expected]
+        np.testing.assert_allclose(row_scores, [score for _, score in expected], rtol=1e-5)
+
+
+def test_missing_hits_have_no_id() -> None:
+    embedding = DeterministicFakeEmbedding(size=DIMENSIONS)
+    vectorstore = FAISS.from_texts(["only", "two"], embedding)
+    positions, _ = batch_search(vectorstore, ["a question"], k=3)
+    assert positions[0, 2] == -1
+    assert positions_to_ids(vectorstore, positions)[0, 2] is None
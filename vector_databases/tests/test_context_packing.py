@@ -0,0 +1,83 @@
+"""
+Tests for the context packer (no network needed, tokens are counted as words instead of with the tiktoken encoding).
+To run them go to the root directory and run the command:
+pytest -s -v vector_databases/tests
+"""
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+import pytest
+from langchain_core.documents import Document
+
+import context_packing
+from context_packing import pack_documents
+
+TEXT = " ".join(f"word{i}" for i in range(60))
+
+
+@pytest.fixture(autouse=True)
+def word_count_tokens(monkeypatch):
+    # The tiktoken encoding is downloaded on first use, words are enough to check the budget
+    monkeypatch.setattr(context_packing, "count_tokens", lambda text: len(text.split()))
+
+
+def chunk(start: int, end: int, source: str = "paper.pdf", page: int = 0) -> Document:
+    """Chunk of TEXT between two character offsets, like the splitter returns it with add_start_index=True"""
+    content = TEXT[start:end]
+    return Document(
+        page_content=content,
+        metadata={"source": source, "page": page, "start_index": start, "token_count": len(content.split())},
+    )
+
+
+# Define tests for the merge of the overlapping chunks
+def test_overlapping_chunks_are_merged() -> None:
+    [packed] = pack_documents([chunk(0, 40), chunk(30, 80)], max_tokens=100)
+    assert packed.page_content == TEXT[0:80]
+    assert packed.metadata["start_index"] == 0
+    assert packed.metadata["token_count"] == len(TEXT[0:80].split())
+
+
+def test_merge_is_transitive() -> None:
+    # C does not touch B, but chains with it through A (whatever the rank order)
+    a, b, c = chunk(30, 80), chunk(0, 40), chunk(70, 120)
+    for docs in ([a, b, c], [b, c, a], [c, b, a]):
+        [packed] = pack_documents(docs, max_tokens=100)
+        assert packed.page_content == TEXT[0:120]
+
+
+def test_merged_block_keeps_the_best_rank_and_metadata() -> None:
+    best, other, merged_late = chunk(200, 240), chunk(0, 40), chunk(30, 80)
+    best.metadata["score"] = 1.0
+    packed = pack_documents([best, other, merged_late], max_tokens=100)
+    assert [doc.page_content for doc in packed] == [TEXT[200:240], TEXT[0:80]]
+    assert packed[0] is best
+
+
+def test_pdf_pages_are_kept_separate() -> None:
+    # Same offsets on two pages of the same file are two different texts
+    packed = pack_documents([chunk(0, 40, page=0), chunk(30, 80, page=1)], max_tokens=100)
+    assert [(doc.metadata["page"], doc.page_content) for doc in packed] == [(0, TEXT[0:40]), (1, TEXT[30:80])]
+
+
+def test_duplicates_are_dropped() -> None:
+    doc = chunk(0, 40)
+    assert pack_documents([doc, chunk(0, 40, source="copy.pdf")], max_tokens=100) == [doc]
+
+
+# Define tests for the token budget
+def test_budget_keeps_the_best_ranked_blocks() -> None:
+    first, second, third = chunk(0, 40), chunk(100, 160), chunk(200, 240)
+    tokens = [doc.metadata["token_count"] for doc in (first, second, third)]
+    packed = pack_documents([first, second, third], max_tokens=tokens[0] + tokens[2])
+    # The second block does not fit anymore, the smaller third one still does
+    assert packed == [first, third]
+    assert sum(doc.metadata["token_count"] for doc in packed) <= tokens[0] + tokens[2]
+
+
+def test_too_big_merged_block_falls_back_to_its_best_chunk() -> None:
+    best, overlapping = chunk(0, 40), chunk(30, 120)
+    packed = pack_documents([best, overlapping], max_tokens=best.metadata["token_count"])
+    assert packed == [best]
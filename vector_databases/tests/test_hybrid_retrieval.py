@@ -0,0 +1,102 @@
+"""
+Tests for the BM25 index and the hybrid retriever (no network needed, the vector store uses a fake embedding).
+To run them go to the root directory and run the command:
+pytest -s -v vector_databases/tests
+"""
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+import pytest
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from hybrid_retrieval import BM25Index, HybridRetriever, LocalBM25Retriever, looks_like_identifier, reciprocal_rank_fusion
+
+
+# Define the fake embedding counting the query embeddings (the network call the fast path skips)
+class CountingFakeEmbedding(DeterministicFakeEmbedding):
+    query_calls: int = 0
+
+    def embed_query(self, text: str) -> list:
+        self.query_calls += 1
+        return super().embed_query(text)
+
+
+@pytest.fixture
+def documents():
+    return [
+        Document(page_content="Split documents with the RecursiveCharacterTextSplitter", metadata={"source": "splitters.md"}),
+        Document(page_content="create_retrieval_chain combines a retriever and a documents chain", metadata={"source": "chains.md"}),
+        Document(page_content="ReAct interleaves reasoning traces and actions", metadata={"source": "react.pdf", "page": 0}),
+        Document(page_content="Agents use tools to act on the environment", metadata={"source": "react.pdf", "page": 1}),
+    ]
+
+
+@pytest.fixture
+def hybrid(documents):
+    embedding = CountingFakeEmbedding(size=16)
+    vector_retriever = FAISS.from_documents(documents, embedding).as_retriever(search_kwargs={"k": 2})
+    bm25_retriever = LocalBM25Retriever(index=BM25Index.from_documents(documents), k=2)
+    return HybridRetriever(bm25_retriever=bm25_retriever, vector_retriever=vector_retriever, k=2), embedding
+
+
+# Define test for the persistence of the BM25 index
+def test_bm25_save_load_round_trip(documents, tmp_path) -> None:
+    index = BM25Index.from_documents(documents, k1=1.2, b=0.5)
+    index.save_local(str(tmp_path))
+    loaded = BM25Index.load_local(str(tmp_path))
+
+    assert loaded.vocabulary == index.vocabulary
+    for name in ("offsets", "postings_doc_ids", "postings_term_freqs", "doc_lengths"):
+        assert np.array_equal(getattr(loaded, name), getattr(index, name))
+    assert (loaded.k1, loaded.b) == (1.2, 0.5)
+    assert loaded.documents == index.documents
+    for query in ("text splitter", "reasoning and actions", "RecursiveCharacterTextSplitter", "unknown words"):
+        assert loaded.search(query, k=3) == index.search(query, k=3)
+
+
+def test_bm25_matches_identifier_parts(documents) -> None:
+    index = BM25Index.from_documents(documents)
+    assert index.search("RecursiveCharacterTextSplitter", k=1)[0][0] == documents[0]
+    assert index.search("text splitter", k=1)[0][0] == documents[0]
+    assert index.search("nothing matches this") == []
+
+
+# Define test for the reciprocal rank fusion order
+def test_reciprocal_rank_fusion_ordering(documents) -> None:
+    a, b, c, d = documents
+    # b is in both rankings, a is first in one ranking only, then c (second) and d (third)
+    assert reciprocal_rank_fusion([[a, b, d], [b, c]], k=4, rrf_k=60) == [b, a, c, d]
+    # The same chunk coming from both retrievers is counted once
+    assert reciprocal_rank_fusion([[a], [Document(page_content=a.page_content, metadata=dict(a.metadata))]], k=4) == [a]
+    assert reciprocal_rank_fusion([[a, b, c], [c]], k=2) == [c, a]
+
+
+# Define test for the identifier fast path: BM25 answers alone, the query is not embedded
+@pytest.mark.parametrize("ainvoke", [False, True])
+def test_identifier_fast_path_skips_the_vector_search(hybrid, documents, ainvoke) -> None:
+    retriever, embedding = hybrid
+    invoke = (lambda query: asyncio.run(retriever.ainvoke(query))) if ainvoke else retriever.invoke
+
+    assert looks_like_identifier("create_retrieval_chain()")
+    assert invoke("create_retrieval_chain()")[0] == documents[1]
+    assert embedding.query_calls == 0
+
+    # A natural language question goes through both retrievers
+    assert not looks_like_identifier("How do agents act on the environment?")
+    assert documents[3] in invoke("How do agents act on the environment?")
+    assert embedding.query_calls == 1
+
+    # An identifier BM25 does not know falls back to the hybrid search
+    invoke("UnknownClassName")
+    assert embedding.query_calls == 2
+
+    # Without the fast path every query is embedded
+    retriever.identifier_fast_path = False
+    invoke("create_retrieval_chain()")
+    assert embedding.query_calls == 3
@@ -0,0 +1,73 @@
+"""
+Tests for the parallel PDF loader (no network needed, the PDF files are generated with pypdf).
+To run them go to the root directory and run the command:
+pytest -s -v vector_databases/tests
+"""
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+import pytest
+from langchain_community.document_loaders import PyPDFLoader
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from pypdf import PdfWriter
+from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+import faiss_vectorstore
+from parallel_pdf_loader import ParallelPyPDFLoader
+
+PAGE_TEXTS = [f"Page {number} of the generated paper" for number in range(1, 8)]
+
+
+def write_pdf(path, page_texts) -> str:
+    """Write a PDF with one page per text (an empty text gives a page without any text, like a scanned page)"""
+    writer = PdfWriter()
+    font = DictionaryObject(
+        {
+            NameObject("/Type"): NameObject("/Font"),
+            NameObject("/Subtype"): NameObject("/Type1"),
+            NameObject("/BaseFont"): NameObject("/Helvetica"),
+        }
+    )
+    for text in page_texts:
+        page = writer.add_blank_page(width=612, height=792)
+        if text:
+            page[NameObject("/Resources")] = DictionaryObject(
+                {NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})}
+            )
+            content = DecodedStreamObject()
+            content.set_data(f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode("latin-1"))
+            page.replace_contents(content)
+    writer.add_metadata({"/Title": "Generated paper", "/CreationDate": "D:20240102030405+00'00'"})
+    with open(path, "wb") as f:
+        writer.write(f)
+    return str(path)
+
+
+# Define test for the pages of the parallel loader against PyPDFLoader
+@pytest.mark.parametrize("max_workers, pages_per_task", [(1, 4), (3, 2), (2, 1)])
+def test_pages_equal_pypdf_loader_pages(tmp_path, max_workers, pages_per_task) -> None:
+    pdf_path = write_pdf(tmp_path / "paper.pdf", PAGE_TEXTS)
+
+    expected = PyPDFLoader(pdf_path).load()
+    pages = list(ParallelPyPDFLoader(pdf_path, max_workers=max_workers, pages_per_task=pages_per_task).lazy_load())
+
+    assert len(pages) == len(expected) == len(PAGE_TEXTS)
+    for page, expected_page, text in zip(pages, expected, PAGE_TEXTS):
+        assert page.page_content == expected_page.page_content == text
+        assert page.metadata == expected_page.metadata
+
+
+# Define test for a PDF without any text: building its index fails with a clear error
+def test_pdf_without_text_cannot_be_indexed(tmp_path, monkeypatch) -> None:
+    pdf_path = write_pdf(tmp_path / "scanned.pdf", ["", ""])
+    assert [page.page_content for page in ParallelPyPDFLoader(pdf_path).lazy_load()] == ["", ""]
+
+    # There are no chunks to count the tokens of, and the tiktoken encoding would be downloaded on first use
+    monkeypatch.setattr(faiss_vectorstore, "add_token_counts", lambda docs: docs)
+    for num_shards, vector_storage in ((1, "float32"), (1, "int8"), (2, "float32")):
+        with pytest.raises(ValueError, match="No text could be extracted"):
+            faiss_vectorstore.build_vectorstore(
+                pdf_path, DeterministicFakeEmbedding(size=16), num_shards=num_shards, vector_storage=vector_storage
+            )
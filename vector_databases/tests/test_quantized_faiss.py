@@ -0,0 +1,72 @@
+"""
+Tests for the quantized FAISS store (no network needed, synthetic vectors and a fake embedding).
+To run them go to the root directory and run the command:
+pytest -s -v vector_databases/tests
+"""
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+import pytest
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from quantized_faiss import QUANTIZATION_TYPES, QuantizedFAISS
+
+DIMENSIONS = 16
+K = 5
+
+
+@pytest.fixture
+def corpus():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((300, DIMENSIONS)).astype(np.float32) * rng.uniform(0.5, 2.0, (300, 1)).astype(np.float32)
+    text_embeddings = [(f"doc {i}", vector) for i, vector in enumerate(vectors.tolist())]
+    queries = rng.standard_normal((10, DIMENSIONS)).astype(np.float32).tolist()
+    return text_embeddings, queries
+
+
+def top_k(results):
+    return [(doc.page_content, round(float(score), 3)) for doc, score in results]
+
+
+# Define test for the re-scored top-k against a flat float32 index, for every supported score configuration
+@pytest.mark.parametrize("quantization", list(QUANTIZATION_TYPES))
+@pytest.mark.parametrize(
+    "store_kwargs",
+    [
+        {},
+        {"normalize_L2": True},
+        {"distance_strategy": DistanceStrategy.MAX_INNER_PRODUCT},
+    ],
+    ids=["l2", "normalized_l2", "inner_product"],
+)
+def test_rescored_top_k_equals_flat_top_k(corpus, tmp_path, quantization, store_kwargs) -> None:
+    text_embeddings, queries = corpus
+    embedding = DeterministicFakeEmbedding(size=DIMENSIONS)
+    flat = FAISS.from_embeddings(text_embeddings, embedding, **store_kwargs)
+    store = QuantizedFAISS.from_embeddings(text_embeddings, embedding, quantization=quantization, rescore_factor=10, **store_kwargs)
+
+    for query in queries:
+        assert top_k(store.similarity_search_with_score_by_vector(query, K)) == top_k(
+            flat.similarity_search_with_score_by_vector(query, K)
+        )
+
+    # Same results with the memory-mapped full precision vectors of a saved store
+    store.save_local(str(tmp_path))
+    store = QuantizedFAISS.load_local(str(tmp_path), embedding, allow_dangerous_deserialization=True, rescore_factor=10, **store_kwargs)
+    for query in queries:
+        assert top_k(store.similarity_search_with_score_by_vector(query, K)) == top_k(
+            flat.similarity_search_with_score_by_vector(query, K)
+        )
+
+
+def test_unsupported_distance_strategy_is_rejected(corpus) -> None:
+    text_embeddings, _ = corpus
+    with pytest.raises(ValueError):
+        QuantizedFAISS.from_embeddings(
+            text_embeddings, DeterministicFakeEmbedding(size=DIMENSIONS), distance_strategy=DistanceStrategy.COSINE
+        )
@@ -0,0 +1,85 @@
+"""
+Tests for the sharded FAISS store (no network needed, synthetic vectors and a fake embedding).
+To run them go to the root directory and run the command:
+pytest -s -v vector_databases/tests
+"""
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+import pytest
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from sharded_faiss import ShardedFAISS
+
+DIMENSIONS = 16
+K = 5
+
+
+@pytest.fixture
+def corpus():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((300, DIMENSIONS)).astype(np.float32)
+    text_embeddings = [(f"doc {i}", vector) for i, vector in enumerate(vectors.tolist())]
+    metadatas = [{"parity": i % 2} for i in range(len(vectors))]
+    queries = rng.standard_normal((10, DIMENSIONS)).astype(np.float32).tolist()
+    return text_embeddings, metadatas, queries
+
+
+def top_k(results):
+    return [(doc.page_content, round(score, 4)) for doc, score in results]
+
+
+# Define test for the sharded top-k against a single flat index, on both executors
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_sharded_top_k_equals_flat_top_k(corpus, tmp_path, executor) -> None:
+    text_embeddings, metadatas, queries = corpus
+    embedding = DeterministicFakeEmbedding(size=DIMENSIONS)
+    flat = FAISS.from_embeddings(text_embeddings, embedding, metadatas=metadatas)
+    ShardedFAISS.from_embeddings(text_embeddings, embedding, metadatas=metadatas, num_shards=3).save_local(str(tmp_path))
+
+    store = ShardedFAISS.load_local(str(tmp_path), embedding, allow_dangerous_deserialization=True, executor=executor)
+    try:
+        for query in queries:
+            assert top_k(store.similarity_search_with_score_by_vector(query, K)) == top_k(
+                flat.similarity_search_with_score_by_vector(query, K)
+            )
+            # The search arguments reach the shards on both executors
+            assert top_k(store.similarity_search_with_score_by_vector(query, K, filter={"parity": 1}, fetch_k=50)) == top_k(
+                flat.similarity_search_with_score_by_vector(query, K, filter={"parity": 1}, fetch_k=50)
+            )
+    finally:
+        store.close()
+
+
+# Define test for the process executor: the shards are only loaded by the workers and the store is read-only
+def test_process_store_is_read_only(corpus, tmp_path) -> None:
+    text_embeddings, _, queries = corpus
+    embedding = DeterministicFakeEmbedding(size=DIMENSIONS)
+    ShardedFAISS.from_embeddings(text_embeddings, embedding, num_shards=3).save_local(str(tmp_path))
+
+    store = ShardedFAISS.load_local(str(tmp_path), embedding, allow_dangerous_deserialization=True, executor="process")
+    assert store.shards == [] and store.num_shards == 3
+    with pytest.raises(ValueError):
+        store.add_texts(["a new text"])
+    with pytest.raises(ValueError):
+        store.delete(["an id"])
+    with pytest.raises(ValueError):
+        store.similarity_search_by_vector(queries[0], K, filter=lambda metadata: True)
+
+
+# Define test for the updates of the thread executor store
+def test_thread_store_updates_are_searched(corpus) -> None:
+    text_embeddings, _, _ = corpus
+    embedding = DeterministicFakeEmbedding(size=DIMENSIONS)
+    store = ShardedFAISS.from_embeddings(text_embeddings, embedding, num_shards=3)
+    try:
+        [added_id] = store.add_texts(["a new text"])
+        assert store.similarity_search("a new text", k=1)[0].page_content == "a new text"
+        store.delete([added_id])
+        assert store.similarity_search("a new text", k=1)[0].page_content != "a new text"
+    finally:
+        store.close()
@@ -0,0 +1,106 @@
+"""
+Tests for the cached, concurrent YouTube transcript ingestion (no network needed, the fetcher is stubbed).
+To run them go to the root directory and run the command:
+pytest -s -v vector_databases/tests
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from youtube_ingestion import TranscriptCache, load_transcripts, load_youtube_documents, segment_transcript
+
+
+# Define a stub fetcher that records its calls and the number of concurrent requests
+class StubFetcher:
+    def __init__(self, failing=(), delay=0.05):
+        self.failing = set(failing)
+        self.delay = delay
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, video_id, languages):
+        with self.lock:
+            self.calls.append((video_id, tuple(languages)))
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self.lock:
+            self.in_flight -= 1
+        if video_id in self.failing:
+            raise RuntimeError("Transcripts are disabled")
+        return [{"text": f"{video_id} part {i}", "start": i * 10.0, "duration": 10.0} for i in range(12)]
+
+
+# Define test for the on-disk cache
+def test_transcripts_are_cached_on_disk(tmp_path) -> None:
+    fetcher = StubFetcher()
+    cache = TranscriptCache(str(tmp_path))
+
+    first = load_transcripts(["a", "b"], fetcher=fetcher, cache=cache)
+    second = load_transcripts(["a", "b"], fetcher=fetcher, cache=cache)
+
+    assert first == second
+    assert sorted(fetcher.calls) == [("a", ("en",)), ("b", ("en",))]
+
+    # Another language preference is another cache entry
+    load_transcripts(["a"], languages=("de", "en"), fetcher=fetcher, cache=cache)
+    assert fetcher.calls[-1] == ("a", ("de", "en"))
+
+
+# Define test for the bounded concurrency
+def test_fetches_run_concurrently_with_a_bounded_pool(tmp_path) -> None:
+    fetcher = StubFetcher()
+    video_ids = [f"video{i}" for i in range(8)]
+
+    transcripts = load_transcripts(video_ids, fetcher=fetcher, cache=TranscriptCache(str(tmp_path)), max_workers=3)
+
+    assert list(transcripts) == video_ids
+    assert 1 < fetcher.max_in_flight <= 3
+
+
+# Define test for videos without a transcript
+def test_failed_videos_are_skipped_and_not_cached(tmp_path) -> None:
+    fetcher = StubFetcher(failing={"b"})
+    cache = TranscriptCache(str(tmp_path))
+
+    transcripts = load_transcripts(["a", "b", "c"], fetcher=fetcher, cache=cache)
+
+    assert list(transcripts) == ["a", "c"]
+    assert cache.get("b", ("en",)) is None
+
+
+# Define test for the time-window segments
+def test_segments_keep_timestamps() -> None:
+    snippets = [{"text": f"line {i}", "start": i * 10.0, "duration": 10.0} for i in range(12)]
+
+    segments = segment_transcript("abc", snippets, segment_seconds=60)
+
+    assert [doc.page_content for doc in segments] == [
+        "line 0 line 1 line 2 line 3 line 4 line 5",
+        "line 6 line 7 line 8 line 9 line 10 line 11",
+    ]
+    assert segments[1].metadata == {
+        "source": "https://www.youtube.com/watch?v=abc&t=60s",
+        "video_id": "abc",
+        "start_seconds": 60.0,
+        "end_seconds": 120.0,
+    }
+
+
+# Define test for the whole loading flow from URLs
+def test_load_youtube_documents_from_urls(tmp_path) -> None:
+    fetcher = StubFetcher()
+
+    documents = load_youtube_documents(
+        ["https://youtu.be/_wHjDNzjF-k?si=lbinTrLyCfIx1NLB", "https://www.youtube.com/watch?v=dQw4w9WgXcQ"],
+        fetcher=fetcher,
+        cache=TranscriptCache(str(tmp_path)),
+        segment_seconds=60,
+    )
+
+    assert [doc.metadata["video_id"] for doc in documents] == ["_wHjDNzjF-k"] * 2 + ["dQw4w9WgXcQ"] * 2
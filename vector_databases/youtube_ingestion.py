@@ -0,0 +1,198 @@
+"""
+Cached, concurrent YouTube transcript ingestion.
+
+Transcripts are fetched on a bounded thread pool and stored in an on-disk cache (one JSON file per
+video ID + language preference), so re-running the ingestion only fetches the videos that are new.
+Every transcript is cut into time-window segments (SEGMENT_SECONDS each) whose metadata keeps the
+start and end timestamps and a link that opens the video at that point. The segments then go through
+the same text splitter / FAISS flow as faiss_vectorstore.py.
+
+The fetcher is a plain function `(video_id, languages) -> [{"text", "start", "duration"}, ...]`, so it
+can be replaced by a stub in tests.
+
+Run from the root directory (needs OPENAI_API_KEY):
+python vector_databases/youtube_ingestion.py <video url or id> [<video url or id> ...]
+"""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence
+
+from langchain_community.document_loaders.youtube import YoutubeLoader
+from langchain_core.documents import Document
+from youtube_transcript_api import YouTubeTranscriptApi
+
+# Define the transcript cache folder, the fetch concurrency and the segment length
+TRANSCRIPT_CACHE_DIR = os.getenv("TRANSCRIPT_CACHE_DIR", "./vector_databases/transcript_cache")
+TRANSCRIPT_MAX_WORKERS = int(os.getenv("TRANSCRIPT_MAX_WORKERS", "4"))
+SEGMENT_SECONDS = int(os.getenv("TRANSCRIPT_SEGMENT_SECONDS", "60"))
+
+# A transcript is a list of snippets: {"text": str, "start": float, "duration": float}
+TranscriptFetcher = Callable[[str, Sequence[str]], List[dict]]
+
+
+def fetch_transcript(video_id: str, languages: Sequence[str] = ("en",)) -> List[dict]:
+    """Fetch a transcript from YouTube (first available language of `languages`)"""
+    return YouTubeTranscriptApi().fetch(video_id, languages=languages).to_raw_data()
+
+
+def video_id_from_url(url_or_id: str) -> str:
+    """Accept both full YouTube URLs and bare video IDs"""
+    if "/" not in url_or_id and "." not in url_or_id:
+        return url_or_id
+    return YoutubeLoader.extract_video_id(url_or_id)
+
+
+class TranscriptCache:
+    """On-disk transcript cache, one JSON file per video ID + language preference"""
+
+    def __init__(self, folder_path: str = TRANSCRIPT_CACHE_DIR):
+        self.folder_path = folder_path
+        os.makedirs(folder_path, exist_ok=True)
+
+    def _path(self, video_id: str, languages: Sequence[str]) -> str:
+        return os.path.join(self.folder_path, f"{video_id}.{'-'.join(languages)}.json")
+
+    def get(self, video_id: str, languages: Sequence[str]) -> Optional[List[dict]]:
+        path = self._path(video_id, languages)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def put(self, video_id: str, languages: Sequence[str], snippets: List[dict]) -> None:
+        # Write to a temporary file first so an interrupted run never leaves a truncated cache entry
+        path = self._path(video_id, languages)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(snippets, f)
+        os.replace(path + ".tmp", path)
+
+
+def load_transcripts(
+    video_ids: Sequence[str],
+    languages: Sequence[str] = ("en",),
+    fetcher: TranscriptFetcher = fetch_transcript,
+    cache: Optional[TranscriptCache] = None,
+    max_workers: int = TRANSCRIPT_MAX_WORKERS,
+) -> Dict[str, List[dict]]:
+    """
+    Return {video_id: snippets} for every video whose transcript could be loaded.
+    Cached transcripts are read from disk, the others are fetched concurrently with at most
+    `max_workers` requests in flight and written to the cache.
+    """
+    cache = cache or TranscriptCache()
+    transcripts = {}
+    missing = []
+    for video_id in dict.fromkeys(video_ids):
+        snippets = cache.get(video_id, languages)
+        if snippets is None:
+            missing.append(video_id)
+        else:
+            transcripts[video_id] = snippets
+
+    def fetch_and_cache(video_id: str) -> List[dict]:
+        snippets = fetcher(video_id, languages)
+        cache.put(video_id, languages, snippets)
+        return snippets
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {video_id: executor.submit(fetch_and_cache, video_id) for video_id in missing}
+        for video_id, future in futures.items():
+            try:
+                transcripts[video_id] = future.result()
+            except Exception as e:
+                # One video without a transcript (disabled, private, ...) should not stop the whole playlist
+                print(f"Skipping {video_id}: {type(e).__name__}: {e}")
+
+    # Keep the input order
+    return {video_id: transcripts[video_id] for video_id in dict.fromkeys(video_ids) if video_id in transcripts}
+
+
+def segment_transcript(video_id: str, snippets: List[dict], segment_seconds: int = SEGMENT_SECONDS) -> List[Document]:
+    """Group the snippets into time windows of `segment_seconds`, one document per window"""
+    segments: List[Document] = []
+    window_texts: List[str] = []
+    window_start = window_end = None
+
+    def flush() -> None:
+        if window_texts:
+            start = int(window_start)
+            segments.append(
+                Document(
+                    page_content=" ".join(window_texts),
+                    metadata={
+                        "source": f"https://www.youtube.com/watch?v={video_id}&t={start}s",
+                        "video_id": video_id,
+                        "start_seconds": window_start,
+                        "end_seconds": window_end,
+                    },
+                )
+            )
+
+    for snippet in snippets:
+        text = snippet["text"].replace("\n", " ").strip()
+        if not text:
+            continue
+        if window_start is not None and snippet["start"] >= window_start + segment_seconds:
+            flush()
+            window_texts, window_start = [], None
+        if window_start is None:
+            window_start = snippet["start"]
+        window_texts.append(text)
+        window_end = snippet["start"] + snippet["duration"]
+    flush()
+    return segments
+
+
+def load_youtube_documents(
+    urls_or_ids: Sequence[str],
+    languages: Sequence[str] = ("en",),
+    fetcher: TranscriptFetcher = fetch_transcript,
+    cache: Optional[TranscriptCache] = None,
+    max_workers: int = TRANSCRIPT_MAX_WORKERS,
+    segment_seconds: int = SEGMENT_SECONDS,
+) -> List[Document]:
+    """Load the transcripts of several videos (e.g. a whole playlist) as time-window documents"""
+    transcripts = load_transcripts(
+        [video_id_from_url(url) for url in urls_or_ids],
+        languages=languages,
+        fetcher=fetcher,
+        cache=cache,
+        max_workers=max_workers,
+    )
+    return [
+        segment
+        for video_id, snippets in transcripts.items()
+        for segment in segment_transcript(video_id, snippets, segment_seconds)
+    ]
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    from dotenv import load_dotenv
+    from langchain_community.vectorstores import FAISS
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    from context_packing import add_token_counts
+    from embedding_config import get_embeddings, write_index_metadata
+
+    load_dotenv()
+
+    videos = sys.argv[1:] or ["https://youtu.be/_wHjDNzjF-k?si=lbinTrLyCfIx1NLB"]
+
+    start = time.perf_counter()
+    segments = load_youtube_documents(videos)
+    print(f"Loaded {len(segments)} segments from {len(videos)} video(s) in {time.perf_counter() - start:.2f}s")
+
+    # Split and embed the segments like faiss_vectorstore.py does with the PDF pages
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=30, separators=["\n\n", "\n", " ", ""], add_start_index=True)
+    docs = add_token_counts(text_splitter.split_documents(documents=segments))
+
+    index_path = "./vector_databases/faiss_index_youtube"
+    vectorstore = FAISS.from_documents(documents=docs, embedding=get_embeddings())
+    vectorstore.save_local(index_path)
+    write_index_metadata(index_path)
+    print(f"Indexed {len(docs)} chunks into {index_path}")